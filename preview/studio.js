@@ -33,6 +33,7 @@ const refreshGenerated = document.getElementById("refresh-generated");
 const generatedList = document.getElementById("generated-list");
 const copyButton = document.getElementById("copy-json");
 const downloadButton = document.getElementById("download-json");
+const downloadPngButton = document.getElementById("download-png");
 
 let currentJson = "{}";
 let currentAsset = null;
@@ -41,6 +42,17 @@ let currentTemplateId = "-";
 let gaugeLayers = [];
 let constraintTargets = [];
 let allowedConstraintFlags = [];
+let lastCompile = null;
+let compileController = null;
+// Identifies this tab so the server can drop its superseded compile requests.
+const clientId =
+  window.crypto && window.crypto.randomUUID
+    ? window.crypto.randomUUID()
+    : `tab-${Date.now()}-${Math.random().toString(16).slice(2)}`;
+let renderedAsset = null;
+let editSession = null;
+let liveStream = null;
+let watchedFile = null;
 
 function setStatus(message) {
   statusLabel.textContent = message;
@@ -53,6 +65,7 @@ function setPreview(svg) {
 function setJson(asset, id) {
   const normalized = normalizeAssetConstraints(asset || {});
   currentAsset = normalized;
+  renderedAsset = cloneJson(normalized);
   currentTemplateId = id || "-";
   currentJson = JSON.stringify(normalized, null, 2);
   jsonOutput.textContent = currentJson;
@@ -395,24 +408,53 @@ function updateGaugeParamVisibility(profile) {
 
 async function compileAsset(asset) {
   setStatus("再レンダ中...");
+  if (compileController) {
+    compileController.abort();
+  }
+  const controller = new AbortController();
+  compileController = controller;
   let response;
   try {
+    const headers = { "Content-Type": "application/json", "X-Client-Id": clientId };
+    if (lastCompile) {
+      headers["If-None-Match"] = lastCompile.etag;
+    }
     response = await fetch("/api/compile", {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers,
       body: JSON.stringify({ asset }),
+      signal: controller.signal,
     });
   } catch (error) {
-    setStatus("再レンダに失敗しました");
+    if (error.name !== "AbortError") {
+      setStatus("再レンダに失敗しました");
+    }
     return;
+  } finally {
+    if (compileController === controller) {
+      compileController = null;
+    }
   }
-
-  const data = await response.json();
-  if (!response.ok) {
-    setStatus(`エラー: ${data.error || "failed"}`);
+  if (controller.signal.aborted) {
     return;
   }
 
+  let data;
+  if (response.status === 304 && lastCompile) {
+    data = lastCompile.data;
+  } else {
+    data = await response.json();
+    if (data.superseded) {
+      return;
+    }
+    if (!response.ok) {
+      setStatus(`エラー: ${data.error || "failed"}`);
+      return;
+    }
+    const etag = response.headers.get("ETag");
+    lastCompile = etag ? { etag, data } : null;
+  }
+
   setPreview(data.svg);
   const selectedTemplate =
     data.asset && data.asset.metadata && data.asset.metadata.selected_templates
@@ -425,6 +467,196 @@ async function compileAsset(asset) {
   setStatus("更新完了");
 }
 
+function cloneJson(value) {
+  return JSON.parse(JSON.stringify(value));
+}
+
+function escapePointer(key) {
+  return String(key).replace(/~/g, "~0").replace(/\//g, "~1");
+}
+
+function diffToPatch(before, after, path = "", ops = []) {
+  if (before === after) {
+    return ops;
+  }
+  const sameKind =
+    before !== null &&
+    after !== null &&
+    typeof before === "object" &&
+    typeof after === "object" &&
+    Array.isArray(before) === Array.isArray(after);
+  if (!sameKind || (Array.isArray(before) && before.length !== after.length)) {
+    ops.push({ op: "replace", path, value: after });
+    return ops;
+  }
+  if (Array.isArray(before)) {
+    before.forEach((item, index) => diffToPatch(item, after[index], `${path}/${index}`, ops));
+    return ops;
+  }
+  for (const key of Object.keys(before)) {
+    const child = `${path}/${escapePointer(key)}`;
+    if (!(key in after)) {
+      ops.push({ op: "remove", path: child });
+    } else {
+      diffToPatch(before[key], after[key], child, ops);
+    }
+  }
+  for (const key of Object.keys(after)) {
+    if (!(key in before)) {
+      ops.push({ op: "add", path: `${path}/${escapePointer(key)}`, value: after[key] });
+    }
+  }
+  return ops;
+}
+
+function applyPreviewChanges(changes) {
+  const parser = new DOMParser();
+  for (const change of changes) {
+    const target = preview.querySelector(`[id="${CSS.escape(change.id)}"]`);
+    const parsed = parser.parseFromString(change.svg, "image/svg+xml").documentElement;
+    if (!target || parsed.nodeName === "parsererror") {
+      return false;
+    }
+    target.replaceWith(document.importNode(parsed, true));
+  }
+  return true;
+}
+
+function applyLiveDeltas(deltas) {
+  const parser = new DOMParser();
+  for (const delta of deltas) {
+    let target = preview.querySelector(`[id="${CSS.escape(delta.id)}"]`);
+    if (!target) {
+      return false;
+    }
+    if (delta.svg) {
+      const parsed = parser.parseFromString(delta.svg, "image/svg+xml").documentElement;
+      if (parsed.nodeName === "parsererror") {
+        return false;
+      }
+      target.replaceWith(document.importNode(parsed, true));
+      continue;
+    }
+    for (const index of delta.path || []) {
+      target = target.children[index];
+      if (!target) {
+        return false;
+      }
+    }
+    for (const [name, value] of Object.entries(delta.attrs || {})) {
+      if (value === null) {
+        target.removeAttribute(name);
+      } else {
+        target.setAttribute(name, value);
+      }
+    }
+    if (typeof delta.text === "string") {
+      target.textContent = delta.text;
+    }
+  }
+  return true;
+}
+
+async function reloadSessionPreview(sessionId) {
+  const response = await fetch(`/api/session/${sessionId}`);
+  if (!response.ok) {
+    return;
+  }
+  const data = await response.json();
+  setPreview(data.svg);
+}
+
+function openLiveStream(sessionId) {
+  if (liveStream) {
+    liveStream.close();
+  }
+  // mockState updates posted to /api/session/{id}/state (e.g. by a running
+  // simulator) arrive here as attribute/text deltas.
+  liveStream = new EventSource(`/api/session/${sessionId}/events`);
+  liveStream.addEventListener("delta", (event) => {
+    const data = JSON.parse(event.data);
+    if (!applyLiveDeltas(data.deltas)) {
+      reloadSessionPreview(sessionId);
+    }
+  });
+  liveStream.addEventListener("reset", (event) => {
+    const data = JSON.parse(event.data);
+    if (!editSession || editSession.id !== sessionId || data.version !== editSession.version) {
+      reloadSessionPreview(sessionId);
+    }
+  });
+}
+
+async function openEditSession(asset) {
+  const response = await fetch("/api/session", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ asset }),
+  });
+  const data = await response.json();
+  if (!response.ok) {
+    throw new Error(data.error || "failed");
+  }
+  editSession = { id: data.id, version: data.version, asset: cloneJson(data.asset) };
+  preview.dataset.session = data.id;
+  openLiveStream(data.id);
+  return data;
+}
+
+async function updateAsset(asset) {
+  setStatus("再レンダ中...");
+  const next = normalizeAssetConstraints(cloneJson(asset));
+  let response;
+  let data;
+  try {
+    if (!editSession) {
+      await openEditSession(renderedAsset || next);
+    }
+    const ops = diffToPatch(editSession.asset, next);
+    response = await fetch(`/api/session/${editSession.id}/patch`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ ops, version: editSession.version, mode: "delta" }),
+    });
+    data = await response.json();
+  } catch (error) {
+    editSession = null;
+    await compileAsset(asset);
+    return;
+  }
+
+  if (response.status === 404 || response.status === 409) {
+    // Session expired or diverged: fall back to a full compile.
+    editSession = null;
+    await compileAsset(asset);
+    return;
+  }
+  if (!response.ok) {
+    setStatus(`エラー: ${data.error || "failed"}`);
+    return;
+  }
+
+  editSession.version = data.version;
+  editSession.asset = next;
+  if (watchedFile) {
+    watchedFile.edited = true;
+  }
+  if (!Array.isArray(data.changes) || !applyPreviewChanges(data.changes)) {
+    if (data.svg) {
+      setPreview(data.svg);
+    } else {
+      editSession = null;
+      await compileAsset(asset);
+      return;
+    }
+  }
+  setJson(next, currentTemplateId);
+  updateTagHints(next);
+  warnUnknownTags(parseTagsInput());
+  setSaveStatus("未保存");
+  setStatus("更新完了");
+}
+
 function parseTagsInput() {
   return tagsInput.value
     .split(",")
@@ -447,6 +679,7 @@ async function generateAsset() {
     setStatus("プロンプトを入力してください");
     return;
   }
+  watchedFile = null;
   setStatus("生成中...");
 
   let response;
@@ -485,6 +718,7 @@ async function generateAsset() {
 }
 
 function clearAll() {
+  watchedFile = null;
   promptInput.value = "";
   setStatus("待機中");
   setPreview("");
@@ -553,7 +787,7 @@ function applyGaugeChanges() {
     delete entry.layer.shape_params;
   }
 
-  compileAsset(currentAsset);
+  updateAsset(currentAsset);
 }
 
 function applyConstraintChanges() {
@@ -598,7 +832,7 @@ function applyConstraintChanges() {
     delete entry.target.constraint_params;
   }
 
-  compileAsset(currentAsset);
+  updateAsset(currentAsset);
 }
 
 copyButton.addEventListener("click", async () => {
@@ -633,6 +867,7 @@ function downloadJson() {
 clearButton.addEventListener("click", clearAll);
 generateButton.addEventListener("click", generateAsset);
 downloadButton.addEventListener("click", downloadJson);
+downloadPngButton.addEventListener("click", downloadPng);
 saveButton.addEventListener("click", saveToRepo);
 applyGauge.addEventListener("click", applyGaugeChanges);
 applyConstraints.addEventListener("click", applyConstraintChanges);
@@ -663,6 +898,44 @@ for (const chip of document.querySelectorAll(".chip")) {
   });
 }
 
+async function downloadPng() {
+  if (!currentAsset || !currentJson || currentJson === "{}") {
+    setStatus("JSONがありません");
+    return;
+  }
+  setStatus("PNGを書き出し中...");
+  let response;
+  try {
+    response = await fetch("/api/render", {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "X-Client-Id": clientId },
+      body: JSON.stringify({ asset: currentAsset }),
+    });
+  } catch (error) {
+    setStatus("PNGの書き出しに失敗しました");
+    return;
+  }
+  if (response.status === 429 || response.status === 503) {
+    const retryAfter = response.headers.get("Retry-After") || "数";
+    setStatus(`レンダラーが混雑しています。${retryAfter}秒後に再試行してください`);
+    return;
+  }
+  if (!response.ok) {
+    const data = await response.json();
+    setStatus(`エラー: ${data.error || "failed"}`);
+    return;
+  }
+  const blob = await response.blob();
+  const url = URL.createObjectURL(blob);
+  const link = document.createElement("a");
+  link.href = url;
+  const filename = filenameInput.value.trim() || "ui_asset.json";
+  link.download = filename.replace(/\.json$/, "") + ".png";
+  link.click();
+  URL.revokeObjectURL(url);
+  setStatus("PNGを書き出しました");
+}
+
 async function saveToRepo() {
   if (!currentAsset || !currentAsset.assetType) {
     setSaveStatus("先に生成してください", true);
@@ -705,7 +978,7 @@ async function saveToRepo() {
 async function loadGeneratedList() {
   let response;
   try {
-    response = await fetch("/api/list_generated");
+    response = await fetch("/api/list_generated?limit=10");
   } catch (error) {
     return;
   }
@@ -762,6 +1035,7 @@ async function loadGeneratedAsset(path) {
   }
   warnUnknownTags(parseTagsInput());
   filenameInput.value = path.split("/").pop() || "";
+  watchedFile = { path, edited: false };
 }
 
 async function fetchTags() {
@@ -783,8 +1057,37 @@ async function fetchTags() {
   }
 }
 
+function watchFileChanges() {
+  // The server watches examples/, generated/ and ui-templates/ and has
+  // already recompiled changed assets, so reloading is a compile-cache hit.
+  const stream = new EventSource("/api/events");
+  stream.addEventListener("changed", (event) => {
+    const data = JSON.parse(event.data);
+    const files = Array.isArray(data.files) ? data.files : [];
+    if (files.some((file) => file.path.startsWith("generated/"))) {
+      loadGeneratedList();
+    }
+    if (files.some((file) => file.kind === "catalog")) {
+      fetchTags();
+    }
+    const current = watchedFile && files.find((file) => file.path === watchedFile.path);
+    if (!current || current.kind !== "asset") {
+      return;
+    }
+    if (current.error) {
+      setStatus(`外部で更新されたファイルにエラー: ${current.error}`);
+    } else if (watchedFile.edited) {
+      setStatus("開いているファイルが外部で更新されました（未保存の編集があるため再読み込みしません）");
+    } else {
+      editSession = null;
+      loadGeneratedAsset(watchedFile.path);
+    }
+  });
+}
+
 setJson({}, "-");
 setSelection(null);
 setSaveStatus("未保存");
 fetchTags();
 loadGeneratedList();
+watchFileChanges();
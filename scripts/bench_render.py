@@ -0,0 +1,100 @@
+"""Benchmark large PNG renders: single render vs --tile, and the stitching overhead alone.
+
+    python scripts/bench_render.py --in examples/hud_basic.mock.json --size 7680x4320 --tile 1024
+
+With the backend on PATH, times the untiled CLI path (one renderer call
+writing the PNG) against `render_tiled` plus encoding. It always times
+the stitch on its own with a stand-in renderer returning Paeth-filtered
+tiles (the slowest PNG filter to undo), with and without NumPy.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.compiler import compile_svg  # noqa: E402
+from src.renderer import encode_png, inkscape_export_png, raster, render_tiled, resvg_export_png  # noqa: E402
+from src.renderer.raster import PNG_SIGNATURE  # noqa: E402
+
+
+class PaethRenderer:
+    """Writes a Paeth-filtered RGBA PNG of the requested size without rasterizing anything."""
+
+    def export_png(self, svg_path: Path, png_path: Path, width=None, height=None) -> None:
+        png_path.write_bytes(_paeth_png(width, height))
+
+    def close(self) -> None:
+        return None
+
+
+def _paeth_png(width: int, height: int) -> bytes:
+    row = bytes([4]) + bytes((x * 7) % 251 for x in range(width * 4))
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+
+    return PNG_SIGNATURE + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(row * height, 1)) + chunk(b"IEND", b"")
+
+
+def _timed(action) -> float:
+    started = time.perf_counter()
+    action()
+    return round(time.perf_counter() - started, 3)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--in", dest="input_path", type=Path, default=ROOT / "examples" / "hud_basic.mock.json")
+    parser.add_argument("--size", default="3840x2160", help="Output WIDTHxHEIGHT")
+    parser.add_argument("--tile", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--backend", choices=["inkscape", "resvg"], default="resvg")
+    parser.add_argument("--pure", action="store_true", help="Also time the stitch without NumPy (slow)")
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.size.lower().split("x"))
+    svg = compile_svg(json.loads(args.input_path.read_text(encoding="utf-8")))
+    megapixels = width * height / 1e6
+    report = {"size": [width, height], "tile": args.tile, "workers": args.workers, "numpy": raster.np is not None}
+
+    def stitch() -> None:
+        encode_png(render_tiled(svg, width, height, args.tile, args.backend, args.workers, lambda _: PaethRenderer()))
+
+    report["stitch_seconds_per_megapixel"] = round(_timed(stitch) / megapixels, 3)
+    if args.pure and raster.np is not None:
+        numpy_module, raster.np = raster.np, None
+        try:
+            report["stitch_seconds_per_megapixel_pure"] = round(_timed(stitch) / megapixels, 3)
+        finally:
+            raster.np = numpy_module
+
+    if shutil.which(args.backend):
+        export = resvg_export_png if args.backend == "resvg" else inkscape_export_png
+        with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+            svg_path, png_path = Path(tmp) / "input.svg", Path(tmp) / "output.png"
+            svg_path.write_text(svg, encoding="utf-8")
+            report["untiled_seconds"] = _timed(lambda: export(svg_path, png_path, width=width, height=height))
+            report["tiled_seconds"] = _timed(
+                lambda: png_path.write_bytes(encode_png(render_tiled(svg, width, height, args.tile, args.backend, args.workers)))
+            )
+    else:
+        report["untiled_seconds"] = report["tiled_seconds"] = None
+        report["note"] = f"{args.backend} is not on PATH; only the stitch was timed"
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
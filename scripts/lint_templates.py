@@ -2,49 +2,15 @@
 from __future__ import annotations
 
 from pathlib import Path
-import re
+import sys
 
 ROOT = Path(__file__).resolve().parents[1]
-INDEX_PATH = ROOT / "ui-templates" / "_catalog" / "index.yaml"
-
-ROLE_RE = re.compile(r"^role:\s*([A-Za-z0-9_:-]+)\s*$")
-
-
-def parse_index(text: str) -> list[dict[str, str | list[str]]]:
-    entries: list[dict[str, str | list[str]]] = []
-    current: dict[str, str | list[str]] = {}
-
-    for line in text.splitlines():
-        stripped = line.strip()
-        if stripped.startswith("- id:"):
-            if current:
-                entries.append(current)
-            current = {"id": stripped.split(":", 1)[1].strip().strip('"')}
-        elif stripped.startswith("path:"):
-            current["path"] = stripped.split(":", 1)[1].strip().strip('"')
-        elif stripped.startswith("tags:"):
-            tags_text = stripped.split(":", 1)[1].strip()
-            tags: list[str] = []
-            if tags_text.startswith("[") and tags_text.endswith("]"):
-                inner = tags_text[1:-1].strip()
-                if inner:
-                    tags = [tag.strip() for tag in inner.split(",") if tag.strip()]
-            current["tags"] = tags
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-    if current:
-        entries.append(current)
+from src.catalog import CatalogError, load_index, load_pattern  # noqa: E402
 
-    return entries
-
-
-def read_role(path: Path) -> str | None:
-    if not path.exists():
-        return None
-    for line in path.read_text(encoding="utf-8").splitlines():
-        match = ROLE_RE.match(line.strip())
-        if match:
-            return match.group(1)
-    return None
+INDEX_PATH = ROOT / "ui-templates" / "_catalog" / "index.yaml"
 
 
 def main() -> int:
@@ -52,21 +18,22 @@ def main() -> int:
         print("WARN: index.yaml not found")
         return 0
 
-    entries = parse_index(INDEX_PATH.read_text(encoding="utf-8"))
     warnings: list[str] = []
 
-    for entry in entries:
-        path_text = entry.get("path")
-        if not isinstance(path_text, str):
+    for entry in load_index(ROOT):
+        if not entry.path:
+            continue
+        template_path = (ROOT / entry.path).resolve()
+        try:
+            pattern = load_pattern(template_path)
+        except CatalogError as exc:
+            warnings.append(f"failed to parse {entry.path}: {exc}")
             continue
-        tags = entry.get("tags")
-        tag_list = tags if isinstance(tags, list) else []
-        template_path = (ROOT / path_text).resolve()
-        role = read_role(template_path)
+        role = pattern.role if pattern else None
 
-        if "decoration" in tag_list and role != "decoration":
+        if "decoration" in entry.tags and role != "decoration":
             warnings.append(
-                f"decoration tag requires role=decoration: {path_text} (role={role})"
+                f"decoration tag requires role=decoration: {entry.path} (role={role})"
             )
 
     if warnings:
@@ -0,0 +1,315 @@
+"""Cached loader for the ui-templates catalog (tags, index, patterns)."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+CATALOG_DIR = Path("ui-templates") / "_catalog"
+ALLOWED_TAG_GROUPS = ("roles", "importance", "states", "constraints", "fx_tags")
+
+
+class CatalogError(Exception):
+    """Raised when a catalog YAML file cannot be parsed."""
+
+
+@dataclass(frozen=True)
+class TagVocabulary:
+    groups: Dict[str, Tuple[str, ...]]
+    allowed: frozenset[str]
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {key: list(values) for key, values in self.groups.items()}
+
+    def unknown(self, tags: List[str]) -> List[str]:
+        return [tag for tag in tags if tag not in self.allowed]
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    id: str
+    path: str
+    summary: str = ""
+    tags: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class PatternTemplate:
+    id: str
+    path: str
+    role: Optional[str] = None
+    importance: Optional[str] = None
+    intent: Optional[str] = None
+    when: Tuple[str, ...] = ()
+    states: Tuple[str, ...] = ()
+    constraint_flags: Tuple[str, ...] = ()
+    data: Dict[str, Any] = field(default_factory=dict, compare=False)
+
+
+@dataclass
+class _CacheEntry:
+    mtime_ns: int
+    size: int
+    value: Any
+
+
+_CACHE: Dict[Tuple[Path, str], _CacheEntry] = {}
+
+
+def load_tags(root_dir: Path = ROOT_DIR) -> TagVocabulary:
+    """Return the tag vocabulary from `_catalog/tags.yaml` (empty if missing)."""
+    path = Path(root_dir) / CATALOG_DIR / "tags.yaml"
+    return _cached(path, "tags", _build_tags, TagVocabulary(groups={}, allowed=frozenset()))
+
+
+def load_index(root_dir: Path = ROOT_DIR) -> List[IndexEntry]:
+    """Return the template index from `_catalog/index.yaml` (empty if missing)."""
+    path = Path(root_dir) / CATALOG_DIR / "index.yaml"
+    return list(_cached(path, "index", _build_index, ()))
+
+
+def load_pattern(path: Path) -> Optional[PatternTemplate]:
+    """Return a parsed pattern YAML, or None when the file does not exist."""
+    return _cached(Path(path), "pattern", _build_pattern, None)
+
+
+def clear_cache() -> None:
+    _CACHE.clear()
+
+
+def _cached(path: Path, kind: str, builder: Callable[[Path, Any], Any], missing: Any) -> Any:
+    key = (path.resolve(), kind)
+    try:
+        stat = key[0].stat()
+    except FileNotFoundError:
+        _CACHE.pop(key, None)
+        return missing
+    entry = _CACHE.get(key)
+    if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+        return entry.value
+    value = builder(key[0], parse_yaml(key[0].read_text(encoding="utf-8")))
+    _CACHE[key] = _CacheEntry(stat.st_mtime_ns, stat.st_size, value)
+    return value
+
+
+def _build_tags(path: Path, data: Any) -> TagVocabulary:
+    groups: Dict[str, Tuple[str, ...]] = {}
+    if isinstance(data, dict):
+        for key, values in data.items():
+            if isinstance(values, list):
+                groups[str(key)] = tuple(str(value) for value in values if str(value))
+            else:
+                groups[str(key)] = ()
+    allowed = frozenset(tag for key in ALLOWED_TAG_GROUPS for tag in groups.get(key, ()))
+    return TagVocabulary(groups=groups, allowed=allowed)
+
+
+def _build_index(path: Path, data: Any) -> Tuple[IndexEntry, ...]:
+    templates = data.get("templates") if isinstance(data, dict) else None
+    entries: List[IndexEntry] = []
+    for raw in templates or []:
+        if not isinstance(raw, dict) or "id" not in raw:
+            continue
+        entries.append(
+            IndexEntry(
+                id=str(raw["id"]),
+                path=str(raw.get("path", "")),
+                summary=str(raw.get("summary", "")),
+                tags=_str_tuple(raw.get("tags")),
+            )
+        )
+    return tuple(entries)
+
+
+def _build_pattern(path: Path, data: Any) -> PatternTemplate:
+    if not isinstance(data, dict):
+        raise CatalogError(f"{path}: pattern must be a mapping")
+    return PatternTemplate(
+        id=str(data.get("id", path.stem)),
+        path=str(path),
+        role=_optional_str(data.get("role")),
+        importance=_optional_str(data.get("importance")),
+        intent=_optional_str(data.get("intent")),
+        when=_str_tuple(data.get("when")),
+        states=_str_tuple(data.get("states")),
+        constraint_flags=_str_tuple(data.get("constraint_flags")),
+        data=data,
+    )
+
+
+def _str_tuple(value: Any) -> Tuple[str, ...]:
+    if not isinstance(value, list):
+        return ()
+    return tuple(str(item) for item in value)
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def parse_yaml(text: str) -> Any:
+    """Parse the block-style YAML subset used by the catalog files.
+
+    Supports nested mappings, `- ` sequences (of scalars or mappings), flow
+    lists (`[a, b]`), quoted strings, numbers, booleans and `#` comments.
+    """
+    lines: List[Tuple[int, str, int]] = []
+    for number, raw in enumerate(text.splitlines(), start=1):
+        content = _strip_comment(raw).rstrip()
+        if not content.strip():
+            continue
+        indent = len(content) - len(content.lstrip(" "))
+        lines.append((indent, content.strip(), number))
+    if not lines:
+        return {}
+    value, position = _parse_block(lines, 0, lines[0][0])
+    if position != len(lines):
+        raise CatalogError(f"line {lines[position][2]}: unexpected indentation")
+    return value
+
+
+def _parse_block(lines: List[Tuple[int, str, int]], position: int, indent: int) -> Tuple[Any, int]:
+    if lines[position][1].startswith("- ") or lines[position][1] == "-":
+        return _parse_sequence(lines, position, indent)
+    return _parse_mapping(lines, position, indent)
+
+
+def _parse_sequence(lines: List[Tuple[int, str, int]], position: int, indent: int) -> Tuple[List[Any], int]:
+    items: List[Any] = []
+    while position < len(lines):
+        line_indent, content, number = lines[position]
+        is_item = content.startswith("- ") or content == "-"
+        if line_indent < indent or (line_indent == indent and not is_item):
+            break
+        if line_indent > indent:
+            raise CatalogError(f"line {number}: expected sequence item")
+        rest = content[1:].strip()
+        position += 1
+        if not rest:
+            if position < len(lines) and lines[position][0] > indent:
+                item, position = _parse_block(lines, position, lines[position][0])
+            else:
+                item = None
+            items.append(item)
+            continue
+        key, sep, value_text = _split_key(rest)
+        if sep:
+            # "- key: value" opens a mapping whose other keys align with `key`.
+            child_indent = indent + 2
+            synthetic = [(child_indent, rest, number)]
+            end = position
+            while end < len(lines) and lines[end][0] >= child_indent:
+                end += 1
+            item, _ = _parse_mapping(synthetic + lines[position:end], 0, child_indent)
+            position = end
+            items.append(item)
+            continue
+        items.append(_parse_scalar(rest))
+    return items, position
+
+
+def _parse_mapping(lines: List[Tuple[int, str, int]], position: int, indent: int) -> Tuple[Dict[str, Any], int]:
+    mapping: Dict[str, Any] = {}
+    while position < len(lines):
+        line_indent, content, number = lines[position]
+        if line_indent < indent:
+            break
+        if line_indent > indent:
+            raise CatalogError(f"line {number}: unexpected indentation")
+        key, sep, value_text = _split_key(content)
+        if not sep:
+            raise CatalogError(f"line {number}: expected 'key: value'")
+        position += 1
+        if value_text:
+            mapping[key] = _parse_scalar(value_text)
+            continue
+        if position < len(lines) and lines[position][0] > indent:
+            mapping[key], position = _parse_block(lines, position, lines[position][0])
+        elif position < len(lines) and lines[position][0] == indent and lines[position][1].startswith("- "):
+            # Sequences may sit at the same indentation as their parent key.
+            mapping[key], position = _parse_sequence(lines, position, indent)
+        else:
+            mapping[key] = None
+    return mapping, position
+
+
+def _split_key(content: str) -> Tuple[str, str, str]:
+    if content[:1] in ("'", '"'):
+        return content, "", ""
+    key, sep, value = content.partition(":")
+    if sep and value and not value.startswith(" "):
+        return content, "", ""
+    return key.strip(), sep, value.strip()
+
+
+def _parse_scalar(text: str) -> Any:
+    if text.startswith("[") and text.endswith("]"):
+        inner = text[1:-1].strip()
+        if not inner:
+            return []
+        return [_parse_scalar(part.strip()) for part in _split_flow(inner)]
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in ("'", '"'):
+        return text[1:-1]
+    lowered = text.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered in ("null", "~"):
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _split_flow(inner: str) -> List[str]:
+    parts: List[str] = []
+    current: List[str] = []
+    quote: Optional[str] = None
+    for char in inner:
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+            continue
+        if char in ("'", '"'):
+            quote = char
+            current.append(char)
+        elif char == ",":
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part for part in parts if part.strip()]
+
+
+def _strip_comment(line: str) -> str:
+    quote: Optional[str] = None
+    for index, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = None
+            continue
+        if char in ("'", '"'):
+            quote = char
+        elif char == "#" and (index == 0 or line[index - 1] in (" ", "\t")):
+            return line[:index]
+    return line
+
+
+__all__ = [
+    "CatalogError",
+    "IndexEntry",
+    "PatternTemplate",
+    "TagVocabulary",
+    "clear_cache",
+    "load_index",
+    "load_pattern",
+    "load_tags",
+    "parse_yaml",
+]
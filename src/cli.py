@@ -2,18 +2,46 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import sys
 import tempfile
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
 
-from src.compiler import compile_svg
+from src.compiler import (
+    DEFAULT_CENTER,
+    DEFAULT_DURATION,
+    DEFAULT_PASSES,
+    DEFAULT_PRECISION,
+    BudgetExceeded,
+    CompileBudget,
+    FrameSequence,
+    analyze_asset,
+    animate_svg,
+    build_sprite,
+    compact_svg,
+    compile_svg,
+    nine_slice_asset,
+    optimize_svg,
+    plan_composite,
+    sweep_values,
+    with_state_var,
+)
 from src.renderer import (
+    RasterImage,
+    RasterSession,
+    blend_cost,
+    build_atlas,
+    encode_png,
     inkscape_export_pdf,
     inkscape_export_png,
+    render_sprites,
+    render_tiled,
     resvg_export_png,
 )
+from src.compiler.budget import DEFAULT_MAX_BYTES, DEFAULT_MAX_DEPTH, DEFAULT_MAX_ELEMENTS
+from src.renderer.atlas import DEFAULT_MAX_SIZE as DEFAULT_ATLAS_SIZE, DEFAULT_PADDING as DEFAULT_ATLAS_PADDING
 from src.validator import ValidationError, validate_asset
 
 
@@ -39,16 +67,198 @@ def build_parser() -> argparse.ArgumentParser:
         default="inkscape",
         help="Renderer backend for PNG export",
     )
+    render_parser.add_argument(
+        "--optimize",
+        nargs="?",
+        const="all",
+        metavar="PASSES",
+        help=f"Optimize the SVG (all passes, or a comma list of: {', '.join(DEFAULT_PASSES)})",
+    )
+    render_parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Trim numbers and drop default attributes and identity transforms",
+    )
+    render_parser.add_argument(
+        "--precision",
+        type=int,
+        help=f"Decimals kept by --compact (default {DEFAULT_PRECISION}); implies --compact",
+    )
+    render_parser.add_argument(
+        "--short-ids",
+        action="store_true",
+        help="Rename ids to short ones and write STEM.ids.json mapping them back; implies --compact",
+    )
+    render_parser.add_argument(
+        "--tile",
+        type=int,
+        metavar="PIXELS",
+        help="Render the PNG as square tiles of this edge in parallel and stitch them (for 4K/8K output)",
+    )
+    render_parser.add_argument(
+        "--composite",
+        action="store_true",
+        help="Render each distinct component once and alpha-blit its instances into the PNG when estimated to be faster",
+    )
+    render_parser.add_argument("--workers", type=int, default=2, help="Parallel renderer processes for --tile/--composite")
+    _add_budget_arguments(render_parser)
     render_parser.set_defaults(func=cmd_render)
 
+    analyze_parser = subparsers.add_parser("analyze", help="report element counts and raster cost as JSON")
+    analyze_parser.add_argument(
+        "--in",
+        dest="input_paths",
+        required=True,
+        type=Path,
+        nargs="+",
+        help="Asset JSON files or directories containing them",
+    )
+    analyze_parser.add_argument("--out", dest="output_path", type=Path, help="Write the report here instead of stdout")
+    analyze_parser.add_argument(
+        "--max-cost",
+        type=float,
+        help="Exit with 1 when any asset's raster_cost exceeds this",
+    )
+    analyze_parser.add_argument(
+        "--max-elements",
+        type=int,
+        help="Exit with 1 when any asset emits more elements than this",
+    )
+    analyze_parser.set_defaults(func=cmd_analyze)
+
+    sprite_parser = subparsers.add_parser("sprite", help="compile many assets into one SVG of <symbol>s")
+    sprite_parser.add_argument(
+        "--in",
+        dest="input_paths",
+        required=True,
+        type=Path,
+        nargs="+",
+        help="Asset JSON files or directories containing them",
+    )
+    sprite_parser.add_argument("--out", dest="output_path", required=True, type=Path, help="Sprite SVG to write")
+    sprite_parser.add_argument(
+        "--manifest",
+        dest="manifest_path",
+        type=Path,
+        help="Symbol manifest JSON to write (default: next to --out with a .json suffix)",
+    )
+    sprite_parser.set_defaults(func=cmd_sprite)
+
+    atlas_parser = subparsers.add_parser("atlas", help="render assets to PNG and pack them into texture atlases")
+    atlas_parser.add_argument(
+        "--in",
+        dest="input_paths",
+        required=True,
+        type=Path,
+        nargs="+",
+        help="Asset JSON files or directories containing them",
+    )
+    atlas_parser.add_argument("--out", dest="output_dir", required=True, type=Path)
+    atlas_parser.add_argument("--name", default="atlas", help="Page and sprite-map file name prefix")
+    atlas_parser.add_argument(
+        "--states",
+        dest="states_path",
+        type=Path,
+        help='JSON object of named mockState variants, e.g. {"low": {...}}; adds a STEM@NAME sprite per asset',
+    )
+    atlas_parser.add_argument("--scale", type=float, default=1.0, help="Render scale relative to the viewBox size")
+    atlas_parser.add_argument("--max-size", type=int, default=DEFAULT_ATLAS_SIZE, help="Maximum page side in pixels")
+    atlas_parser.add_argument("--padding", type=int, default=DEFAULT_ATLAS_PADDING, help="Pixels between sprites")
+    atlas_parser.add_argument("--pot", action="store_true", help="Round page sides up to powers of two")
+    atlas_parser.add_argument("--backend", choices=["inkscape", "resvg"], default="resvg")
+    atlas_parser.add_argument("--workers", type=int, default=2, help="Parallel renderer processes")
+    _add_budget_arguments(atlas_parser)
+    atlas_parser.set_defaults(func=cmd_atlas)
+
+    nineslice_parser = subparsers.add_parser(
+        "nineslice", help="export stretchable roundedRect components once at minimal size with slice insets"
+    )
+    nineslice_parser.add_argument(
+        "--in",
+        dest="input_paths",
+        required=True,
+        type=Path,
+        nargs="+",
+        help="Asset JSON files or directories containing them",
+    )
+    nineslice_parser.add_argument("--out", dest="output_dir", required=True, type=Path)
+    nineslice_parser.add_argument(
+        "--center",
+        type=int,
+        default=DEFAULT_CENTER,
+        help=f"Width of the stretchable center kept in the minimal render (default {DEFAULT_CENTER})",
+    )
+    nineslice_parser.add_argument("--png", action="store_true", help="Also render each slice source to PNG")
+    nineslice_parser.add_argument("--scale", type=float, default=1.0, help="PNG scale; insets are scaled to match")
+    nineslice_parser.add_argument("--backend", choices=["inkscape", "resvg"], default="resvg")
+    _add_budget_arguments(nineslice_parser)
+    nineslice_parser.set_defaults(func=cmd_nineslice)
+
+    frames_parser = subparsers.add_parser("frames", help="render a flipbook while sweeping one mockState variable")
+    frames_parser.add_argument("--in", dest="input_path", required=True, type=Path)
+    frames_parser.add_argument("--out", dest="output_dir", required=True, type=Path)
+    frames_parser.add_argument("--var", required=True, help="Dotted mockState variable to sweep, e.g. player.hpRatio")
+    frames_parser.add_argument("--steps", type=int, default=30, help="Number of frames (default 30)")
+    frames_parser.add_argument("--from", dest="start", type=float, default=0.0, help="First value (default 0)")
+    frames_parser.add_argument("--to", dest="end", type=float, default=1.0, help="Last value (default 1)")
+    frames_parser.add_argument("--fps", type=float, default=30.0, help="Playback rate written to the metadata")
+    frames_parser.add_argument("--strip", action="store_true", help="Write one horizontal strip instead of numbered PNGs")
+    frames_parser.add_argument("--scale", type=float, default=1.0, help="Render scale relative to the viewBox size")
+    frames_parser.add_argument("--backend", choices=["inkscape", "resvg"], default="resvg")
+    frames_parser.add_argument("--workers", type=int, default=2, help="Parallel renderer processes")
+    frames_parser.add_argument(
+        "--dirty",
+        action="store_true",
+        help="Render frames in order, re-rendering only the region each step changed",
+    )
+    _add_budget_arguments(frames_parser)
+    frames_parser.set_defaults(func=cmd_frames)
+
+    animate_parser = subparsers.add_parser("animate", help="compile one SMIL-animated SVG playing through mockStates")
+    animate_parser.add_argument("--in", dest="input_path", required=True, type=Path)
+    animate_parser.add_argument("--out", dest="output_path", required=True, type=Path, help="Animated SVG to write")
+    keyframes = animate_parser.add_mutually_exclusive_group(required=True)
+    keyframes.add_argument("--states", dest="states_path", type=Path, help="JSON array of mockState keyframes")
+    keyframes.add_argument("--var", help="Dotted mockState variable to sweep, e.g. player.hpRatio")
+    animate_parser.add_argument("--steps", type=int, default=10, help="Keyframes for --var (default 10)")
+    animate_parser.add_argument("--from", dest="start", type=float, default=0.0, help="First --var value (default 0)")
+    animate_parser.add_argument("--to", dest="end", type=float, default=1.0, help="Last --var value (default 1)")
+    animate_parser.add_argument("--dur", dest="duration", type=float, default=DEFAULT_DURATION, help="Seconds per cycle")
+    animate_parser.add_argument("--once", action="store_true", help="Play once and hold the last keyframe")
+    _add_budget_arguments(animate_parser)
+    animate_parser.set_defaults(func=cmd_animate)
+
     return parser
 
 
+def _add_budget_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--max-elements",
+        type=int,
+        default=DEFAULT_MAX_ELEMENTS,
+        help=f"Refuse assets that compile to more SVG elements than this (default {DEFAULT_MAX_ELEMENTS})",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=DEFAULT_MAX_DEPTH,
+        help=f"Refuse layouts nested deeper than this (default {DEFAULT_MAX_DEPTH})",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help=f"Refuse assets that compile to more SVG bytes than this, polygon points included (default {DEFAULT_MAX_BYTES})",
+    )
+
+
 def cmd_render(args: argparse.Namespace) -> int:
+    budget = _compile_budget(args)
     asset = _load_json(args.input_path)
     try:
         validate_asset(asset)
-    except ValidationError as exc:
+        svg_text = compile_svg(asset, budget)
+    except (ValidationError, BudgetExceeded) as exc:
         print(str(exc))
         return 1
 
@@ -60,11 +270,53 @@ def cmd_render(args: argparse.Namespace) -> int:
     backend = args.backend
 
     png_exporter = inkscape_export_png if backend == "inkscape" else resvg_export_png
+    if args.tile is not None:
+        if args.tile < 1:
+            raise SystemExit("--tile must be >= 1")
+        png_exporter = functools.partial(
+            _export_tiled_png,
+            tile_size=args.tile,
+            backend=backend,
+            workers=args.workers,
+            default_size=_asset_size(asset),
+        )
+    if args.composite:
+        if args.tile is not None:
+            raise SystemExit("--composite and --tile cannot be combined")
+        if args.optimize or args.compact or args.precision is not None or args.short_ids:
+            # Sprites are cut from the compiled asset by group id, not from the rewritten SVG.
+            raise SystemExit("--composite cannot be combined with --optimize, --compact, --precision or --short-ids")
+        png_exporter = functools.partial(
+            _export_composite_png,
+            render_full=png_exporter,
+            asset=asset,
+            budget=budget,
+            backend=backend,
+            workers=args.workers,
+            default_size=_asset_size(asset),
+        )
     pdf_exporter = inkscape_export_pdf if backend == "inkscape" else None
 
+    if args.optimize:
+        passes = None if args.optimize == "all" else [name.strip() for name in args.optimize.split(",") if name.strip()]
+        try:
+            svg_text = optimize_svg(svg_text, passes, verify=True)
+        except ValueError as exc:
+            print(str(exc))
+            return 1
+    id_map = None
+    if args.compact or args.precision is not None or args.short_ids:
+        precision = DEFAULT_PRECISION if args.precision is None else args.precision
+        if precision < 0:
+            raise SystemExit("--precision must be >= 0")
+        svg_text, id_map = compact_svg(svg_text, precision, short_ids=args.short_ids)
+
     if args.only == "svg" or args.only is None:
         svg_path = output_dir / f"{stem}.svg"
-        svg_path.write_text(compile_svg(asset), encoding="utf-8")
+        svg_path.write_text(svg_text, encoding="utf-8")
+        if args.short_ids:
+            ids_path = output_dir / f"{stem}.ids.json"
+            ids_path.write_text(json.dumps(id_map, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
     else:
         svg_path = None
 
@@ -83,7 +335,7 @@ def cmd_render(args: argparse.Namespace) -> int:
 
     with tempfile.NamedTemporaryFile(suffix=".svg", delete=False) as tmp:
         tmp_path = Path(tmp.name)
-        tmp.write(compile_svg(asset).encode("utf-8"))
+        tmp.write(svg_text.encode("utf-8"))
 
     try:
         if args.only == "png":
@@ -101,6 +353,334 @@ def cmd_render(args: argparse.Namespace) -> int:
     return 0
 
 
+def cmd_analyze(args: argparse.Namespace) -> int:
+    reports = []
+    failed = False
+    for path in _iter_asset_paths(args.input_paths):
+        entry = {"path": str(path)}
+        try:
+            asset = _load_json(path)
+            validate_asset(asset)
+            entry.update(analyze_asset(asset))
+        except (OSError, json.JSONDecodeError, ValidationError, BudgetExceeded) as exc:
+            entry["error"] = str(exc)
+            failed = True
+            reports.append(entry)
+            continue
+        over = []
+        if args.max_cost is not None and entry["raster_cost"] > args.max_cost:
+            over.append(f"raster_cost {entry['raster_cost']} > {args.max_cost}")
+        if args.max_elements is not None and entry["elements"] > args.max_elements:
+            over.append(f"elements {entry['elements']} > {args.max_elements}")
+        if over:
+            entry["over_budget"] = over
+            failed = True
+        reports.append(entry)
+
+    # Most expensive first, so CI logs lead with the assets worth looking at.
+    reports.sort(key=lambda entry: (-entry.get("raster_cost", float("inf")), entry["path"]))
+    text = json.dumps({"assets": reports}, ensure_ascii=False, indent=2)
+    if args.output_path:
+        args.output_path.parent.mkdir(parents=True, exist_ok=True)
+        args.output_path.write_text(text + "\n", encoding="utf-8")
+        print(f"OK: {args.output_path}")
+    else:
+        print(text)
+    return 1 if failed else 0
+
+
+def cmd_sprite(args: argparse.Namespace) -> int:
+    assets = []
+    for path in _iter_asset_paths(args.input_paths):
+        try:
+            asset = _load_json(path)
+            validate_asset(asset)
+        except (OSError, json.JSONDecodeError, ValidationError) as exc:
+            print(f"{path}: {exc}")
+            return 1
+        assets.append((path.stem, asset))
+    try:
+        svg_text, manifest = build_sprite(assets)
+    except ValueError as exc:
+        print(str(exc))
+        return 1
+
+    manifest_path = args.manifest_path or args.output_path.with_suffix(".json")
+    args.output_path.parent.mkdir(parents=True, exist_ok=True)
+    args.output_path.write_text(svg_text, encoding="utf-8")
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(f"OK: {args.output_path} {manifest_path} ({len(assets)} symbols)")
+    return 0
+
+
+def cmd_atlas(args: argparse.Namespace) -> int:
+    if args.scale <= 0:
+        raise SystemExit("--scale must be > 0")
+    budget = _compile_budget(args)
+    variants: dict = {}
+    if args.states_path:
+        variants = _load_json(args.states_path)
+        if not isinstance(variants, dict) or not all(isinstance(state, dict) for state in variants.values()):
+            raise SystemExit("--states must be a JSON object of mockState objects")
+
+    jobs = []
+    for path in _iter_asset_paths(args.input_paths):
+        try:
+            asset = _load_json(path)
+            validate_asset(asset)
+            width, height = _asset_size(asset, args.scale)
+            jobs.append((path.stem, compile_svg(asset, budget), width, height))
+            for variant, state in variants.items():
+                jobs.append((f"{path.stem}@{variant}", compile_svg({**asset, "mockState": state}, budget), width, height))
+        except (OSError, json.JSONDecodeError, ValidationError, BudgetExceeded) as exc:
+            print(f"{path}: {exc}")
+            return 1
+
+    try:
+        sprites = render_sprites(jobs, backend=args.backend, workers=args.workers)
+        pages, manifest = build_atlas(sprites, args.max_size, args.padding, args.pot)
+    except (RuntimeError, ValueError) as exc:
+        print(str(exc))
+        return 1
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    for index, page in enumerate(pages):
+        file_name = f"{args.name}-{index}.png"
+        (args.output_dir / file_name).write_bytes(encode_png(page))
+        manifest["pages"][index]["file"] = file_name
+    manifest_path = args.output_dir / f"{args.name}.json"
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(f"OK: {manifest_path} ({len(sprites)} sprites, {len(pages)} pages)")
+    return 0
+
+
+def cmd_nineslice(args: argparse.Namespace) -> int:
+    if args.scale <= 0:
+        raise SystemExit("--scale must be > 0")
+    budget = _compile_budget(args)
+    plans = []
+    for path in _iter_asset_paths(args.input_paths):
+        try:
+            asset = _load_json(path)
+            validate_asset(asset)
+            plans.extend(nine_slice_asset(asset, path.stem, args.center))
+        except (OSError, json.JSONDecodeError, ValidationError, ValueError) as exc:
+            print(f"{path}: {exc}")
+            return 1
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = []
+    entries = []
+    for plan in plans:
+        entry = plan.to_json(args.scale)
+        if plan.asset is not None:
+            try:
+                svg_text = compile_svg(plan.asset, budget)
+            except BudgetExceeded as exc:
+                print(f"{plan.name}: {exc}")
+                return 1
+            entry["svg"] = f"{plan.name}.9.svg"
+            (args.output_dir / entry["svg"]).write_text(svg_text, encoding="utf-8")
+            if args.png:
+                entry["png"] = f"{plan.name}.9.png"
+                jobs.append((plan.name, svg_text, entry["size"]["width"], entry["size"]["height"]))
+        else:
+            print(f"Not stretchable: {plan.name} ({'; '.join(issue.reason for issue in plan.issues)})")
+        entries.append(entry)
+    if jobs:
+        try:
+            for name, image in render_sprites(jobs, backend=args.backend):
+                (args.output_dir / f"{name}.9.png").write_bytes(encode_png(image))
+        except RuntimeError as exc:
+            print(str(exc))
+            return 1
+
+    manifest_path = args.output_dir / "nineslice.json"
+    manifest_path.write_text(json.dumps({"slices": entries}, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    stretchable = sum(1 for plan in plans if plan.asset is not None)
+    print(f"OK: {manifest_path} ({stretchable}/{len(plans)} stretchable)")
+    return 0
+
+
+def cmd_frames(args: argparse.Namespace) -> int:
+    if args.scale <= 0 or args.fps <= 0:
+        raise SystemExit("--scale and --fps must be > 0")
+    asset = _load_json(args.input_path)
+    try:
+        validate_asset(asset)
+        sequence = FrameSequence(asset, _compile_budget(args))
+        values = sweep_values(args.steps, args.start, args.end)
+    except (ValidationError, ValueError) as exc:
+        print(str(exc))
+        return 1
+    if not sequence.readers(args.var):
+        print(f"No bound layer reads {args.var}")
+        return 1
+
+    stem = args.input_path.stem
+    width, height = _asset_size(asset, args.scale)
+    jobs = [(f"{stem}_{index:04d}", svg, width, height) for index, svg in enumerate(sequence.sweep(args.var, values))]
+    regions: list = []
+    try:
+        if args.dirty:
+            rendered, regions = _render_incremental(jobs, args.backend)
+        else:
+            rendered = render_sprites(jobs, backend=args.backend, workers=args.workers)
+    except RuntimeError as exc:
+        print(str(exc))
+        return 1
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    frame_ms = 1000.0 / args.fps
+    frames = []
+    if args.strip:
+        strip = RasterImage(width * len(rendered), height)
+        for index, (_, image) in enumerate(rendered):
+            strip.blit(image, index * width, 0)
+        (args.output_dir / f"{stem}.strip.png").write_bytes(encode_png(strip))
+    for index, ((name, image), value) in enumerate(zip(rendered, values)):
+        frame = {"index": index, "value": value, "time_ms": round(index * frame_ms, 3)}
+        if regions:
+            frame["region"] = list(regions[index]) if regions[index] else None
+        if args.strip:
+            frame.update({"x": index * width, "y": 0})
+        else:
+            frame["file"] = f"{name}.png"
+            (args.output_dir / frame["file"]).write_bytes(encode_png(image))
+        frames.append(frame)
+
+    metadata = {
+        "var": args.var,
+        "width": width,
+        "height": height,
+        "fps": args.fps,
+        "frame_ms": round(frame_ms, 3),
+        "duration_ms": round(frame_ms * len(frames), 3),
+        "frames": frames,
+    }
+    if args.strip:
+        metadata["strip"] = f"{stem}.strip.png"
+    metadata_path = args.output_dir / f"{stem}.frames.json"
+    metadata_path.write_text(json.dumps(metadata, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(f"OK: {metadata_path} ({len(frames)} frames)")
+    return 0
+
+
+def cmd_animate(args: argparse.Namespace) -> int:
+    budget = _compile_budget(args)
+    asset = _load_json(args.input_path)
+    try:
+        validate_asset(asset)
+        sequence = FrameSequence(asset, budget)
+    except (ValidationError, BudgetExceeded) as exc:
+        print(str(exc))
+        return 1
+    if args.states_path:
+        states = _load_json(args.states_path)
+        if not isinstance(states, list) or not all(isinstance(state, dict) for state in states):
+            raise SystemExit("--states must be a JSON array of mockState objects")
+    else:
+        if not sequence.readers(args.var):
+            print(f"No bound layer reads {args.var}")
+            return 1
+        base = asset.get("mockState") or {}
+        try:
+            states = [with_state_var(base, args.var, value) for value in sweep_values(args.steps, args.start, args.end)]
+        except ValueError as exc:
+            print(str(exc))
+            return 1
+    try:
+        svg_text = animate_svg(asset, states, duration=args.duration, repeat=not args.once, budget=budget)
+    except ValueError as exc:
+        print(str(exc))
+        return 1
+    args.output_path.parent.mkdir(parents=True, exist_ok=True)
+    args.output_path.write_text(svg_text, encoding="utf-8")
+    print(f"OK: {args.output_path} ({len(states)} keyframes)")
+    return 0
+
+
+def _compile_budget(args: argparse.Namespace) -> CompileBudget:
+    if args.max_elements < 1 or args.max_depth < 1 or args.max_bytes < 1:
+        raise SystemExit("--max-elements, --max-depth and --max-bytes must be >= 1")
+    return CompileBudget(max_elements=args.max_elements, max_depth=args.max_depth, max_bytes=args.max_bytes)
+
+
+def _render_incremental(jobs: list, backend: str) -> Tuple[list, list]:
+    """Render frame jobs in order through one RasterSession; returns the images and re-rendered regions."""
+    rendered, regions = [], []
+    session = RasterSession(jobs[0][2], jobs[0][3], backend)
+    try:
+        for name, svg, width, height in jobs:
+            regions.append(session.update(svg))
+            rendered.append((name, session.image.crop(0, 0, width, height)))
+    finally:
+        session.close()
+    return rendered, regions
+
+
+def _export_tiled_png(
+    svg_path: Path,
+    png_path: Path,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    *,
+    tile_size: int,
+    backend: str,
+    workers: int,
+    default_size: Tuple[int, int],
+) -> None:
+    svg_text = Path(svg_path).read_text(encoding="utf-8")
+    image = render_tiled(svg_text, width or default_size[0], height or default_size[1], tile_size, backend, workers)
+    Path(png_path).write_bytes(encode_png(image))
+
+
+def _export_composite_png(
+    svg_path: Path,
+    png_path: Path,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    *,
+    render_full: Callable[..., None],
+    asset: dict,
+    budget: CompileBudget,
+    backend: str,
+    workers: int,
+    default_size: Tuple[int, int],
+) -> None:
+    width, height = width or default_size[0], height or default_size[1]
+    plan = plan_composite(asset, width, height, budget)
+    if not plan.worth_compositing(blend_cost(), workers):
+        # Too little reuse to pay for the extra renderer calls and blending.
+        render_full(svg_path, png_path, width=width, height=height)
+        return
+    jobs = [(key, sprite.svg, sprite.width, sprite.height) for key, sprite in plan.sprites.items()]
+    sprites = dict(render_sprites(jobs, backend=backend, workers=workers))
+    image = RasterImage(width, height)
+    for placement in plan.placements:
+        image.composite(sprites[placement.key], placement.x, placement.y)
+    Path(png_path).write_bytes(encode_png(image))
+
+
+def _asset_size(asset: dict, scale: float = 1.0) -> Tuple[int, int]:
+    if asset.get("assetType", "button") == "screen":
+        width, height = asset["canvas"]["width"], asset["canvas"]["height"]
+    else:
+        width, height = asset["viewBox"][2], asset["viewBox"][3]
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _iter_asset_paths(paths: list[Path]) -> list[Path]:
+    found: list[Path] = []
+    for path in paths:
+        if path.is_dir():
+            found.extend(sorted(path.glob("*.json")))
+        else:
+            found.append(path)
+    return found
+
+
 def _load_json(path: Path) -> dict:
     with Path(path).open("r", encoding="utf-8") as handle:
         return json.load(handle)
@@ -1,4 +1,40 @@
 """Compiler package exports."""
-from .compile import compile_svg
+from .analyze import analyze_asset, analyze_svg
+from .animate import DEFAULT_DURATION, animate_svg
+from .budget import BudgetExceeded, CompileBudget, CostEstimate, estimate_cost
+from .compact import DEFAULT_PRECISION, compact_svg
+from .compile import COMPILER_VERSION, compile_svg
+from .composite import CompositePlan, plan_composite
+from .diff import diff_svg
+from .frames import FrameSequence, sweep_values, with_state_var
+from .nineslice import DEFAULT_CENTER, NineSlice, nine_slice_asset
+from .optimize import DEFAULT_PASSES, OptimizationError, optimize_svg
+from .sprite import build_sprite
 
-__all__ = ["compile_svg"]
+__all__ = [
+    "BudgetExceeded",
+    "COMPILER_VERSION",
+    "CompileBudget",
+    "CompositePlan",
+    "CostEstimate",
+    "DEFAULT_CENTER",
+    "DEFAULT_DURATION",
+    "DEFAULT_PASSES",
+    "DEFAULT_PRECISION",
+    "FrameSequence",
+    "NineSlice",
+    "OptimizationError",
+    "analyze_asset",
+    "analyze_svg",
+    "animate_svg",
+    "build_sprite",
+    "compact_svg",
+    "compile_svg",
+    "diff_svg",
+    "estimate_cost",
+    "nine_slice_asset",
+    "optimize_svg",
+    "plan_composite",
+    "sweep_values",
+    "with_state_var",
+]
@@ -0,0 +1,225 @@
+"""Render-cost analysis of compiled SVG (element, filter, clip and gradient counts)."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from xml.etree import ElementTree as ET
+
+from .budget import CompileBudget, estimate_cost
+from .compile import compile_svg
+from .geometry import IDENTITY, BBox, Matrix, local_name, multiply, parse_transform, shape_bbox, transform_bbox
+
+# Relative raster cost weights, in pixels touched per canvas pixel covered.
+FILL_WEIGHT = 1.0
+GRADIENT_WEIGHT = 0.5
+CLIP_WEIGHT = 1.0
+FILTER_PRIMITIVE_WEIGHT = 1.0
+# A Gaussian blur is several box-blur passes over the whole filter region.
+BLUR_WEIGHT = 3.0
+PAINTED_TAGS = ("rect", "circle", "polygon", "path", "text")
+
+
+@dataclass
+class RenderCost:
+    """Counters for one subtree; `raster_cost` is in thousands of pixel operations."""
+
+    elements: int = 0
+    by_tag: Dict[str, int] = field(default_factory=dict)
+    filter_uses: int = 0
+    filter_region_area: float = 0.0
+    clip_path_uses: int = 0
+    gradient_uses: int = 0
+    text_spans: int = 0
+    painted_area: float = 0.0
+    pixel_ops: float = 0.0
+
+    def add(self, other: "RenderCost") -> None:
+        self.elements += other.elements
+        for tag, count in other.by_tag.items():
+            self.by_tag[tag] = self.by_tag.get(tag, 0) + count
+        self.filter_uses += other.filter_uses
+        self.filter_region_area += other.filter_region_area
+        self.clip_path_uses += other.clip_path_uses
+        self.gradient_uses += other.gradient_uses
+        self.text_spans += other.text_spans
+        self.painted_area += other.painted_area
+        self.pixel_ops += other.pixel_ops
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "elements": self.elements,
+            "by_tag": dict(sorted(self.by_tag.items())),
+            "filters": {"uses": self.filter_uses, "region_area": round(self.filter_region_area)},
+            "clip_paths": {"uses": self.clip_path_uses},
+            "gradients": {"uses": self.gradient_uses},
+            "text_spans": self.text_spans,
+            "painted_area": round(self.painted_area),
+            "raster_cost": round(self.pixel_ops / 1000, 1),
+        }
+
+
+@dataclass(frozen=True)
+class _FilterDef:
+    region: Optional[BBox]
+    weight: float
+
+
+class _Defs:
+    def __init__(self, root: ET.Element) -> None:
+        self.filters: Dict[str, _FilterDef] = {}
+        self.clips: Dict[str, Optional[BBox]] = {}
+        self.gradients: set[str] = set()
+        self.by_tag: Dict[str, int] = {}
+        for defs in root:
+            if local_name(defs.tag) != "defs":
+                continue
+            for element in defs.iter():
+                tag = local_name(element.tag)
+                self.by_tag[tag] = self.by_tag.get(tag, 0) + 1
+            for element in defs:
+                tag = local_name(element.tag)
+                element_id = element.get("id", "")
+                if tag == "filter":
+                    self.filters[element_id] = _FilterDef(_filter_region(element), _filter_weight(element))
+                elif tag == "clipPath":
+                    boxes = [shape_bbox(child) for child in element]
+                    self.clips[element_id] = next((box for box in boxes if box), None)
+                elif tag in ("linearGradient", "radialGradient"):
+                    self.gradients.add(element_id)
+
+
+def analyze_svg(svg: str, components: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Count what a compiled SVG asks the rasterizer to do.
+
+    Filter regions and clip boxes are measured in canvas pixels, after the
+    transforms of the element that references them. `components` maps
+    top-level instance ids to component ids; when given, the report also
+    breaks the cost down per component (layout children count towards the
+    component that lays them out).
+    """
+    root = ET.fromstring(svg)
+    defs = _Defs(root)
+    total = RenderCost(elements=1 + sum(defs.by_tag.values()), by_tag={"svg": 1, **defs.by_tag})
+    per_component: Dict[str, Dict[str, Any]] = {}
+    for child in root:
+        if local_name(child.tag) == "defs":
+            continue
+        cost = RenderCost()
+        _walk(child, IDENTITY, defs, cost)
+        total.add(cost)
+        component_id = (components or {}).get(child.get("id", ""))
+        if component_id is None:
+            continue
+        entry = per_component.setdefault(component_id, {"instances": 0, "cost": RenderCost()})
+        entry["instances"] += 1
+        entry["cost"].add(cost)
+
+    report = total.to_json()
+    report["filters"]["count"] = len(defs.filters)
+    report["clip_paths"]["count"] = len(defs.clips)
+    report["gradients"]["count"] = len(defs.gradients)
+    if components is not None:
+        report["components"] = [
+            {"id": component_id, "instances": entry["instances"], **entry["cost"].to_json()}
+            for component_id, entry in sorted(per_component.items())
+        ]
+    return report
+
+
+def analyze_asset(asset: Dict[str, Any], budget: Optional[CompileBudget] = None) -> Dict[str, Any]:
+    """Compile a validated asset and report its render cost plus the pre-compile estimate."""
+    estimate = estimate_cost(asset)
+    svg = compile_svg(asset, budget)
+    components = None
+    if asset.get("assetType", "button") == "screen":
+        components = {instance["id"]: instance["componentId"] for instance in asset.get("instances", [])}
+    report = analyze_svg(svg, components)
+    report["estimate"] = estimate.to_json()
+    report["svg_bytes"] = len(svg.encode("utf-8"))
+    return report
+
+
+def _walk(element: ET.Element, parent_matrix: Matrix, defs: _Defs, cost: RenderCost) -> None:
+    matrix = multiply(parent_matrix, parse_transform(element.get("transform")))
+    tag = local_name(element.tag)
+    if element.get("display") == "none":
+        # Still emitted (and parsed), but never painted.
+        for hidden in element.iter():
+            hidden_tag = local_name(hidden.tag)
+            cost.elements += 1
+            cost.by_tag[hidden_tag] = cost.by_tag.get(hidden_tag, 0) + 1
+        return
+    cost.elements += 1
+    cost.by_tag[tag] = cost.by_tag.get(tag, 0) + 1
+    if tag == "tspan":
+        cost.text_spans += 1
+
+    if tag in PAINTED_TAGS:
+        local = shape_bbox(element)
+        area = _area(transform_bbox(matrix, local)) if local else 0.0
+        cost.painted_area += area
+        cost.pixel_ops += area * FILL_WEIGHT
+        if _references(element, defs.gradients, ("fill", "stroke")):
+            cost.gradient_uses += 1
+            cost.pixel_ops += area * GRADIENT_WEIGHT
+
+    clip_id = _url_id(element.get("clip-path"))
+    if clip_id in defs.clips:
+        cost.clip_path_uses += 1
+        clip_box = defs.clips[clip_id]
+        if clip_box is not None:
+            cost.pixel_ops += _area(transform_bbox(matrix, clip_box)) * CLIP_WEIGHT
+
+    filter_id = _url_id(element.get("filter"))
+    if filter_id in defs.filters:
+        definition = defs.filters[filter_id]
+        cost.filter_uses += 1
+        if definition.region is not None:
+            region_area = _area(transform_bbox(matrix, definition.region))
+            cost.filter_region_area += region_area
+            cost.pixel_ops += region_area * definition.weight
+
+    for child in element:
+        _walk(child, matrix, defs, cost)
+
+
+def _filter_region(element: ET.Element) -> Optional[BBox]:
+    if element.get("filterUnits") != "userSpaceOnUse":
+        return None
+    try:
+        return (
+            float(element.get("x", "0")),
+            float(element.get("y", "0")),
+            float(element.get("width", "0")),
+            float(element.get("height", "0")),
+        )
+    except ValueError:
+        return None
+
+
+def _filter_weight(element: ET.Element) -> float:
+    weight = 0.0
+    for child in element.iter():
+        tag = local_name(child.tag)
+        if tag == "feGaussianBlur":
+            weight += BLUR_WEIGHT
+        elif tag.startswith("fe") and tag != "feMergeNode":
+            weight += FILTER_PRIMITIVE_WEIGHT
+    return weight
+
+
+def _references(element: ET.Element, ids: set[str], attributes: tuple[str, ...]) -> bool:
+    return any(_url_id(element.get(name)) in ids for name in attributes)
+
+
+def _url_id(value: Optional[str]) -> Optional[str]:
+    if value and value.startswith("url(#") and value.endswith(")"):
+        return value[5:-1]
+    return None
+
+
+def _area(bbox: BBox) -> float:
+    return max(bbox[2], 0.0) * max(bbox[3], 0.0)
+
+
+__all__ = ["RenderCost", "analyze_asset", "analyze_svg"]
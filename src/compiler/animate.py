@@ -0,0 +1,263 @@
+"""Animated SVG output: one document whose bound layers play through keyframe states."""
+from __future__ import annotations
+
+import copy
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree as ET
+
+from .budget import CompileBudget
+from .compact import format_number
+from .frames import FrameSequence
+
+DEFAULT_DURATION = 1.0
+# Geometry and opacity attributes that interpolate between keyframes when their
+# values share one shape (same commands, same count of numbers). Anything else
+# that varies (colors, display, font) switches at each keyframe.
+LINEAR_ATTRIBUTES = frozenset(
+    {
+        "x", "y", "width", "height", "rx", "ry", "cx", "cy", "r", "d", "points",
+        "stroke-dasharray", "stroke-dashoffset", "opacity", "fill-opacity", "stroke-opacity",
+    }
+)
+# SMIL <animate> cannot drive these; elements whose values differ are switched instead.
+STATIC_ATTRIBUTES = frozenset({"id", "transform", "clip-path", "filter"})
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+# Arc flags are not numbers to interpolate: SMIL treats any non-zero value as 1.
+_ARC_FLAGS_RE = re.compile(r"A\s*\S+\s+\S+\s+\S+\s+([01])\s+([01])")
+# The single-arc path the compiler emits for radial gauges (see `_arc_path`).
+_GAUGE_ARC_RE = re.compile(r"M (\S+) (\S+) A (\S+) \3 0 ([01]) ([01]) (\S+) (\S+)")
+# Largest step, in degrees, between the samples that carry a gauge arc along its ring.
+ARC_SAMPLE_DEGREES = 10.0
+
+
+@dataclass(frozen=True)
+class _Timing:
+    times: Tuple[float, ...]
+    duration: str
+    repeat: bool
+
+    def animate(self, name: str, values: List[str], discrete: bool, times: Optional[List[float]] = None) -> ET.Element:
+        key_times = ";".join(format_number(time, 4) for time in (times or self.times))
+        attrs = {"attributeName": name, "values": ";".join(values), "keyTimes": key_times, "dur": self.duration}
+        if discrete:
+            attrs["calcMode"] = "discrete"
+        if self.repeat:
+            attrs["repeatCount"] = "indefinite"
+        else:
+            attrs["fill"] = "freeze"
+        return ET.Element("animate", attrs)
+
+
+def animate_svg(
+    asset: Dict[str, Any],
+    states: Sequence[Dict[str, Any]],
+    duration: float = DEFAULT_DURATION,
+    repeat: bool = True,
+    budget: Optional[CompileBudget] = None,
+) -> str:
+    """One SVG whose bound layers animate (SMIL) through `states` over `duration` seconds.
+
+    Keyframes are evenly spaced. Geometry that keeps its shape across
+    keyframes (gauge dash lengths and arcs, bar widths, overlay heights)
+    interpolates, gauge arcs sweeping along their ring; other changes, and elements that appear or disappear,
+    switch at keyframe boundaries. Renderers without SMIL support show the
+    first keyframe, identical to compiling the asset with `states[0]`.
+    """
+    if len(states) < 2:
+        raise ValueError("Animation needs at least two keyframe states")
+    if duration <= 0:
+        raise ValueError("duration must be > 0")
+    last = len(states) - 1
+    timing = _Timing(
+        times=tuple(index / last for index in range(len(states))),
+        duration=f"{format_number(duration, 3)}s",
+        repeat=repeat,
+    )
+    sequence = FrameSequence(asset, budget)
+    keyframes = [sequence.live.render(state) for state in states]
+    merged: Dict[str, ET.Element] = {}
+    for group_id in keyframes[0]:
+        frames: List[Optional[ET.Element]] = [render[group_id] for render in keyframes]
+        group = _merge(frames, timing)
+        if group is None:
+            group = ET.Element("g", {"id": group_id})
+            for variant in _switch(frames, timing):
+                variant.attrib.pop("id", None)
+                group.append(variant)
+        merged[group_id] = group
+    sequence.swap(merged)
+    return ET.tostring(sequence.root, encoding="unicode")
+
+
+def _merge(frames: List[Optional[ET.Element]], timing: _Timing) -> Optional[ET.Element]:
+    """One element animating through `frames` (None where absent), or None if they cannot be merged."""
+    present = [frame for frame in frames if frame is not None]
+    template = present[0]
+    if any(frame.tag != template.tag or (frame.text or "") != (template.text or "") for frame in present):
+        return None
+    filled = _fill_gaps(frames)
+    shown = [frame is not None and frame.get("display") != "none" for frame in frames]
+
+    merged = ET.Element(template.tag)
+    merged.text = template.text
+    animations: List[ET.Element] = []
+    names = list(dict.fromkeys(name for frame in present for name in frame.attrib))
+    for name in names:
+        values = [frame.get(name) for frame in filled]
+        if name == "display":
+            continue
+        if name.startswith("data-"):
+            # Markers for scripts, not paint: keep the first keyframe's.
+            if values[0] is not None:
+                merged.set(name, values[0])
+            continue
+        if any(value is None for value in values):
+            return None
+        merged.set(name, values[0])
+        if len(set(values)) == 1:
+            continue
+        if name in STATIC_ATTRIBUTES:
+            return None
+        animation = _ring_animation(values, timing) if name == "d" else None
+        if animation is None:
+            animation = timing.animate(name, values, discrete=not _interpolates(name, values))
+        animations.append(animation)
+    if not shown[0]:
+        merged.set("display", "none")
+    if len(set(shown)) > 1:
+        animations.append(timing.animate("display", ["inline" if flag else "none" for flag in shown], discrete=True))
+
+    width = max(len(frame) for frame in present)
+    for index in range(width):
+        children = [frame[index] if frame is not None and index < len(frame) else None for frame in frames]
+        child = _merge(children, timing)
+        if child is not None:
+            child.tail = next(item.tail for item in children if item is not None)
+            merged.append(child)
+            continue
+        if merged.tag == "text":
+            # tspans cannot be switched on their own; switch the whole text element instead.
+            return None
+        merged.extend(_switch(children, timing))
+    merged.extend(animations)
+    return merged
+
+
+def _switch(frames: List[Optional[ET.Element]], timing: _Timing) -> List[ET.Element]:
+    """One copy of each distinct variant in `frames`, shown only at its keyframes."""
+    variants: Dict[str, ET.Element] = {}
+    chosen: List[Optional[str]] = []
+    for frame in frames:
+        if frame is None:
+            chosen.append(None)
+            continue
+        key = ET.tostring(frame, encoding="unicode")
+        variants.setdefault(key, frame)
+        chosen.append(key)
+    elements = []
+    for position, (key, frame) in enumerate(variants.items()):
+        element = copy.deepcopy(frame)
+        if position:
+            # Ids stay unique: later variants drop theirs and those of their descendants.
+            for descendant in element.iter():
+                descendant.attrib.pop("id", None)
+        hidden = element.get("display") == "none"
+        shown = ["inline" if choice == key and not hidden else "none" for choice in chosen]
+        if shown[0] == "none":
+            element.set("display", "none")
+        else:
+            element.attrib.pop("display", None)
+        element.append(timing.animate("display", shown, discrete=True))
+        elements.append(element)
+    return elements
+
+
+def _fill_gaps(frames: List[Optional[ET.Element]]) -> List[ET.Element]:
+    # Absent keyframes borrow the nearest present one (earlier first) so values stay defined.
+    filled: List[Optional[ET.Element]] = list(frames)
+    previous: Optional[ET.Element] = None
+    for index, frame in enumerate(frames):
+        previous = frame if frame is not None else previous
+        filled[index] = previous
+    following: Optional[ET.Element] = None
+    for index in range(len(frames) - 1, -1, -1):
+        following = frames[index] if frames[index] is not None else following
+        if filled[index] is None:
+            filled[index] = following
+    return filled  # type: ignore[return-value]
+
+
+def _interpolates(name: str, values: List[str]) -> bool:
+    if name not in LINEAR_ATTRIBUTES:
+        return False
+    shapes = {(_NUMBER_RE.sub("0", value), tuple(_ARC_FLAGS_RE.findall(value))) for value in values}
+    return len(shapes) == 1
+
+
+def _ring_animation(values: List[str], timing: _Timing) -> Optional[ET.Element]:
+    """Animate gauge arcs sharing a start point by sweeping their end along the ring.
+
+    Interpolating `d` directly would move the end point along a straight
+    chord, and flip the large-arc flag early. Samples every
+    `ARC_SAMPLE_DEGREES` (and at 180 degrees, where the flag changes) keep it
+    on the ring; keyframes keep their exact values. None for other paths.
+    """
+    matches = [_GAUGE_ARC_RE.fullmatch(value) for value in values]
+    if any(match is None for match in matches):
+        return None
+    if len({match.group(1, 2, 3, 5) for match in matches}) != 1:  # type: ignore[union-attr]
+        return None
+    start_x, start_y, radius_text, _, direction = matches[0].group(1, 2, 3, 4, 5)  # type: ignore[union-attr]
+    start = (float(start_x), float(start_y))
+    radius = float(radius_text)
+    sweeps = [_arc_sweep(start, radius, match) for match in matches]  # type: ignore[arg-type]
+    widest = max(range(len(values)), key=lambda index: sweeps[index] if sweeps[index] < 360 else -1)
+    center = _arc_center(start, radius, matches[widest])  # type: ignore[arg-type]
+    if center is None:
+        return None
+    sign = 1.0 if direction == "1" else -1.0
+    start_angle = math.degrees(math.atan2(start[1] - center[1], start[0] - center[0]))
+
+    samples: List[str] = [values[0]]
+    times: List[float] = [timing.times[0]]
+    for index in range(1, len(values)):
+        low, high = sweeps[index - 1], sweeps[index]
+        stops = [low, 180.0, high] if min(low, high) < 180 < max(low, high) else [low, high]
+        angles = stops[1:-1]
+        for first, last in zip(stops, stops[1:]):
+            steps = math.ceil(abs(last - first) / ARC_SAMPLE_DEGREES)
+            angles.extend(first + (last - first) * step / steps for step in range(1, steps))
+        for angle in sorted(angles, key=lambda value: abs(value - low)):
+            theta = math.radians(start_angle + sign * angle)
+            end_x, end_y = center[0] + math.cos(theta) * radius, center[1] + math.sin(theta) * radius
+            large = 1 if angle > 180 else 0
+            samples.append(f"M {start_x} {start_y} A {radius_text} {radius_text} 0 {large} {direction} {end_x:.2f} {end_y:.2f}")
+            times.append(timing.times[index - 1] + (timing.times[index] - timing.times[index - 1]) * (angle - low) / (high - low))
+        samples.append(values[index])
+        times.append(timing.times[index])
+    return timing.animate("d", samples, discrete=False, times=times)
+
+
+def _arc_sweep(start: Tuple[float, float], radius: float, match: "re.Match[str]") -> float:
+    """Degrees an arc sweeps, from its chord and large-arc flag."""
+    chord = math.hypot(float(match.group(6)) - start[0], float(match.group(7)) - start[1])
+    small = math.degrees(2 * math.asin(min(1.0, chord / (2 * radius)))) if radius > 0 else 0.0
+    return 360.0 - small if match.group(4) == "1" else small
+
+
+def _arc_center(start: Tuple[float, float], radius: float, match: "re.Match[str]") -> Optional[Tuple[float, float]]:
+    # Same construction as `geometry.arc_path_points`.
+    end = (float(match.group(6)), float(match.group(7)))
+    dx, dy = (end[0] - start[0]) / 2, (end[1] - start[1]) / 2
+    half = math.hypot(dx, dy)
+    if half == 0 or radius <= 0:
+        return None
+    offset = math.sqrt(max(radius * radius - half * half, 0.0))
+    sign = 1.0 if match.group(4) != match.group(5) else -1.0
+    return (start[0] + dx + sign * offset * (-dy) / half, start[1] + dy + sign * offset * dx / half)
+
+
+__all__ = ["DEFAULT_DURATION", "animate_svg"]
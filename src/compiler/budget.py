@@ -0,0 +1,286 @@
+"""Compile cost estimation and cooperative resource budgets."""
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .tokens import DEFAULT_LINEAR_GRADIENTS
+
+DEFAULT_MAX_ELEMENTS = 200_000
+DEFAULT_MAX_DEPTH = 16
+# Rough serialized size of one element (tag + typical attributes).
+ELEMENT_BYTES = 80
+# Output size allowed by default: as much as the element limit implies, so
+# the limit only bites on elements with very long attributes (polygon points).
+DEFAULT_MAX_BYTES = DEFAULT_MAX_ELEMENTS * ELEMENT_BYTES
+POINT_BYTES = 14
+TEXT_LINE_BYTES = 64
+GLOW_FILTER_ELEMENTS = 7
+
+
+class BudgetExceeded(ValueError):
+    """Raised when an asset exceeds the compile budget.
+
+    `limit` names the exhausted resource ("elements", "bytes", "depth" or
+    "deadline");
+    `estimate` is set when the asset was rejected before compiling.
+    """
+
+    def __init__(self, message: str, limit: str, estimate: Optional["CostEstimate"] = None) -> None:
+        super().__init__(message)
+        self.limit = limit
+        self.estimate = estimate
+
+    def to_json(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"error": str(self), "limit": self.limit}
+        if self.estimate is not None:
+            payload["estimate"] = self.estimate.to_json()
+        return payload
+
+
+@dataclass(frozen=True)
+class CompileBudget:
+    max_elements: int = DEFAULT_MAX_ELEMENTS
+    max_depth: int = DEFAULT_MAX_DEPTH
+    deadline_seconds: Optional[float] = None
+    max_bytes: int = DEFAULT_MAX_BYTES
+
+    def check_estimate(self, estimate: "CostEstimate") -> None:
+        """Reject an asset up front when its predicted cost is over budget."""
+        if estimate.depth > self.max_depth:
+            raise BudgetExceeded(
+                f"Layout nesting depth {estimate.depth} exceeds the limit of {self.max_depth}",
+                "depth",
+                estimate,
+            )
+        if estimate.elements > self.max_elements:
+            raise BudgetExceeded(
+                f"Asset would produce about {estimate.elements} SVG elements "
+                f"(~{estimate.bytes} bytes); the limit is {self.max_elements}",
+                "elements",
+                estimate,
+            )
+        if estimate.bytes > self.max_bytes:
+            raise BudgetExceeded(
+                f"Asset would produce about {estimate.bytes} bytes of SVG; the limit is {self.max_bytes}",
+                "bytes",
+                estimate,
+            )
+
+
+DEFAULT_BUDGET = CompileBudget()
+
+
+@dataclass(frozen=True)
+class CostEstimate:
+    """Predicted output of a compile: element count, serialized bytes, nesting depth."""
+
+    elements: int
+    bytes: int
+    depth: int
+
+    def to_json(self) -> Dict[str, int]:
+        return {"elements": self.elements, "bytes": self.bytes, "depth": self.depth}
+
+
+class BudgetTracker:
+    """Running totals for one compile, checked cooperatively by the compiler."""
+
+    def __init__(self, budget: CompileBudget = DEFAULT_BUDGET) -> None:
+        self.budget = budget
+        self.elements = 0
+        self.bytes = 0
+        self.depth = 0
+        self.started = time.monotonic()
+        self.deadline = None if budget.deadline_seconds is None else self.started + budget.deadline_seconds
+
+    def enter(self) -> None:
+        self.depth += 1
+        if self.depth > self.budget.max_depth:
+            raise BudgetExceeded(f"Layout nesting depth exceeds the limit of {self.budget.max_depth}", "depth")
+
+    def leave(self) -> None:
+        self.depth -= 1
+
+    def charge(self, elements: int, size: int = 0) -> None:
+        """Account for `elements` (about `size` bytes) about to be emitted; raises BudgetExceeded."""
+        self.elements += elements
+        self.bytes += size
+        if self.elements > self.budget.max_elements:
+            raise BudgetExceeded(
+                f"Compile produced more than {self.budget.max_elements} SVG elements",
+                "elements",
+            )
+        if self.bytes > self.budget.max_bytes:
+            raise BudgetExceeded(
+                f"Compile produced more than {self.budget.max_bytes} bytes of SVG",
+                "bytes",
+            )
+        self.check_deadline()
+
+    def check_deadline(self) -> None:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise BudgetExceeded(
+                f"Compile did not finish within {self.budget.deadline_seconds:g} seconds",
+                "deadline",
+            )
+
+
+def estimate_cost(asset: Dict[str, Any]) -> CostEstimate:
+    """Predict the compiled size of a (normalized) asset without compiling it.
+
+    Counts are upper bounds: optional elements (progress fills, ellipsis
+    lines, clip paths) are assumed present. Each component is costed once,
+    so wide grids of deeply nested components are estimated in linear time;
+    a component that (indirectly) lays itself out raises BudgetExceeded.
+    """
+    elements, size = 1, ELEMENT_BYTES
+    defs_elements = _defs_elements(asset.get("theme") or {})
+    if defs_elements:
+        elements += defs_elements + 1
+        size += (defs_elements + 1) * ELEMENT_BYTES
+
+    if asset.get("assetType", "button") == "screen":
+        components = {
+            component.get("id"): component
+            for component in asset.get("components") or []
+            if isinstance(component, dict)
+        }
+        walker = _Walker(components)
+        depth = 0
+        for instance in asset.get("instances") or []:
+            component = components.get(instance.get("componentId"))
+            if component is None:
+                continue
+            cost = walker.component(component)
+            elements += 1 + cost[0]
+            size += ELEMENT_BYTES + cost[1]
+            depth = max(depth, cost[2])
+    else:
+        cost = _Walker({}).layers(asset.get("layers") or [])
+        elements += cost[0]
+        size += cost[1]
+        depth = cost[2]
+    return CostEstimate(elements=elements, bytes=size, depth=depth)
+
+
+def layer_cost(layer: Dict[str, Any]) -> Tuple[int, int]:
+    """(elements, serialized bytes) a single layer emits itself (layout children excluded)."""
+    return _layer_cost(layer)
+
+
+_Cost = Tuple[int, int, int]
+
+
+class _Walker:
+    def __init__(self, components: Dict[str, Dict[str, Any]]) -> None:
+        self.components = components
+        self.memo: Dict[str, _Cost] = {}
+        self.visiting: List[str] = []
+
+    def component(self, component: Dict[str, Any]) -> _Cost:
+        component_id = component.get("id")
+        cached = self.memo.get(component_id)
+        if cached is not None:
+            return cached
+        if component_id in self.visiting:
+            cycle = " -> ".join(self.visiting[self.visiting.index(component_id):] + [component_id])
+            raise BudgetExceeded(f"Layout components form a cycle: {cycle}", "depth")
+        self.visiting.append(component_id)
+        try:
+            cost = self.layers(component.get("layers") or [])
+        finally:
+            self.visiting.pop()
+        self.memo[component_id] = cost
+        return cost
+
+    def layers(self, layers: Iterable[Dict[str, Any]]) -> _Cost:
+        elements = size = 0
+        depth = 1
+        for layer in layers:
+            own_elements, own_size = _layer_cost(layer)
+            elements += own_elements
+            size += own_size
+            if not _is_layout(layer):
+                continue
+            for item in layer.get("items") or []:
+                component = self.components.get(item.get("componentId"))
+                if component is None:
+                    continue
+                child = self.component(component)
+                elements += 1 + child[0]
+                size += ELEMENT_BYTES + child[1]
+                depth = max(depth, 1 + child[2])
+        return elements, size, depth
+
+
+def _is_layout(layer: Dict[str, Any]) -> bool:
+    return layer.get("shape") in ("layoutRow", "layoutColumn", "layoutGrid")
+
+
+def _layer_cost(layer: Dict[str, Any]) -> Tuple[int, int]:
+    shape = layer.get("shape")
+    elements = 1
+    size = 0
+    if shape == "roundedRect":
+        elements += 1
+        if (layer.get("style") or {}).get("glow"):
+            elements += GLOW_FILTER_ELEMENTS
+    elif shape == "cooldownOverlay":
+        elements += 1
+    elif shape in ("progressBar", "toggle"):
+        elements += 2
+    elif shape in ("text", "badge"):
+        text = layer.get("text") or {}
+        lines = _param_int(text, "maxLines", 1, minimum=1)
+        elements += 1 + lines + (1 if shape == "badge" else 0)
+        if text.get("overflow") in ("clip", "ellipsis"):
+            elements += 2
+        size += lines * TEXT_LINE_BYTES
+    elif shape == "gauge":
+        params = layer.get("shape_params")
+        params = params if isinstance(params, dict) else {}
+        profile = layer.get("shape_profile")
+        if profile == "segmented":
+            elements += _param_int(params, "segment_count", 8, minimum=1)
+        elif profile in ("polygon", "custom_svg", "unknown"):
+            fallback = 6 if profile == "polygon" else 4
+            elements += 2
+            size += 2 * _param_int(params, "sides", fallback, minimum=3) * POINT_BYTES
+        else:
+            elements += 2
+    return elements, size + elements * ELEMENT_BYTES
+
+
+def _defs_elements(theme: Dict[str, Any]) -> int:
+    # Every known gradient token may end up in <defs>, built-ins included.
+    # Glow filters are per layer and counted in _layer_cost.
+    gradients = {token: 1 + len(definition.stops) for token, definition in DEFAULT_LINEAR_GRADIENTS.items()}
+    raw_gradients = theme.get("gradients")
+    if isinstance(raw_gradients, dict):
+        for token, spec in raw_gradients.items():
+            stops = spec.get("stops") if isinstance(spec, dict) else None
+            gradients[token] = 1 + (len(stops) if isinstance(stops, list) else 0)
+    return sum(gradients.values())
+
+
+def _param_int(params: Dict[str, Any], key: str, default: int, minimum: int) -> int:
+    # Mirrors the compiler's coercion: non-finite or non-numeric values use the default.
+    value = params.get(key)
+    if not isinstance(value, (int, float)) or not math.isfinite(value):
+        return default
+    return max(int(value), minimum)
+
+
+__all__ = [
+    "BudgetExceeded",
+    "BudgetTracker",
+    "CompileBudget",
+    "CostEstimate",
+    "DEFAULT_BUDGET",
+    "DEFAULT_MAX_BYTES",
+    "estimate_cost",
+    "layer_cost",
+]
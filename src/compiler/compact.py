@@ -0,0 +1,138 @@
+"""Compact SVG output: trimmed numbers, elided default attributes and short ids."""
+from __future__ import annotations
+
+import re
+from typing import Dict, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+from .defs import rewrite_references
+from .geometry import local_name
+from .optimize import collapse_identity_transforms
+
+SVG_NS = "http://www.w3.org/2000/svg"
+DEFAULT_PRECISION = 2
+# Attributes in the 0..1 range (offsets, opacities, bbox gradient vectors)
+# keep at least this many decimals so colors and gradients do not shift.
+UNIT_PRECISION = 3
+NUMERIC_ATTRIBUTES = frozenset(
+    {
+        "x", "y", "width", "height", "rx", "ry", "cx", "cy", "r",
+        "dx", "dy", "textLength", "font-size", "stroke-width", "stroke-dasharray",
+        "stdDeviation", "transform", "d", "points", "viewBox",
+    }
+)
+UNIT_ATTRIBUTES = frozenset(
+    {"x1", "y1", "x2", "y2", "offset", "opacity", "fill-opacity", "stroke-opacity", "stop-opacity", "flood-opacity"}
+)
+# Inherited presentation attributes and their initial values.
+INHERITED_DEFAULTS = {"fill": "#000000", "stroke": "none", "stroke-width": "1", "fill-opacity": "1", "stroke-opacity": "1"}
+# Non-inherited attributes that can be dropped when they hold the spec default.
+ELEMENT_DEFAULTS = {
+    "rect": {"x": "0", "y": "0"},
+    "circle": {"cx": "0", "cy": "0"},
+    "linearGradient": {"spreadMethod": "pad", "gradientUnits": "objectBoundingBox"},
+    "stop": {"stop-opacity": "1"},
+    "feFlood": {"flood-opacity": "1"},
+    "*": {"opacity": "1"},
+}
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_SHORT_ID_ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+
+def compact_svg(
+    svg: str,
+    precision: int = DEFAULT_PRECISION,
+    short_ids: bool = False,
+) -> Tuple[str, Dict[str, str]]:
+    """Rewrite compiled SVG for shipping.
+
+    Numbers are rounded to `precision` decimals with trailing zeros
+    trimmed, identity transforms and attributes equal to their default are
+    dropped, and with `short_ids` every id is renamed in document order
+    (`a`, `b`, ..., `aa`). Returns the SVG and the `{short id: original
+    id}` map (empty without `short_ids`). The output depends only on the
+    input, so it is as deterministic as the compiler.
+    """
+    if precision < 0:
+        raise ValueError("precision must be >= 0")
+    root = ET.fromstring(svg)
+    for element in root.iter():
+        element.tag = local_name(element.tag)
+    for element in root.iter():
+        for name, value in list(element.attrib.items()):
+            if name in NUMERIC_ATTRIBUTES:
+                element.set(name, _trim_numbers(value, precision))
+            elif name in UNIT_ATTRIBUTES:
+                element.set(name, _trim_numbers(value, max(precision, UNIT_PRECISION)))
+    collapse_identity_transforms(root)
+    _elide_defaults(root, dict(INHERITED_DEFAULTS))
+    id_map = _shorten_ids(root) if short_ids else {}
+    root.attrib = {"xmlns": SVG_NS, **root.attrib}
+    return ET.tostring(root, encoding="unicode"), id_map
+
+
+def format_number(value: float, precision: int = DEFAULT_PRECISION) -> str:
+    """`value` with at most `precision` decimals and no trailing zeros (`-0` becomes `0`)."""
+    text = f"{value:.{precision}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def _trim_numbers(value: str, precision: int) -> str:
+    return _NUMBER_RE.sub(lambda match: format_number(float(match.group(0)), precision), value)
+
+
+def _elide_defaults(element: ET.Element, inherited: Dict[str, str]) -> None:
+    tag = element.tag
+    defaults = {**ELEMENT_DEFAULTS["*"], **ELEMENT_DEFAULTS.get(tag, {})}
+    for name, value in list(element.attrib.items()):
+        if defaults.get(name) == value or inherited.get(name) == value:
+            del element.attrib[name]
+    if tag == "rect":
+        rx, ry = element.get("rx"), element.get("ry")
+        # A missing ry takes rx's value and vice versa; both missing is square.
+        if rx == ry and rx in ("0", None):
+            element.attrib.pop("rx", None)
+            element.attrib.pop("ry", None)
+        elif rx == ry:
+            del element.attrib["ry"]
+    elif tag == "text" and len(element) and not (element.text or "").strip():
+        # The first line starts at the text position anyway.
+        first = element[0]
+        for name in ("x", "y"):
+            if first.tag == "tspan" and first.get(name) == element.get(name):
+                first.attrib.pop(name, None)
+    # Values that survived override what descendants inherit.
+    inherited = {**inherited, **{name: element.get(name, "") for name in INHERITED_DEFAULTS if name in element.attrib}}
+    for child in element:
+        _elide_defaults(child, inherited)
+
+
+def _shorten_ids(root: ET.Element) -> Dict[str, str]:
+    aliases: Dict[str, str] = {}
+    for element in root.iter():
+        original = element.get("id")
+        if original:
+            aliases[original] = _short_id(len(aliases))
+            element.set("id", aliases[original])
+    rewrite_references(root, aliases)
+    for element in root.iter():
+        for name in ("href", "{http://www.w3.org/1999/xlink}href"):
+            target: Optional[str] = element.get(name)
+            if target and target.startswith("#") and target[1:] in aliases:
+                element.set(name, f"#{aliases[target[1:]]}")
+    return {short: original for original, short in aliases.items()}
+
+
+def _short_id(index: int) -> str:
+    """0 -> `a`, 25 -> `z`, 26 -> `aa`: bijective base-26, always starting with a letter."""
+    text = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, len(_SHORT_ID_ALPHABET))
+        text = _SHORT_ID_ALPHABET[remainder] + text
+    return text
+
+
+__all__ = ["DEFAULT_PRECISION", "compact_svg", "format_number"]
@@ -1,41 +1,55 @@
 """JSON → SVG compiler for UI assets."""
 from __future__ import annotations
 
+import hashlib
 import math
 from xml.etree import ElementTree as ET
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from .budget import DEFAULT_BUDGET, BudgetTracker, CompileBudget, estimate_cost, layer_cost
+from .defs import content_digest, intern_defs
 from .tokens import GlowDef, GradientStop, LinearGradientDef, TokenRegistry
 
+# Bump whenever the emitted SVG changes for an unchanged asset.
+COMPILER_VERSION = "0.3.0"
+# Glow filter regions extend this many stdDeviations beyond the shape.
+GLOW_BLUR_EXTENT = 3.0
 
-def compile_svg(asset: Dict[str, Any]) -> str:
-    """Convert a validated JSON asset into SVG markup."""
+
+def compile_svg(asset: Dict[str, Any], budget: Optional[CompileBudget] = None) -> str:
+    """Convert a validated JSON asset into SVG markup.
+
+    The asset is first checked against `budget` using its estimated cost,
+    then the budget is enforced while layers are emitted; raises
+    BudgetExceeded when either check fails.
+    """
+    budget = budget or DEFAULT_BUDGET
+    budget.check_estimate(estimate_cost(asset))
+    tracker = BudgetTracker(budget)
     asset_type = asset.get("assetType", "button")
     if asset_type == "screen":
-        return _compile_screen(asset)
-    return _compile_button(asset)
+        return _compile_screen(asset, tracker)
+    return _compile_button(asset, tracker)
 
 
-def _compile_button(asset: Dict[str, Any]) -> str:
+def _compile_button(asset: Dict[str, Any], budget: BudgetTracker) -> str:
     registry = _build_registry(asset)
     view_box = asset["viewBox"]
     svg = _build_svg_root(view_box)
     state = asset.get("mockState") or {}
 
-    defs = ET.SubElement(svg, "defs")
-    gradient_ids: set[str] = set()
-    glow_ids: set[str] = set()
-    _collect_defs(asset["layers"], registry, defs, gradient_ids, glow_ids, view_box)
-
-    if len(defs) == 0:
-        svg.remove(defs)
+    defs = _build_defs(asset, registry)
+    svg.append(defs)
 
     clip_ids: set[str] = set()
-    _append_layers(svg, asset["layers"], registry, defs, clip_ids, id_prefix="", components=None, state=state)
+    _append_layers(
+        svg, asset["layers"], registry, defs, clip_ids, id_prefix="", components=None, state=state, budget=budget
+    )
+    _finish_defs(svg, defs)
     return ET.tostring(svg, encoding="unicode")
 
 
-def _compile_screen(asset: Dict[str, Any]) -> str:
+def _compile_screen(asset: Dict[str, Any], budget: BudgetTracker) -> str:
     registry = _build_registry(asset)
     canvas = asset["canvas"]
     view_box = [0, 0, canvas["width"], canvas["height"]]
@@ -45,14 +59,8 @@ def _compile_screen(asset: Dict[str, Any]) -> str:
     components = {component["id"]: component for component in asset["components"]}
     instances = asset["instances"]
 
-    defs = ET.SubElement(svg, "defs")
-    gradient_ids: set[str] = set()
-    glow_ids: set[str] = set()
-    for component in asset["components"]:
-        _collect_defs(component["layers"], registry, defs, gradient_ids, glow_ids, view_box)
-
-    if len(defs) == 0:
-        svg.remove(defs)
+    defs = _build_defs(asset, registry)
+    svg.append(defs)
 
     instance_order = sorted(instances, key=lambda item: (item.get("zIndex", 0), item["id"]))
     resolved = _resolve_instances(instance_order, components, view_box)
@@ -73,11 +81,33 @@ def _compile_screen(asset: Dict[str, Any]) -> str:
             id_prefix=f"{instance_id}--",
             components=components,
             state=state,
+            budget=budget,
         )
 
+    _finish_defs(svg, defs)
     return ET.tostring(svg, encoding="unicode")
 
 
+def _build_defs(asset: Dict[str, Any], registry: TokenRegistry) -> ET.Element:
+    """Gradients and glow filters used by the asset (clip paths are added while emitting text)."""
+    defs = ET.Element("defs")
+    gradient_ids: set[str] = set()
+    glow_ids: set[str] = set()
+    if asset.get("assetType", "button") == "screen":
+        for component in asset["components"]:
+            _collect_defs(component["layers"], registry, defs, gradient_ids, glow_ids)
+    else:
+        _collect_defs(asset["layers"], registry, defs, gradient_ids, glow_ids)
+    return defs
+
+
+def _finish_defs(svg: ET.Element, defs: ET.Element) -> None:
+    if len(defs) == 0:
+        svg.remove(defs)
+        return
+    intern_defs(svg)
+
+
 def _build_registry(asset: Dict[str, Any]) -> TokenRegistry:
     theme = asset.get("theme") or {}
     colors = _parse_theme_map(theme.get("colors"))
@@ -145,11 +175,11 @@ def _parse_glows(raw: Any) -> Dict[str, GlowDef]:
         color = spec.get("color")
         opacity = spec.get("opacity")
         std_deviation = spec.get("stdDeviation")
-        margin = spec.get("margin", 24.0)
+        margin = spec.get("margin", 0.0)
         if not isinstance(color, str) or not _is_number(opacity) or not _is_number(std_deviation):
             continue
         if not _is_number(margin):
-            margin = 24.0
+            margin = 0.0
         glows[token] = GlowDef(
             color=color,
             opacity=float(opacity),
@@ -182,8 +212,9 @@ def _build_rect_attrs(layer: Dict[str, Any], registry: TokenRegistry) -> Dict[st
         attrs["stroke"] = "none"
 
     glow_token = style.get("glow")
-    if glow_token and registry.get_glow(glow_token):
-        attrs["filter"] = f"url(#{_token_id(glow_token)})"
+    glow_def = registry.get_glow(glow_token)
+    if glow_token and glow_def:
+        attrs["filter"] = f"url(#{_glow_filter_id(glow_token, _glow_region(layer, glow_def))})"
 
     return attrs
 
@@ -212,8 +243,14 @@ def _append_layers(
     id_prefix: str,
     components: Optional[Dict[str, Dict[str, Any]]],
     state: Dict[str, Any],
+    budget: Optional[BudgetTracker] = None,
 ) -> None:
+    if budget is not None:
+        budget.enter()
     for layer in layers:
+        if budget is not None:
+            # Charged before emitting, so a huge segment or side count aborts before it is built.
+            budget.charge(*layer_cost(layer))
         group = ET.SubElement(parent, "g", {"id": f"{id_prefix}{layer['id']}"})
         bind = layer.get("bind") or {}
         if not _bind_visible(bind, state):
@@ -227,12 +264,12 @@ def _append_layers(
             ET.SubElement(group, "rect", rect_attrs)
         elif shape == "text":
             text_layer = _apply_text_binding(layer, bind, state)
-            text_element = _build_text_element(text_layer, registry, defs, clip_ids, id_prefix)
+            text_element = _build_text_element(text_layer, registry, defs, clip_ids)
             group.append(text_element)
         elif shape in ("layoutRow", "layoutColumn", "layoutGrid"):
             if components is None:
                 raise ValueError("Layout layers require component definitions.")
-            _append_layout_items(group, layer, registry, defs, clip_ids, id_prefix, components, state)
+            _append_layout_items(group, layer, registry, defs, clip_ids, id_prefix, components, state, budget)
         elif shape == "gauge":
             _append_gauge(group, layer, registry, bind, state)
         elif shape == "progressBar":
@@ -242,9 +279,14 @@ def _append_layers(
         elif shape == "toggle":
             _append_toggle(group, layer, registry, bind, state)
         elif shape == "badge":
-            _append_badge(group, layer, registry, defs, clip_ids, id_prefix, bind, state)
+            _append_badge(group, layer, registry, defs, clip_ids, bind, state)
         else:
             raise ValueError(f"Unsupported shape: {shape}")
+        if budget is not None:
+            # Also after emitting, so a slow last layer cannot overrun the deadline unnoticed.
+            budget.check_deadline()
+    if budget is not None:
+        budget.leave()
 
 
 def _build_text_element(
@@ -252,7 +294,6 @@ def _build_text_element(
     registry: TokenRegistry,
     defs: ET.Element,
     clip_ids: set[str],
-    id_prefix: str,
 ) -> ET.Element:
     rect = layer["rect"]
     text_config = layer["text"]
@@ -275,20 +316,23 @@ def _build_text_element(
 
     overflow = text_config["overflow"]
     if overflow in ("clip", "ellipsis"):
-        clip_id = f"clip-{id_prefix}{layer['id']}"
+        clip_path = ET.Element("clipPath")
+        ET.SubElement(
+            clip_path,
+            "rect",
+            {
+                "x": _fmt(rect["x"]),
+                "y": _fmt(rect["y"]),
+                "width": _fmt(rect["width"]),
+                "height": _fmt(rect["height"]),
+            },
+        )
+        # Keyed by content: every row of a list shares its label's clip.
+        clip_id = f"clip-{content_digest(clip_path)[:10]}"
         if clip_id not in clip_ids:
             clip_ids.add(clip_id)
-            clip_path = ET.SubElement(defs, "clipPath", {"id": clip_id})
-            ET.SubElement(
-                clip_path,
-                "rect",
-                {
-                    "x": _fmt(rect["x"]),
-                    "y": _fmt(rect["y"]),
-                    "width": _fmt(rect["width"]),
-                    "height": _fmt(rect["height"]),
-                },
-            )
+            clip_path.set("id", clip_id)
+            defs.append(clip_path)
         attrs["clip-path"] = f"url(#{clip_id})"
 
     text_el = ET.Element("text", attrs)
@@ -747,7 +791,6 @@ def _append_badge(
     registry: TokenRegistry,
     defs: ET.Element,
     clip_ids: set[str],
-    id_prefix: str,
     bind: Dict[str, Any],
     state: Dict[str, Any],
 ) -> None:
@@ -765,7 +808,7 @@ def _append_badge(
     text_style = layer.get("textStyle") or layer.get("style", {})
     text_layer = {**layer, "style": text_style}
     text_layer = _apply_text_binding(text_layer, bind, state)
-    text_element = _build_text_element(text_layer, registry, defs, clip_ids, id_prefix)
+    text_element = _build_text_element(text_layer, registry, defs, clip_ids)
     parent.append(text_element)
 
 
@@ -778,6 +821,7 @@ def _append_layout_items(
     id_prefix: str,
     components: Dict[str, Dict[str, Any]],
     state: Dict[str, Any],
+    budget: Optional[BudgetTracker] = None,
 ) -> None:
     layout_type = layer["shape"]
     rect = layer["rect"]
@@ -792,6 +836,8 @@ def _append_layout_items(
         component = components[component_id]
 
         item_group_id = f"{id_prefix}{layer['id']}--{item['id']}"
+        if budget is not None:
+            budget.charge(1)
         transform = _build_instance_transform(item_rect, component["viewBox"])
         group = ET.SubElement(parent, "g", {"id": item_group_id, "transform": transform})
         _append_layers(
@@ -803,6 +849,7 @@ def _append_layout_items(
             id_prefix=f"{item_group_id}--",
             components=components,
             state=state,
+            budget=budget,
         )
 
 
@@ -1155,7 +1202,6 @@ def _collect_defs(
     defs: ET.Element,
     gradient_ids: set[str],
     glow_ids: set[str],
-    view_box: list[int],
 ) -> None:
     for layer in layers:
         style = layer.get("style", {})
@@ -1165,13 +1211,17 @@ def _collect_defs(
             defs.append(_build_linear_gradient(fill_token, gradient_def))
             gradient_ids.add(fill_token)
 
+        shape = layer.get("shape")
         glow_token = style.get("glow")
         glow_def = registry.get_glow(glow_token)
-        if glow_def and glow_token not in glow_ids:
-            defs.append(_build_glow_filter(glow_token, glow_def, view_box))
-            glow_ids.add(glow_token)
+        if glow_def and shape == "roundedRect":
+            # One filter per distinct (token, region); layers that share both share it.
+            region = _glow_region(layer, glow_def)
+            filter_id = _glow_filter_id(glow_token, region)
+            if filter_id not in glow_ids:
+                defs.append(_build_glow_filter(filter_id, glow_def, region))
+                glow_ids.add(filter_id)
 
-        shape = layer.get("shape")
         if shape == "progressBar":
             track_token = layer.get("track")
             gradient_def = registry.get_linear_gradient(track_token)
@@ -1327,18 +1377,41 @@ def _build_linear_gradient(token: str, definition: LinearGradientDef) -> ET.Elem
     return gradient
 
 
-def _build_glow_filter(token: str, definition: GlowDef, view_box: list[int]) -> ET.Element:
-    vx, vy, vw, vh = view_box
-    margin = definition.margin
+def _glow_region(layer: Dict[str, Any], definition: GlowDef) -> Tuple[str, str, str, str]:
+    """Filter region of a glowing rect in its own user space, formatted for output.
+
+    The blur spreads about 3 * stdDeviation beyond the shape (stroke
+    included), so the region covers that instead of the whole view box.
+    """
+    rect = layer["rect"]
+    style = layer.get("style", {})
+    stroke_width = _coerce_number(style.get("strokeWidth")) if style.get("stroke") else None
+    pad = max(definition.std_deviation * GLOW_BLUR_EXTENT, definition.margin) + (stroke_width or 0.0) / 2
+    return (
+        _fmt(float(rect["x"]) - pad),
+        _fmt(float(rect["y"]) - pad),
+        _fmt(float(rect["width"]) + pad * 2),
+        _fmt(float(rect["height"]) + pad * 2),
+    )
+
+
+def _glow_filter_id(token: str, region: Tuple[str, str, str, str]) -> str:
+    # Content-addressed so ids stay stable when unrelated layers are edited.
+    digest = hashlib.sha1(" ".join(region).encode("utf-8")).hexdigest()[:8]
+    return f"{_token_id(token)}-{digest}"
+
+
+def _build_glow_filter(filter_id: str, definition: GlowDef, region: Tuple[str, str, str, str]) -> ET.Element:
+    x, y, width, height = region
     filter_el = ET.Element(
         "filter",
         {
-            "id": _token_id(token),
+            "id": filter_id,
             "filterUnits": "userSpaceOnUse",
-            "x": _fmt(vx - margin),
-            "y": _fmt(vy - margin),
-            "width": _fmt(vw + margin * 2),
-            "height": _fmt(vh + margin * 2),
+            "x": x,
+            "y": y,
+            "width": width,
+            "height": height,
         },
     )
     ET.SubElement(
@@ -1394,4 +1467,4 @@ def _angle_to_bbox_coords(angle: float) -> tuple[float, float, float, float]:
     return x1, y1, x2, y2
 
 
-__all__ = ["compile_svg"]
+__all__ = ["COMPILER_VERSION", "compile_svg"]
@@ -0,0 +1,234 @@
+"""Raster compositing plans: each distinct component chunk rendered once, blitted per instance."""
+from __future__ import annotations
+
+import copy
+import hashlib
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+from xml.etree import ElementTree as ET
+
+from .analyze import analyze_svg
+from .budget import CompileBudget
+from .compile import compile_svg
+from .geometry import IDENTITY, BBoxIndex, Matrix, local_name, multiply, parse_transform, transform_bbox, union
+
+SVG_NS = "http://www.w3.org/2000/svg"
+LAYOUT_SHAPES = ("layoutRow", "layoutColumn", "layoutGrid")
+# Extra pixels around each chunk's bbox for antialiasing that spills past it.
+EDGE_PAD = 1
+# Fixed cost of one renderer call (SVG parse, PNG encode and decode), in the
+# thousands of pixel operations of `analyze_svg`'s `raster_cost`.
+RENDER_CALL_COST = 3000.0
+
+
+@dataclass(frozen=True)
+class CompositeSprite:
+    """One chunk to rasterize, as a standalone SVG in output pixel space.
+
+    `x`, `y` are where the chunk lands for the placement it was planned
+    from; other placements of the same key only differ by whole pixels.
+    `cost` is the `raster_cost` of `svg`.
+    """
+
+    key: str
+    svg: str
+    x: int
+    y: int
+    width: int
+    height: int
+    cost: float = 0.0
+
+
+@dataclass(frozen=True)
+class CompositePlacement:
+    key: str
+    x: int
+    y: int
+    element_ids: Tuple[str, ...]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"sprite": self.key, "x": self.x, "y": self.y, "elements": list(self.element_ids)}
+
+
+@dataclass
+class CompositePlan:
+    """Sprites to render and where to alpha-blit them, in paint order.
+
+    `full_cost` is the `raster_cost` of rendering the whole asset at the
+    output size in one call.
+    """
+
+    width: int
+    height: int
+    sprites: Dict[str, CompositeSprite] = field(default_factory=dict)
+    placements: List[CompositePlacement] = field(default_factory=list)
+    full_cost: float = 0.0
+
+    @property
+    def reused(self) -> int:
+        """Placements served from an already planned sprite."""
+        return len(self.placements) - len(self.sprites)
+
+    def composite_cost(self, blend_cost: float, workers: int = 1) -> float:
+        """Estimated cost of rendering the sprites on `workers` renderers and blending every placement.
+
+        `blend_cost` is the cost of compositing one pixel, in `raster_cost`
+        units (`src.renderer.blend_cost()` for this process).
+        """
+        rendered = sum(RENDER_CALL_COST + sprite.cost for sprite in self.sprites.values())
+        blended = sum(self.sprites[placement.key].width * self.sprites[placement.key].height for placement in self.placements)
+        return rendered / max(1, min(workers, len(self.sprites))) + blended * blend_cost
+
+    def worth_compositing(self, blend_cost: float, workers: int = 1) -> bool:
+        """Whether compositing is estimated to beat one full render."""
+        return self.reused > 0 and self.composite_cost(blend_cost, workers) < RENDER_CALL_COST + self.full_cost
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "width": self.width,
+            "height": self.height,
+            "sprites": {key: {"width": sprite.width, "height": sprite.height} for key, sprite in self.sprites.items()},
+            "placements": [placement.to_json() for placement in self.placements],
+        }
+
+
+def plan_composite(
+    asset: Dict[str, Any],
+    width: int,
+    height: int,
+    budget: Optional[CompileBudget] = None,
+) -> CompositePlan:
+    """Split the compiled asset into chunks keyed by what they paint.
+
+    A chunk is a run of consecutive layer groups of one component (an
+    instance, or a layout item inside one); layout layers are split into
+    their items. Chunks whose markup (ids aside), scale and subpixel
+    offset match rasterize identically, so they share one sprite, which
+    makes repeated instances, list rows and grid cells render once. Each
+    axis keeps its own scale in the key, so non-uniformly scaled
+    instances only share with instances scaled the same way. Output
+    pixels map to the view box with the default `xMidYMid meet`.
+    """
+    svg = compile_svg(asset, budget)
+    root = ET.fromstring(svg)
+    for element in root.iter():
+        element.tag = local_name(element.tag)
+    view_x, view_y, view_width, view_height = (float(value) for value in root.get("viewBox", "").split())
+    scale = min(width / view_width, height / view_height)
+    to_pixels: Matrix = (
+        scale,
+        0.0,
+        0.0,
+        scale,
+        (width - view_width * scale) / 2 - view_x * scale,
+        (height - view_height * scale) / 2 - view_y * scale,
+    )
+    # Canvas units become pixels, so areas (and the cost) scale by scale**2.
+    plan = CompositePlan(width, height, full_cost=analyze_svg(svg)["raster_cost"] * scale * scale)
+    planner = _Planner(root, to_pixels, _container_ids(asset), plan)
+    planner.walk(root, IDENTITY)
+    return planner.plan
+
+
+class _Planner:
+    def __init__(self, root: ET.Element, to_pixels: Matrix, containers: Set[str], plan: CompositePlan) -> None:
+        self.index = BBoxIndex(root)
+        self.defs = [child for child in root if child.tag == "defs"]
+        self.to_pixels = to_pixels
+        self.containers = containers
+        self.plan = plan
+
+    def walk(self, element: ET.Element, matrix: Matrix) -> None:
+        run: List[ET.Element] = []
+        for child in element:
+            if child.tag == "defs":
+                continue
+            if child.get("id") not in self.containers:
+                run.append(child)
+                continue
+            self.chunk(run, matrix)
+            run = []
+            if child.get("display") != "none":
+                self.walk(child, multiply(matrix, parse_transform(child.get("transform"))))
+        self.chunk(run, matrix)
+
+    def chunk(self, elements: List[ET.Element], matrix: Matrix) -> None:
+        bbox = union(self.index.bbox(element) for element in elements)
+        if bbox is None:
+            return
+        left, top, box_width, box_height = transform_bbox(self.to_pixels, bbox)
+        x, y = max(math.floor(left) - EDGE_PAD, 0), max(math.floor(top) - EDGE_PAD, 0)
+        right = min(math.ceil(left + box_width) + EDGE_PAD, self.plan.width)
+        bottom = min(math.ceil(top + box_height) + EDGE_PAD, self.plan.height)
+        if right <= x or bottom <= y:
+            return
+        pixel_matrix = multiply(self.to_pixels, matrix)
+        a, b, c, d, e, f = pixel_matrix
+        signature = "".join(_anonymous_markup(element) for element in elements)
+        signature += f"|{a:.4f} {b:.4f} {c:.4f} {d:.4f} {e - x:.3f} {f - y:.3f} {right - x}x{bottom - y}"
+        key = hashlib.sha1(signature.encode("utf-8")).hexdigest()[:12]
+        if key not in self.plan.sprites:
+            svg = self.sprite_svg(elements, pixel_matrix, x, y, right - x, bottom - y)
+            cost = analyze_svg(svg)["raster_cost"]
+            self.plan.sprites[key] = CompositeSprite(key, svg, x, y, right - x, bottom - y, cost)
+        element_ids = tuple(element.get("id", "") for element in elements)
+        self.plan.placements.append(CompositePlacement(key, x, y, element_ids))
+
+    def sprite_svg(self, elements: List[ET.Element], matrix: Matrix, x: int, y: int, width: int, height: int) -> str:
+        svg = ET.Element(
+            "svg",
+            {
+                "xmlns": SVG_NS,
+                "version": "1.1",
+                "viewBox": f"{x} {y} {width} {height}",
+                "width": str(width),
+                "height": str(height),
+            },
+        )
+        svg.extend(copy.deepcopy(self.defs))
+        group = ET.SubElement(svg, "g", {"transform": "matrix({})".format(" ".join(_number(value) for value in matrix))})
+        group.extend(copy.deepcopy(elements))
+        return ET.tostring(svg, encoding="unicode")
+
+
+def _container_ids(asset: Dict[str, Any]) -> Set[str]:
+    """Ids of compiled groups that hold whole components: instances, layout layers and their items."""
+    if asset.get("assetType", "button") != "screen":
+        return set()
+    components = {component["id"]: component for component in asset["components"]}
+    found: Set[str] = set()
+
+    def collect(layers: List[Dict[str, Any]], prefix: str) -> None:
+        for layer in layers:
+            if layer.get("shape") not in LAYOUT_SHAPES:
+                continue
+            layout_id = f"{prefix}{layer['id']}"
+            found.add(layout_id)
+            for item in layer.get("items", []):
+                item_id = f"{layout_id}--{item['id']}"
+                found.add(item_id)
+                component = components.get(item["componentId"])
+                if component is not None:
+                    collect(component["layers"], f"{item_id}--")
+
+    for instance in asset["instances"]:
+        found.add(instance["id"])
+        collect(components[instance["componentId"]]["layers"], f"{instance['id']}--")
+    return found
+
+
+def _anonymous_markup(element: ET.Element) -> str:
+    clone = copy.deepcopy(element)
+    clone.tail = None
+    for descendant in clone.iter():
+        descendant.attrib.pop("id", None)
+    return ET.tostring(clone, encoding="unicode")
+
+
+def _number(value: float) -> str:
+    text = f"{value:.6f}".rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+__all__ = ["CompositePlacement", "CompositePlan", "CompositeSprite", "plan_composite"]
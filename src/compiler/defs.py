@@ -0,0 +1,69 @@
+"""Content-based interning of <defs> entries (clipPaths, gradients, filters)."""
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Dict, List, Tuple
+from xml.etree import ElementTree as ET
+
+from .geometry import local_name
+
+REFERENCE_ATTRIBUTES = ("fill", "stroke", "filter", "clip-path", "mask")
+_URL_RE = re.compile(r"url\(#([^)]+)\)")
+
+
+def content_digest(element: ET.Element) -> str:
+    """Hash of an element subtree, ignoring its own `id`."""
+    return hashlib.sha1(repr(_signature(element, root=True)).encode("utf-8")).hexdigest()
+
+
+def intern_defs(root: ET.Element) -> Dict[str, str]:
+    """Merge identical <defs> children and point references at the survivor.
+
+    Of each group of defs with the same content, the first in document
+    order keeps its id and position; later copies are removed. Returns the
+    `{removed id: kept id}` aliases, already applied to `root`.
+    """
+    aliases: Dict[str, str] = {}
+    for defs in root:
+        if local_name(defs.tag) != "defs":
+            continue
+        kept: Dict[str, str] = {}
+        duplicates: List[ET.Element] = []
+        for element in defs:
+            element_id = element.get("id")
+            if not element_id:
+                continue
+            digest = content_digest(element)
+            if digest in kept:
+                aliases[element_id] = kept[digest]
+                duplicates.append(element)
+            else:
+                kept[digest] = element_id
+        for element in duplicates:
+            defs.remove(element)
+    if aliases:
+        rewrite_references(root, aliases)
+    return aliases
+
+
+def rewrite_references(element: ET.Element, aliases: Dict[str, str]) -> None:
+    """Replace `url(#old)` references in `element` and its subtree."""
+    for node in element.iter():
+        for name in REFERENCE_ATTRIBUTES:
+            value = node.get(name)
+            if value and "url(#" in value:
+                node.set(name, _URL_RE.sub(lambda match: f"url(#{aliases.get(match.group(1), match.group(1))})", value))
+
+
+def _signature(element: ET.Element, root: bool = False) -> Tuple[object, ...]:
+    attributes = sorted((name, value) for name, value in element.attrib.items() if not (root and name == "id"))
+    return (
+        element.tag,
+        tuple(attributes),
+        (element.text or "").strip(),
+        tuple(_signature(child) for child in element),
+    )
+
+
+__all__ = ["content_digest", "intern_defs", "rewrite_references"]
@@ -0,0 +1,156 @@
+"""Structural diff between two compiled SVG documents."""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Set
+from xml.etree import ElementTree as ET
+
+from .geometry import BBox, BBoxIndex, local_name, union
+
+_URL_RE = re.compile(r"url\(#([^)]+)\)")
+_HREF_ATTRIBUTES = ("href", "{http://www.w3.org/1999/xlink}href")
+
+
+def diff_svg(before_svg: str, after_svg: str) -> Dict[str, Any]:
+    """Compare two compiled SVGs element by element, keyed by group id.
+
+    Elements are matched through the deterministic ids the compiler emits
+    (`instance--layer--item`), so the result lists which ids were added,
+    removed or changed. Changed entries carry per-attribute before/after
+    values and whether id-less content beneath them (shapes, text) changed.
+    Every entry has a canvas-space `bbox`; `bounds` is their union. Entries
+    under `<defs>` (gradients, filters, clip paths) paint nothing themselves,
+    so their `bbox` is that of the elements referencing them.
+    """
+    before_root = ET.fromstring(before_svg)
+    after_root = ET.fromstring(after_svg)
+    before_index = _DefAwareIndex(before_root)
+    after_index = _DefAwareIndex(after_root)
+    before_ids = _id_map(before_root)
+    after_ids = _id_map(after_root)
+
+    added: List[Dict[str, Any]] = []
+    removed: List[Dict[str, Any]] = []
+    changed: List[Dict[str, Any]] = []
+
+    for element_id, element in after_ids.items():
+        if element_id not in before_ids:
+            added.append(_entry(element_id, element, after_index.bbox(element)))
+
+    for element_id, element in before_ids.items():
+        if element_id not in after_ids:
+            removed.append(_entry(element_id, element, before_index.bbox(element)))
+            continue
+        other = after_ids[element_id]
+        attributes = _attribute_changes(element.attrib, other.attrib)
+        content_changed = _content_signature(element) != _content_signature(other)
+        if not attributes and not content_changed and element.tag == other.tag:
+            continue
+        bbox = union([before_index.bbox(element), after_index.bbox(other)])
+        entry = _entry(element_id, other, bbox)
+        entry["attributes"] = attributes
+        entry["content_changed"] = content_changed
+        changed.append(entry)
+
+    root_changes = _attribute_changes(before_root.attrib, after_root.attrib)
+    regions = [entry["bbox"] for entry in added + removed + changed if entry["bbox"] is not None]
+    bounds = union(_as_bbox(region) for region in regions)
+    return {
+        "identical": not (added or removed or changed or root_changes),
+        "root": root_changes,
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "bounds": _round_bbox(bounds),
+    }
+
+
+class _DefAwareIndex(BBoxIndex):
+    """`BBoxIndex` whose boxes for `<defs>` content are those of the elements using it."""
+
+    def __init__(self, root: ET.Element) -> None:
+        super().__init__(root)
+        self._def_owner: Dict[int, str] = {}
+        for child in root:
+            if local_name(child.tag) == "defs":
+                for definition in child:
+                    for element in definition.iter():
+                        self._def_owner[id(element)] = definition.get("id", "")
+        self._users: Optional[Dict[str, List[ET.Element]]] = None
+
+    def bbox(self, element: ET.Element) -> Optional[BBox]:
+        owner = self._def_owner.get(id(element))
+        if owner is None:
+            return super().bbox(element)
+        return union(BBoxIndex.bbox(self, user) for user in self._referencing({owner}))
+
+    def _referencing(self, targets: Set[str]) -> List[ET.Element]:
+        """Painted elements referencing `targets`, following defs that reference other defs."""
+        users = self._reference_map()
+        pending, seen, found = list(targets), set(targets), []
+        while pending:
+            for user in users.get(pending.pop(), []):
+                owner = self._def_owner.get(id(user))
+                if owner is None:
+                    found.append(user)
+                elif owner and owner not in seen:
+                    seen.add(owner)
+                    pending.append(owner)
+        return found
+
+    def _reference_map(self) -> Dict[str, List[ET.Element]]:
+        if self._users is None:
+            self._users = {}
+            for element in self.root.iter():
+                for name, value in element.attrib.items():
+                    targets = _URL_RE.findall(value)
+                    if name in _HREF_ATTRIBUTES and value.startswith("#"):
+                        targets.append(value[1:])
+                    for target in targets:
+                        self._users.setdefault(target, []).append(element)
+        return self._users
+
+
+def _id_map(root: ET.Element) -> Dict[str, ET.Element]:
+    mapping: Dict[str, ET.Element] = {}
+    for element in root.iter():
+        element_id = element.get("id")
+        if element_id and element is not root:
+            mapping[element_id] = element
+    return mapping
+
+
+def _entry(element_id: str, element: ET.Element, bbox: Optional[BBox]) -> Dict[str, Any]:
+    return {"id": element_id, "tag": local_name(element.tag), "bbox": _round_bbox(bbox)}
+
+
+def _attribute_changes(before: Dict[str, str], after: Dict[str, str]) -> Dict[str, Dict[str, Optional[str]]]:
+    changes: Dict[str, Dict[str, Optional[str]]] = {}
+    for name in sorted(set(before) | set(after)):
+        if before.get(name) != after.get(name):
+            changes[name] = {"before": before.get(name), "after": after.get(name)}
+    return changes
+
+
+def _content_signature(element: ET.Element) -> List[Any]:
+    """Serialize the id-less descendants; id'd children are diffed on their own."""
+    signature: List[Any] = [(element.text or "").strip()]
+    for child in element:
+        if child.get("id"):
+            signature.append(("ref", child.get("id")))
+            continue
+        signature.append((child.tag, sorted(child.attrib.items()), _content_signature(child)))
+    return signature
+
+
+def _round_bbox(bbox: Optional[BBox]) -> Optional[List[float]]:
+    if bbox is None:
+        return None
+    return [round(value, 2) for value in bbox]
+
+
+def _as_bbox(values: List[float]) -> BBox:
+    return (values[0], values[1], values[2], values[3])
+
+
+__all__ = ["diff_svg"]
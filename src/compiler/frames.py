@@ -0,0 +1,97 @@
+"""Frame sequences: one compiled SVG per step of a swept mockState variable."""
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+from .budget import CompileBudget
+from .compile import compile_svg
+from .geometry import local_name
+from .live import LiveBindings
+
+SVG_NS = "http://www.w3.org/2000/svg"
+
+
+def sweep_values(steps: int, start: float = 0.0, end: float = 1.0) -> List[float]:
+    """`steps` evenly spaced values from `start` to `end`, both included."""
+    if steps < 1:
+        raise ValueError("steps must be >= 1")
+    if steps == 1:
+        return [start]
+    return [start + (end - start) * index / (steps - 1) for index in range(steps)]
+
+
+def with_state_var(state: Dict[str, Any], var_path: str, value: Any) -> Dict[str, Any]:
+    """A copy of `state` with the dotted `var_path` set to `value`."""
+    updated = copy.deepcopy(state)
+    current = updated
+    segments = var_path.split(".")
+    for segment in segments[:-1]:
+        child = current.get(segment)
+        if not isinstance(child, dict):
+            child = {}
+            current[segment] = child
+        current = child
+    current[segments[-1]] = value
+    return updated
+
+
+class FrameSequence:
+    """Compile an asset once, then re-render only its bound layers per frame.
+
+    Layers whose `bind` does not depend on mockState come out of the first
+    full compile and are reused as-is in `root`; each frame swaps in the
+    bound groups `LiveBindings` renders for that frame's state.
+    """
+
+    def __init__(self, asset: Dict[str, Any], budget: Optional[CompileBudget] = None) -> None:
+        self.asset = asset
+        self.live = LiveBindings(asset)
+        self.root = ET.fromstring(compile_svg(asset, budget))
+        for element in self.root.iter():
+            element.tag = local_name(element.tag)
+        self.root.attrib = {"xmlns": SVG_NS, **self.root.attrib}
+        wanted = {target.group_id for target in self.live.targets}
+        self._slots: Dict[str, Tuple[ET.Element, int]] = {}
+        for parent in self.root.iter():
+            for index, child in enumerate(parent):
+                if child.get("id") in wanted:
+                    self._slots[child.get("id", "")] = (parent, index)
+
+    def render(self, state: Dict[str, Any], group_ids: Optional[List[str]] = None) -> str:
+        """Full SVG for `state`, equal to compiling the asset with that mockState.
+
+        With `group_ids`, only those bound groups are re-rendered; the
+        caller guarantees the others do not depend on what changed.
+        """
+        self.swap(self.live.render(state, group_ids))
+        return ET.tostring(self.root, encoding="unicode")
+
+    def swap(self, groups: Dict[str, ET.Element]) -> None:
+        """Put `groups` (bound group id -> element) in place of the current ones in `root`."""
+        for group_id, group in groups.items():
+            slot = self._slots.get(group_id)
+            if slot is not None:
+                parent, index = slot
+                group.tail = parent[index].tail
+                parent[index] = group
+
+    def readers(self, var_path: str) -> List[str]:
+        """Group ids of the bound layers that read `var_path`."""
+        return [target.group_id for target in self.live.targets if target.reads(var_path)]
+
+    def sweep(self, var_path: str, values: List[Any]) -> Iterator[str]:
+        """Yield one SVG per value of the dotted state variable `var_path`.
+
+        Only the layers reading `var_path` are recompiled per frame.
+        """
+        base = self.asset.get("mockState") or {}
+        readers = self.readers(var_path)
+        # Bring every bound layer in line with the swept base state once.
+        self.render(with_state_var(base, var_path, values[0]) if values else base)
+        for value in values:
+            yield self.render(with_state_var(base, var_path, value), readers)
+
+
+__all__ = ["FrameSequence", "sweep_values", "with_state_var"]
@@ -0,0 +1,310 @@
+"""Bounding boxes and transforms for compiled SVG trees."""
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+# (a, b, c, d, e, f) as in SVG `matrix(a b c d e f)`.
+Matrix = Tuple[float, float, float, float, float, float]
+# (x, y, width, height)
+BBox = Tuple[float, float, float, float]
+
+IDENTITY: Matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+TEXT_WIDTH_FACTOR = 0.6
+# East Asian wide and fullwidth glyphs (CJK, kana, fullwidth forms) are about 1 em.
+TEXT_WIDE_WIDTH_FACTOR = 1.0
+TEXT_LINE_HEIGHT = 1.2
+BLUR_EXTENT = 3.0
+
+_TRANSFORM_RE = re.compile(r"(translate|scale|rotate|matrix)\s*\(([^)]*)\)")
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_ARC_PATH_RE = re.compile(
+    r"M\s*(?P<x1>\S+)\s+(?P<y1>\S+)\s+A\s*(?P<r>\S+)\s+\S+\s+\S+\s+(?P<large>[01])\s+(?P<sweep>[01])\s+(?P<x2>\S+)\s+(?P<y2>\S+)"
+)
+
+
+def multiply(left: Matrix, right: Matrix) -> Matrix:
+    a1, b1, c1, d1, e1, f1 = left
+    a2, b2, c2, d2, e2, f2 = right
+    return (
+        a1 * a2 + c1 * b2,
+        b1 * a2 + d1 * b2,
+        a1 * c2 + c1 * d2,
+        b1 * c2 + d1 * d2,
+        a1 * e2 + c1 * f2 + e1,
+        b1 * e2 + d1 * f2 + f1,
+    )
+
+
+def parse_transform(text: Optional[str]) -> Matrix:
+    """Parse the transform functions the compiler emits into one matrix."""
+    matrix = IDENTITY
+    if not text:
+        return matrix
+    for name, args_text in _TRANSFORM_RE.findall(text):
+        args = [float(value) for value in _NUMBER_RE.findall(args_text)]
+        if name == "translate":
+            step = (1.0, 0.0, 0.0, 1.0, args[0] if args else 0.0, args[1] if len(args) > 1 else 0.0)
+        elif name == "scale":
+            sx = args[0] if args else 1.0
+            sy = args[1] if len(args) > 1 else sx
+            step = (sx, 0.0, 0.0, sy, 0.0, 0.0)
+        elif name == "rotate":
+            angle = math.radians(args[0] if args else 0.0)
+            cos, sin = math.cos(angle), math.sin(angle)
+            step = (cos, sin, -sin, cos, 0.0, 0.0)
+            if len(args) >= 3:
+                cx, cy = args[1], args[2]
+                step = multiply(multiply((1.0, 0.0, 0.0, 1.0, cx, cy), step), (1.0, 0.0, 0.0, 1.0, -cx, -cy))
+        else:
+            if len(args) != 6:
+                continue
+            step = (args[0], args[1], args[2], args[3], args[4], args[5])
+        matrix = multiply(matrix, step)
+    return matrix
+
+
+def transform_bbox(matrix: Matrix, bbox: BBox) -> BBox:
+    x, y, width, height = bbox
+    a, b, c, d, e, f = matrix
+    corners = [(x, y), (x + width, y), (x, y + height), (x + width, y + height)]
+    xs = [a * px + c * py + e for px, py in corners]
+    ys = [b * px + d * py + f for px, py in corners]
+    return (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+
+def union(boxes: Iterable[Optional[BBox]]) -> Optional[BBox]:
+    present = [box for box in boxes if box is not None]
+    if not present:
+        return None
+    left = min(box[0] for box in present)
+    top = min(box[1] for box in present)
+    right = max(box[0] + box[2] for box in present)
+    bottom = max(box[1] + box[3] for box in present)
+    return (left, top, right - left, bottom - top)
+
+
+def inflate(bbox: BBox, amount: float) -> BBox:
+    x, y, width, height = bbox
+    return (x - amount, y - amount, width + amount * 2, height + amount * 2)
+
+
+def intersects(left: BBox, right: BBox) -> bool:
+    return (
+        left[0] < right[0] + right[2]
+        and right[0] < left[0] + left[2]
+        and left[1] < right[1] + right[3]
+        and right[1] < left[1] + left[3]
+    )
+
+
+def filter_extents(root: ET.Element) -> Dict[str, float]:
+    """Map filter id → how far its blur can spread paint (3·stdDeviation)."""
+    extents: Dict[str, float] = {}
+    for element in root.iter():
+        if local_name(element.tag) != "filter" or not element.get("id"):
+            continue
+        spread = 0.0
+        for child in element.iter():
+            if local_name(child.tag) == "feGaussianBlur":
+                spread = max(spread, _number(child.get("stdDeviation")) * BLUR_EXTENT)
+        extents[element.get("id", "")] = spread
+    return extents
+
+
+class BBoxIndex:
+    """Canvas-space bounding boxes for every element of a compiled SVG tree."""
+
+    def __init__(self, root: ET.Element) -> None:
+        self.root = root
+        self._filters = filter_extents(root)
+        self._boxes: Dict[int, Optional[BBox]] = {}
+        self._spreads: Dict[int, float] = {}
+        self._by_id: Dict[str, ET.Element] = {}
+        for child in root:
+            if local_name(child.tag) != "defs":
+                self._walk(child, IDENTITY)
+
+    @classmethod
+    def from_svg(cls, svg_text: str) -> "BBoxIndex":
+        return cls(ET.fromstring(svg_text))
+
+    def bbox(self, element: ET.Element) -> Optional[BBox]:
+        return self._boxes.get(id(element))
+
+    def spread(self, element: ET.Element) -> float:
+        """Canvas-space distance the filter on `element` blurs its paint (0 when unfiltered or hidden)."""
+        return self._spreads.get(id(element), 0.0)
+
+    def bbox_for_id(self, element_id: str) -> Optional[BBox]:
+        element = self._by_id.get(element_id)
+        return self.bbox(element) if element is not None else None
+
+    def element(self, element_id: str) -> Optional[ET.Element]:
+        return self._by_id.get(element_id)
+
+    def ids(self) -> List[str]:
+        return list(self._by_id)
+
+    def _walk(self, element: ET.Element, parent_matrix: Matrix) -> Optional[BBox]:
+        matrix = multiply(parent_matrix, parse_transform(element.get("transform")))
+        element_id = element.get("id")
+        if element_id:
+            self._by_id[element_id] = element
+
+        tag = local_name(element.tag)
+        if tag == "g":
+            box = union(self._walk(child, matrix) for child in element)
+        else:
+            local = shape_bbox(element)
+            box = transform_bbox(matrix, local) if local else None
+            for child in element:
+                self._walk(child, matrix)
+
+        if element.get("display") == "none":
+            # Hidden subtrees paint nothing, but their ids stay addressable.
+            box = None
+
+        filter_ref = element.get("filter", "")
+        if box is not None and filter_ref.startswith("url(#"):
+            spread = self._filters.get(filter_ref[5:-1], 0.0)
+            if spread:
+                spread *= math.hypot(matrix[0], matrix[1])
+                self._spreads[id(element)] = spread
+                box = inflate(box, spread)
+        self._boxes[id(element)] = box
+        return box
+
+
+def shape_bbox(element: ET.Element) -> Optional[BBox]:
+    """Local-space bbox of a single shape element (stroke included)."""
+    tag = local_name(element.tag)
+    stroke = _stroke_half_width(element)
+    if tag == "rect":
+        box = (_number(element.get("x")), _number(element.get("y")), _number(element.get("width")), _number(element.get("height")))
+        return inflate(box, stroke) if stroke else box
+    if tag == "circle":
+        radius = _number(element.get("r"))
+        cx, cy = _number(element.get("cx")), _number(element.get("cy"))
+        return inflate((cx - radius, cy - radius, radius * 2, radius * 2), stroke)
+    if tag == "polygon":
+        values = [float(value) for value in _NUMBER_RE.findall(element.get("points", ""))]
+        points = list(zip(values[0::2], values[1::2]))
+        return inflate(_points_bbox(points), stroke) if points else None
+    if tag == "path":
+        points = arc_path_points(element.get("d", ""))
+        return inflate(_points_bbox(points), stroke) if points else None
+    if tag == "text":
+        return _text_bbox(element)
+    return None
+
+
+def arc_path_points(d: str, samples: int = 32) -> List[Tuple[float, float]]:
+    """Sample the single `M … A …` arc the compiler emits for gauges."""
+    match = _ARC_PATH_RE.search(d)
+    if not match:
+        values = [float(value) for value in _NUMBER_RE.findall(d)]
+        return list(zip(values[0::2], values[1::2]))
+    x1, y1 = float(match.group("x1")), float(match.group("y1"))
+    x2, y2 = float(match.group("x2")), float(match.group("y2"))
+    radius = float(match.group("r"))
+    large_arc = match.group("large") == "1"
+    sweep = match.group("sweep") == "1"
+
+    mx, my = (x1 + x2) / 2, (y1 + y2) / 2
+    dx, dy = (x2 - x1) / 2, (y2 - y1) / 2
+    half = math.hypot(dx, dy)
+    if half == 0 or radius <= 0:
+        return [(x1, y1), (x2, y2)]
+    radius = max(radius, half)
+    offset = math.sqrt(max(radius * radius - half * half, 0.0))
+    sign = 1.0 if large_arc != sweep else -1.0
+    cx = mx + sign * offset * (-dy) / half
+    cy = my + sign * offset * dx / half
+
+    start = math.atan2(y1 - cy, x1 - cx)
+    end = math.atan2(y2 - cy, x2 - cx)
+    delta = end - start
+    if sweep and delta < 0:
+        delta += 2 * math.pi
+    elif not sweep and delta > 0:
+        delta -= 2 * math.pi
+    points = []
+    for index in range(samples + 1):
+        angle = start + delta * index / samples
+        points.append((cx + math.cos(angle) * radius, cy + math.sin(angle) * radius))
+    return points
+
+
+def local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _text_bbox(element: ET.Element) -> Optional[BBox]:
+    font_size = _number(element.get("font-size"), 16.0)
+    x = _number(element.get("x"))
+    y = _number(element.get("y"))
+    lines = [span for span in element if local_name(span.tag) == "tspan"] or [element]
+    width = 0.0
+    for line in lines:
+        length = line.get("textLength")
+        if length is not None:
+            width = max(width, _number(length))
+        else:
+            width = max(width, sum(_advance(character) for character in line.text or "") * font_size)
+    height = font_size * TEXT_LINE_HEIGHT * len(lines)
+    anchor = element.get("text-anchor", "start")
+    if anchor == "middle":
+        x -= width / 2
+    elif anchor == "end":
+        x -= width
+    return (x, y, width, height)
+
+
+def _advance(character: str) -> float:
+    """Estimated advance of one character, in ems."""
+    if unicodedata.east_asian_width(character) in ("W", "F"):
+        return TEXT_WIDE_WIDTH_FACTOR
+    return TEXT_WIDTH_FACTOR
+
+
+def _points_bbox(points: List[Tuple[float, float]]) -> BBox:
+    xs = [point[0] for point in points]
+    ys = [point[1] for point in points]
+    return (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+
+def _stroke_half_width(element: ET.Element) -> float:
+    if element.get("stroke", "none") == "none":
+        return 0.0
+    return _number(element.get("stroke-width"), 1.0) / 2
+
+
+def _number(value: Optional[str], default: float = 0.0) -> float:
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+__all__ = [
+    "BBox",
+    "BBoxIndex",
+    "IDENTITY",
+    "Matrix",
+    "arc_path_points",
+    "filter_extents",
+    "inflate",
+    "intersects",
+    "local_name",
+    "multiply",
+    "parse_transform",
+    "shape_bbox",
+    "transform_bbox",
+    "union",
+]
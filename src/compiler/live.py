@@ -0,0 +1,180 @@
+"""Incremental re-evaluation of data-bound layers for live mockState updates."""
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set
+from xml.etree import ElementTree as ET
+
+from .compile import _append_layers, _build_defs, _build_registry
+from .defs import intern_defs, rewrite_references
+from .tokens import TokenRegistry
+
+SVG_NS = "http://www.w3.org/2000/svg"
+BIND_KEYS = ("value", "visibleWhen", "enabledWhen")
+
+
+@dataclass(frozen=True)
+class BoundLayer:
+    """A layer whose output depends on mockState, addressed by its group id."""
+
+    group_id: str
+    layer: Dict[str, Any]
+    id_prefix: str
+
+    def reads(self, var_path: str) -> bool:
+        """Whether the layer's bindings read `var_path`, a parent of it or a child of it."""
+        return any(
+            name == var_path or name.startswith(f"{var_path}.") or var_path.startswith(f"{name}.")
+            for name in bind_vars(self.layer.get("bind") or {})
+        )
+
+
+class LiveBindings:
+    """Re-render only the bound layers of a compiled asset for new mockState.
+
+    Layers are bound when their `bind` carries `value`, `visibleWhen` or
+    `enabledWhen`. Everything else in the document is independent of
+    mockState, so a state update only needs these groups re-evaluated and
+    diffed against their previous render.
+    """
+
+    def __init__(self, asset: Dict[str, Any]) -> None:
+        self._registry: TokenRegistry = _build_registry(asset)
+        # Defs the full document merged away; re-rendered layers must use the survivors.
+        document = ET.Element("svg")
+        document.append(_build_defs(asset, self._registry))
+        self._def_aliases = intern_defs(document)
+        self._components: Optional[Dict[str, Dict[str, Any]]] = None
+        self.targets: List[BoundLayer] = []
+        if asset.get("assetType", "button") == "screen":
+            self._components = {component["id"]: component for component in asset["components"]}
+            for instance in asset["instances"]:
+                component = self._components[instance["componentId"]]
+                self._collect(component["layers"], f"{instance['id']}--")
+        else:
+            self._collect(asset["layers"], "")
+        self._rendered: Dict[str, ET.Element] = {}
+
+    def render(self, state: Dict[str, Any], group_ids: Optional[Iterable[str]] = None) -> Dict[str, ET.Element]:
+        """Build the group element of every bound layer (or just `group_ids`) for `state`."""
+        groups: Dict[str, ET.Element] = {}
+        wanted = None if group_ids is None else set(group_ids)
+        for target in self.targets:
+            if wanted is not None and target.group_id not in wanted:
+                continue
+            holder = ET.Element("g")
+            # Clip paths and gradients do not depend on state and already
+            # exist in the full document; discard the copies built here.
+            _append_layers(
+                holder,
+                [target.layer],
+                self._registry,
+                ET.Element("defs"),
+                set(),
+                id_prefix=target.id_prefix,
+                components=self._components,
+                state=state,
+            )
+            if self._def_aliases:
+                rewrite_references(holder, self._def_aliases)
+            groups[target.group_id] = holder[0]
+        return groups
+
+    def update(self, state: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Re-evaluate bound layers and return the deltas since the last call.
+
+        The first call only primes the previous render and returns no deltas;
+        callers are expected to hold the matching full SVG already.
+        """
+        groups = self.render(state)
+        deltas: List[Dict[str, Any]] = []
+        if self._rendered:
+            for group_id, group in groups.items():
+                deltas.extend(element_deltas(group_id, self._rendered.get(group_id), group))
+        self._rendered = groups
+        return deltas
+
+    def _collect(self, layers: Iterable[Dict[str, Any]], id_prefix: str) -> None:
+        for layer in layers:
+            group_id = f"{id_prefix}{layer['id']}"
+            bind = layer.get("bind") or {}
+            if any(key in bind for key in BIND_KEYS):
+                self.targets.append(BoundLayer(group_id=group_id, layer=layer, id_prefix=id_prefix))
+                continue
+            if self._components is not None and layer.get("shape") in ("layoutRow", "layoutColumn", "layoutGrid"):
+                for item in layer.get("items", []):
+                    component = self._components.get(item["componentId"])
+                    if component is not None:
+                        self._collect(component["layers"], f"{group_id}--{item['id']}--")
+
+
+def bind_vars(expr: Any) -> Set[str]:
+    """Every state variable path a `bind` block or bind expression reads."""
+    names: Set[str] = set()
+    if isinstance(expr, dict):
+        if isinstance(expr.get("var"), str):
+            names.add(expr["var"])
+        for value in expr.values():
+            names |= bind_vars(value)
+    elif isinstance(expr, list):
+        for value in expr:
+            names |= bind_vars(value)
+    return names
+
+
+def element_deltas(element_id: str, old: Optional[ET.Element], new: ET.Element) -> List[Dict[str, Any]]:
+    """Minimal in-place updates turning `old` into `new`.
+
+    Each delta addresses an element by the nearest id'd ancestor plus a
+    child-index `path` below it and carries changed `attrs` (None removes
+    the attribute) and/or new `text`. Where the child structure differs,
+    the id'd element is replaced wholesale with `{"id", "svg"}`.
+    """
+    deltas: List[Dict[str, Any]] = []
+    if old is None or not _diff_element(old, new, element_id, [], deltas):
+        return [{"id": element_id, "svg": serialize_element(new)}]
+    return deltas
+
+
+def serialize_element(element: ET.Element) -> str:
+    """Serialize a compiler-built subtree as standalone SVG markup."""
+    clone = copy.deepcopy(element)
+    clone.tail = None
+    clone.set("xmlns", SVG_NS)
+    return ET.tostring(clone, encoding="unicode")
+
+
+def _diff_element(
+    old: ET.Element,
+    new: ET.Element,
+    element_id: str,
+    path: List[int],
+    deltas: List[Dict[str, Any]],
+) -> bool:
+    if old.tag != new.tag or len(old) != len(new):
+        return False
+    delta: Dict[str, Any] = {}
+    attrs = {
+        name: new.get(name)
+        for name in sorted(set(old.attrib) | set(new.attrib))
+        if old.get(name) != new.get(name)
+    }
+    if attrs:
+        delta["attrs"] = attrs
+    if (old.text or "") != (new.text or ""):
+        delta["text"] = new.text or ""
+    if delta:
+        deltas.append({"id": element_id, "path": list(path), **delta})
+
+    for index, (old_child, new_child) in enumerate(zip(old, new)):
+        child_id = new_child.get("id")
+        if child_id and old_child.get("id") == child_id:
+            deltas.extend(element_deltas(child_id, old_child, new_child))
+            continue
+        if not _diff_element(old_child, new_child, element_id, path + [index], deltas):
+            return False
+    return True
+
+
+__all__ = ["BoundLayer", "LiveBindings", "bind_vars", "element_deltas", "serialize_element"]
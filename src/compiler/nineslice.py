@@ -0,0 +1,166 @@
+"""Nine-slice export of roundedRect-only components."""
+from __future__ import annotations
+
+import copy
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .compile import GLOW_BLUR_EXTENT, _build_registry, _coerce_number
+from .tokens import TokenRegistry
+
+# Pixels the stretchable center band keeps in the minimal render.
+DEFAULT_CENTER = 2
+
+
+@dataclass(frozen=True)
+class SliceIssue:
+    layer: str
+    reason: str
+
+    def to_json(self) -> Dict[str, str]:
+        return {"layer": self.layer, "reason": self.reason}
+
+
+@dataclass
+class NineSlice:
+    """Slice insets for one component and the asset to render at its minimal size.
+
+    `insets` are `(left, top, right, bottom)` in view box units, rounded
+    up to whole units so slices fall on pixel edges at scale 1. `stretch`
+    names the axes (`"x"`, `"y"`) with a center band; along an axis too
+    short for one (a glowing button's height, say) the two fixed slices
+    meet and the component becomes a three-slice. `asset` is None when
+    `issues` make the component unstretchable; `warnings` list layers
+    whose fill only approximately survives stretching.
+    """
+
+    name: str
+    source_size: Tuple[float, float]
+    insets: Tuple[int, int, int, int] = (0, 0, 0, 0)
+    size: Tuple[int, int] = (0, 0)
+    stretch: List[str] = field(default_factory=list)
+    asset: Optional[Dict[str, Any]] = None
+    issues: List[SliceIssue] = field(default_factory=list)
+    warnings: List[SliceIssue] = field(default_factory=list)
+
+    @property
+    def stretchable(self) -> bool:
+        return not self.issues
+
+    def to_json(self, scale: float = 1.0) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"name": self.name, "stretchable": self.stretchable}
+        if self.stretchable:
+            left, top, right, bottom = (math.ceil(value * scale) for value in self.insets)
+            data["stretch"] = list(self.stretch)
+            data["insets"] = {"left": left, "top": top, "right": right, "bottom": bottom}
+            data["size"] = {"width": math.ceil(self.size[0] * scale), "height": math.ceil(self.size[1] * scale)}
+        data["source_size"] = {"width": self.source_size[0], "height": self.source_size[1]}
+        if self.issues:
+            data["issues"] = [issue.to_json() for issue in self.issues]
+        if self.warnings:
+            data["warnings"] = [warning.to_json() for warning in self.warnings]
+        return data
+
+
+def nine_slice_asset(asset: Dict[str, Any], name: str = "asset", center: int = DEFAULT_CENTER) -> List[NineSlice]:
+    """Nine-slice plans for a button asset (called `name`), or for each component of a screen (`name--componentId`)."""
+    if center < 1:
+        raise ValueError("center must be >= 1")
+    registry = _build_registry(asset)
+    theme = asset.get("theme")
+    if asset.get("assetType", "button") == "screen":
+        return [
+            _plan(f"{name}--{component['id']}", component["viewBox"], component["layers"], registry, theme, center)
+            for component in asset["components"]
+        ]
+    return [_plan(name, asset["viewBox"], asset["layers"], registry, theme, center)]
+
+
+def _plan(
+    name: str,
+    view_box: List[float],
+    layers: List[Dict[str, Any]],
+    registry: TokenRegistry,
+    theme: Optional[Dict[str, Any]],
+    center: int,
+) -> NineSlice:
+    origin_x, origin_y, width, height = (float(value) for value in view_box)
+    plan = NineSlice(name, (width, height))
+    fixed = [0.0, 0.0, 0.0, 0.0]
+    for layer in layers:
+        layer_id = layer.get("id", "?")
+        shape = layer.get("shape")
+        if shape != "roundedRect":
+            plan.issues.append(SliceIssue(layer_id, f"{shape} content cannot be stretched"))
+            continue
+        rect = layer["rect"]
+        left, top = float(rect["x"]) - origin_x, float(rect["y"]) - origin_y
+        right, bottom = left + float(rect["width"]), top + float(rect["height"])
+        corner = float(rect.get("radius", 0)) + _stroke_half(layer) + _glow_blur(layer, registry)
+        # Each side's fixed slice must hold this layer's corners and their glow falloff, so
+        # every layer edge lands in a fixed slice and each layer spans the whole center band.
+        fixed[0] = max(fixed[0], left + corner)
+        fixed[1] = max(fixed[1], top + corner)
+        fixed[2] = max(fixed[2], width - right + corner)
+        fixed[3] = max(fixed[3], height - bottom + corner)
+        if registry.get_linear_gradient((layer.get("style") or {}).get("fill")):
+            plan.warnings.append(SliceIssue(layer_id, "gradient fill is stretched with the center slice"))
+
+    insets = [math.ceil(value - 1e-9) for value in fixed]
+    bands = [(insets[0], width - insets[2]), (insets[1], height - insets[3])]
+    for axis, size in enumerate((width, height)):
+        start, end = bands[axis]
+        if end - start >= center:
+            plan.stretch.append("xy"[axis])
+            continue
+        # Too small to stretch along this axis: all of it goes into the two fixed slices.
+        insets[axis], insets[axis + 2] = math.ceil(size / 2), math.floor(size / 2)
+        bands[axis] = (size / 2, size / 2)
+    if not plan.stretch:
+        plan.issues.append(SliceIssue("*", "corners and glow leave no room for a stretchable center"))
+    if plan.issues:
+        return plan
+
+    plan.insets = tuple(insets)  # type: ignore[assignment]
+    shrink = [0.0, 0.0]
+    for axis, size in enumerate((width, height)):
+        if "xy"[axis] in plan.stretch:
+            shrink[axis] = bands[axis][1] - bands[axis][0] - center
+    plan.size = (math.ceil(width - shrink[0]), math.ceil(height - shrink[1]))
+    shrunk = []
+    for layer in layers:
+        layer = copy.deepcopy(layer)
+        rect = layer["rect"]
+        left, top = float(rect["x"]) - origin_x, float(rect["y"]) - origin_y
+        right, bottom = left + float(rect["width"]), top + float(rect["height"])
+        new_left, new_right = (_squeeze(value, bands[0][1], shrink[0]) for value in (left, right))
+        new_top, new_bottom = (_squeeze(value, bands[1][1], shrink[1]) for value in (top, bottom))
+        rect.update({"x": new_left, "y": new_top, "width": new_right - new_left, "height": new_bottom - new_top})
+        shrunk.append(layer)
+    plan.asset = {"assetType": "button", "viewBox": [0, 0, plan.size[0], plan.size[1]], "layers": shrunk}
+    if theme:
+        plan.asset["theme"] = theme
+    return plan
+
+
+def _squeeze(value: float, band_end: float, shrink: float) -> float:
+    # No layer edge falls inside the band: edges before it are kept, edges after it shift in.
+    return value - shrink if value >= band_end else value
+
+
+def _stroke_half(layer: Dict[str, Any]) -> float:
+    style = layer.get("style") or {}
+    if not style.get("stroke"):
+        return 0.0
+    return (_coerce_number(style.get("strokeWidth")) or 0.0) / 2
+
+
+def _glow_blur(layer: Dict[str, Any], registry: TokenRegistry) -> float:
+    definition = registry.get_glow((layer.get("style") or {}).get("glow"))
+    if definition is None:
+        return 0.0
+    return max(definition.std_deviation * GLOW_BLUR_EXTENT, definition.margin)
+
+
+__all__ = ["DEFAULT_CENTER", "NineSlice", "SliceIssue", "nine_slice_asset"]
@@ -0,0 +1,312 @@
+"""Post-lowering optimization passes over compiled SVG."""
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from xml.etree import ElementTree as ET
+
+from .defs import REFERENCE_ATTRIBUTES
+from .geometry import IDENTITY, Matrix, local_name, multiply, parse_transform
+
+SVG_NS = "http://www.w3.org/2000/svg"
+# Attributes a wrapper group may carry and still be folded into its only child.
+FLATTENABLE_GROUP_ATTRIBUTES = frozenset({"id", "transform"})
+RECT_GEOMETRY = ("x", "y", "width", "height")
+NON_RENDERED_TAGS = ("defs", "clipPath", "linearGradient", "radialGradient", "filter")
+_TRANSFORM_STEP_RE = re.compile(r"(?:translate|scale|rotate|matrix)\s*\([^)]*\)")
+_URL_RE = re.compile(r"url\(#([^)]+)\)")
+_RECT_SUBPATH_RE = re.compile(r"M(\S+) (\S+)h(\S+)v(\S+)h-\S+z")
+_RECT_PATH_RE = re.compile(r"(?:M\S+ \S+h\S+v\S+h-\S+z)+")
+_EPSILON = 1e-9
+
+
+class OptimizationError(ValueError):
+    """Raised by `optimize_svg(verify=True)` when a pass changed what is painted."""
+
+
+def drop_hidden(root: ET.Element) -> int:
+    """Remove `display="none"` subtrees and the defs only they referenced."""
+    removed = 0
+    for parent in list(root.iter()):
+        for child in list(parent):
+            if child.get("display") == "none":
+                parent.remove(child)
+                removed += 1
+    if removed:
+        _prune_defs(root)
+    return removed
+
+
+def collapse_identity_transforms(root: ET.Element) -> int:
+    """Drop transform steps that do nothing, e.g. `scale(1.00 1.00)`."""
+    changed = 0
+    for element in root.iter():
+        transform = element.get("transform")
+        if transform is None:
+            continue
+        steps = [step for step in _TRANSFORM_STEP_RE.findall(transform) if not _is_identity(parse_transform(step))]
+        collapsed = " ".join(steps)
+        if collapsed == transform:
+            continue
+        if collapsed:
+            element.set("transform", collapsed)
+        else:
+            del element.attrib["transform"]
+        changed += 1
+    return changed
+
+
+def flatten_groups(root: ET.Element) -> int:
+    """Replace a `<g>` holding one element by that element.
+
+    Only groups with no attributes beyond `id` and `transform` qualify.
+    The group's transform is prepended to the child's and its id moves to
+    the child, so groups are kept when both carry an id.
+    """
+    flattened = 0
+    for parent in list(root.iter()):
+        for index, child in enumerate(list(parent)):
+            group = child
+            while _can_flatten(group):
+                inner = group[0]
+                transform = " ".join(value for value in (group.get("transform"), inner.get("transform")) if value)
+                if transform:
+                    inner.set("transform", transform)
+                if group.get("id"):
+                    inner.set("id", group.get("id", ""))
+                    inner.attrib = _with_first(inner.attrib, "id")
+                parent.remove(group)
+                parent.insert(index, inner)
+                group = inner
+                flattened += 1
+    return flattened
+
+
+def merge_rects(root: ET.Element) -> int:
+    """Merge runs of sibling square-cornered rects with identical paint into one `<path>`.
+
+    Segmented gauges emit one rect per segment; consecutive segments with
+    the same fill become a single path of rectangle subpaths. Runs are
+    only merged when the rects share a row and do not overlap, so
+    translucent fills still paint every pixel once, and never when the
+    paint is sized to the shape's bounding box (the default for
+    gradients), since the merged bbox would stretch it.
+    """
+    merged = 0
+    relative = _bbox_relative_ids(root)
+    for parent in list(root.iter()):
+        children = list(parent)
+        index = 0
+        while index < len(children):
+            run = [children[index]]
+            key = _rect_paint_key(children[index], relative)
+            if key is not None:
+                while index + len(run) < len(children) and _rect_paint_key(children[index + len(run)], relative) == key:
+                    run.append(children[index + len(run)])
+            if len(run) > 1 and _disjoint_row(run):
+                path = ET.Element("path", {"d": "".join(_rect_subpath(rect) for rect in run)})
+                for name, value in run[0].attrib.items():
+                    if name not in RECT_GEOMETRY and name not in ("rx", "ry"):
+                        path.set(name, value)
+                position = list(parent).index(run[0])
+                for rect in run:
+                    parent.remove(rect)
+                parent.insert(position, path)
+                merged += len(run) - 1
+            index += len(run)
+    return merged
+
+
+PASSES: Dict[str, Callable[[ET.Element], int]] = {
+    "drop-hidden": drop_hidden,
+    "identity-transforms": collapse_identity_transforms,
+    "merge-rects": merge_rects,
+    "flatten-groups": flatten_groups,
+}
+DEFAULT_PASSES: Tuple[str, ...] = tuple(PASSES)
+
+
+def optimize_svg(svg: str, passes: Optional[Sequence[str]] = None, verify: bool = False) -> str:
+    """Run optimization passes (all of `DEFAULT_PASSES` by default) over compiled SVG.
+
+    With `verify`, the paint list is compared before and after every pass
+    and OptimizationError names the first pass that changed it.
+    """
+    selected = DEFAULT_PASSES if passes is None else tuple(passes)
+    unknown = [name for name in selected if name not in PASSES]
+    if unknown:
+        raise ValueError(f"Unknown optimization pass: {', '.join(unknown)}")
+    root = _parse(svg)
+    for name in selected:
+        before = paint_list(root) if verify else None
+        PASSES[name](root)
+        if verify and paint_list(root) != before:
+            raise OptimizationError(f"Optimization pass '{name}' changed the rendered output")
+    return _serialize(root)
+
+
+def paint_list(root: ET.Element) -> List[Tuple[object, ...]]:
+    """What a renderer would paint, in order, independent of document structure.
+
+    Each entry is a painted shape with its full transform, local geometry,
+    paint attributes and the effects (clip, opacity, filter) of the groups
+    around it. Hidden subtrees contribute nothing, bare groups and identity
+    transforms disappear, and a path of rectangle subpaths expands to the
+    rects it replaced.
+    """
+    painted: List[Tuple[object, ...]] = []
+    _collect_paint(root, IDENTITY, (), _bbox_relative_ids(root), painted)
+    return painted
+
+
+def _collect_paint(
+    element: ET.Element,
+    parent_matrix: Matrix,
+    effects: Tuple[object, ...],
+    relative: Set[str],
+    painted: List[Tuple[object, ...]],
+) -> None:
+    tag = local_name(element.tag)
+    if element.get("display") == "none" or tag in NON_RENDERED_TAGS:
+        return
+    matrix = multiply(parent_matrix, parse_transform(element.get("transform")))
+    ctm = tuple(round(value, 4) for value in matrix)
+    if tag in ("g", "svg"):
+        own = _paint_attributes(element, ("id", "transform") if tag == "g" else ())
+        if own and tag == "g":
+            effects = effects + ((ctm, own),)
+        for child in element:
+            _collect_paint(child, matrix, effects, relative, painted)
+        return
+    is_rect_path = tag == "path" and _RECT_PATH_RE.fullmatch(element.get("d", "")) and not _references(element, relative)
+    if tag == "rect" or is_rect_path:
+        zero_corners = tuple(name for name in ("rx", "ry") if float(element.get(name, "0")) == 0)
+        paint = _paint_attributes(element, ("id", "transform", "d") + RECT_GEOMETRY + zero_corners)
+        for rect in _rects_of(element):
+            painted.append(("rect", ctm, effects, rect, paint))
+        return
+    content = tuple((tuple(sorted(child.attrib.items())), child.text or "") for child in element)
+    painted.append((tag, ctm, effects, _paint_attributes(element, ("id", "transform")), (element.text or "").strip(), content))
+
+
+def _paint_attributes(element: ET.Element, skip: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, value) for name, value in element.attrib.items() if name not in skip))
+
+
+def _rects_of(element: ET.Element) -> List[Tuple[float, ...]]:
+    if local_name(element.tag) == "rect":
+        return [tuple(float(element.get(name, "0")) for name in RECT_GEOMETRY)]
+    return [
+        (float(x), float(y), float(width), float(height))
+        for x, y, width, height in _RECT_SUBPATH_RE.findall(element.get("d", ""))
+    ]
+
+
+def _rect_paint_key(element: ET.Element, relative: Set[str]) -> Optional[Tuple[object, ...]]:
+    if local_name(element.tag) != "rect" or element.get("id") or element.get("transform") or len(element):
+        return None
+    if _references(element, relative):
+        return None
+    if any(float(element.get(name, "0")) != 0 for name in ("rx", "ry")):
+        return None
+    return (
+        element.get("y"),
+        element.get("height"),
+        tuple(sorted((name, value) for name, value in element.attrib.items() if name not in RECT_GEOMETRY + ("rx", "ry"))),
+    )
+
+
+def _disjoint_row(rects: List[ET.Element]) -> bool:
+    spans = sorted((float(rect.get("x", "0")), float(rect.get("width", "0"))) for rect in rects)
+    return all(left + width <= right + _EPSILON for (left, width), (right, _) in zip(spans, spans[1:]))
+
+
+def _rect_subpath(rect: ET.Element) -> str:
+    x, y, width, height = (rect.get(name, "0") for name in RECT_GEOMETRY)
+    return f"M{x} {y}h{width}v{height}h-{width}z"
+
+
+def _can_flatten(element: ET.Element) -> bool:
+    if local_name(element.tag) != "g" or len(element) != 1 or (element.text or "").strip():
+        return False
+    if not set(element.attrib) <= FLATTENABLE_GROUP_ATTRIBUTES:
+        return False
+    return not (element.get("id") and element[0].get("id"))
+
+
+def _is_identity(matrix: Matrix) -> bool:
+    return all(abs(value - expected) < _EPSILON for value, expected in zip(matrix, IDENTITY))
+
+
+def _bbox_relative_ids(root: ET.Element) -> Set[str]:
+    """Ids of defs whose geometry follows the referencing shape's bounding box."""
+    relative: Set[str] = set()
+    for defs in root:
+        if local_name(defs.tag) != "defs":
+            continue
+        for element in defs:
+            tag = local_name(element.tag)
+            if tag in ("linearGradient", "radialGradient"):
+                bbox_units = element.get("gradientUnits", "objectBoundingBox") == "objectBoundingBox"
+            elif tag == "filter":
+                bbox_units = element.get("filterUnits", "objectBoundingBox") == "objectBoundingBox" or (
+                    element.get("primitiveUnits") == "objectBoundingBox"
+                )
+            elif tag == "clipPath":
+                bbox_units = element.get("clipPathUnits") == "objectBoundingBox"
+            else:
+                bbox_units = True
+            if bbox_units and element.get("id"):
+                relative.add(element.get("id", ""))
+    return relative
+
+
+def _references(element: ET.Element, ids: Set[str]) -> bool:
+    return any(match in ids for name in REFERENCE_ATTRIBUTES for match in _URL_RE.findall(element.get(name, "")))
+
+
+def _prune_defs(root: ET.Element) -> None:
+    for defs in [child for child in root if local_name(child.tag) == "defs"]:
+        while True:
+            referenced = {
+                match
+                for element in root.iter()
+                for name in REFERENCE_ATTRIBUTES
+                for match in _URL_RE.findall(element.get(name, ""))
+            }
+            unused = [child for child in defs if child.get("id") and child.get("id") not in referenced]
+            if not unused:
+                break
+            for child in unused:
+                defs.remove(child)
+        if len(defs) == 0:
+            root.remove(defs)
+
+
+def _with_first(attributes: Dict[str, str], name: str) -> Dict[str, str]:
+    return {name: attributes[name], **{key: value for key, value in attributes.items() if key != name}}
+
+
+def _parse(svg: str) -> ET.Element:
+    root = ET.fromstring(svg)
+    for element in root.iter():
+        element.tag = local_name(element.tag)
+    return root
+
+
+def _serialize(root: ET.Element) -> str:
+    root.attrib = {"xmlns": SVG_NS, **root.attrib}
+    return ET.tostring(root, encoding="unicode")
+
+
+__all__ = [
+    "DEFAULT_PASSES",
+    "OptimizationError",
+    "PASSES",
+    "collapse_identity_transforms",
+    "drop_hidden",
+    "flatten_groups",
+    "merge_rects",
+    "optimize_svg",
+    "paint_list",
+]
@@ -0,0 +1,81 @@
+"""SVG sprite sheets: many compiled assets as `<symbol>`s sharing one `<defs>`."""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+from .budget import CompileBudget
+from .compile import compile_svg
+from .defs import content_digest, intern_defs, rewrite_references
+from .geometry import local_name
+
+SVG_NS = "http://www.w3.org/2000/svg"
+
+
+def build_sprite(
+    assets: Iterable[Tuple[str, Dict[str, Any]]],
+    budget: Optional[CompileBudget] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """Compile `(name, asset)` pairs into one SVG with a `<symbol id=name>` each.
+
+    Gradients, glow filters and clip paths from every asset are moved into
+    a single `<defs>`; identical ones are kept once, and a def whose id is
+    already taken by different content (the same token themed differently)
+    is renamed for its asset. Ids inside a symbol are prefixed with
+    `name--`, as screen instances prefix their layers, so the document
+    stays free of duplicate ids. Returns the SVG and a manifest mapping
+    each symbol id to its viewBox.
+    """
+    sprite = ET.Element("svg", {"xmlns": SVG_NS, "version": "1.1"})
+    defs = ET.SubElement(sprite, "defs")
+    digests: Dict[str, str] = {}
+    symbols: Dict[str, Dict[str, Any]] = {}
+    for name, asset in assets:
+        if name in symbols:
+            raise ValueError(f"Duplicate sprite symbol id: {name}")
+        root = ET.fromstring(compile_svg(asset, budget))
+        for element in root.iter():
+            element.tag = local_name(element.tag)
+        view_box = root.get("viewBox", "")
+        symbol = ET.SubElement(sprite, "symbol", {"id": name, "viewBox": view_box})
+        aliases: Dict[str, str] = {}
+        for child in list(root):
+            if child.tag == "defs":
+                _merge_defs(child, defs, digests, aliases)
+            else:
+                symbol.append(child)
+        for element in symbol.iter():
+            element_id = element.get("id")
+            if element_id and element is not symbol:
+                element.set("id", f"{name}--{element_id}")
+        if aliases:
+            rewrite_references(symbol, aliases)
+        symbols[name] = {"viewBox": [_number(value) for value in view_box.split()]}
+
+    if len(defs) == 0:
+        sprite.remove(defs)
+    else:
+        intern_defs(sprite)
+    return ET.tostring(sprite, encoding="unicode"), {"symbols": symbols}
+
+
+def _merge_defs(source: ET.Element, target: ET.Element, digests: Dict[str, str], aliases: Dict[str, str]) -> None:
+    for definition in list(source):
+        def_id = definition.get("id", "")
+        digest = content_digest(definition)
+        if def_id in digests and digests[def_id] != digest:
+            renamed = f"{def_id}-{digest[:8]}"
+            aliases[def_id] = renamed
+            definition.set("id", renamed)
+            def_id = renamed
+        if def_id not in digests:
+            digests[def_id] = digest
+            target.append(definition)
+
+
+def _number(text: str) -> float | int:
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+__all__ = ["build_sprite"]
@@ -24,7 +24,9 @@ class GlowDef:
     color: str
     opacity: float
     std_deviation: float
-    margin: float = 24.0
+    # Minimum padding of the filter region around the glowing shape; the
+    # compiler always pads by at least 3 * std_deviation.
+    margin: float = 0.0
 
 
 DEFAULT_LINEAR_GRADIENTS: Dict[str, LinearGradientDef] = {
@@ -53,8 +55,8 @@ DEFAULT_COLORS: Dict[str, str] = {
 }
 
 DEFAULT_GLOWS: Dict[str, GlowDef] = {
-    "ui.softGlow": GlowDef(color="#6EDAFF", opacity=0.7, std_deviation=9.0, margin=32.0),
-    "ui.focusGlow": GlowDef(color="#81FFD8", opacity=0.55, std_deviation=11.0, margin=28.0),
+    "ui.softGlow": GlowDef(color="#6EDAFF", opacity=0.7, std_deviation=9.0),
+    "ui.focusGlow": GlowDef(color="#81FFD8", opacity=0.55, std_deviation=11.0),
 }
 
 DEFAULT_FONTS: Dict[str, str] = {
@@ -0,0 +1,157 @@
+"""RFC 6902 JSON Patch applied to UI asset documents."""
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, Iterable, List, Tuple
+
+_MISSING = object()
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch is malformed or cannot be applied."""
+
+
+def apply_patch(document: Any, operations: Iterable[Dict[str, Any]]) -> Any:
+    """Apply `operations` to a deep copy of `document` and return it.
+
+    The input document is never modified, so a failing operation leaves the
+    caller's state untouched (patches are all-or-nothing).
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("Patch must be an array of operations")
+    result = copy.deepcopy(document)
+    for index, operation in enumerate(operations):
+        try:
+            result = _apply_operation(result, operation)
+        except JsonPatchError as exc:
+            raise JsonPatchError(f"operation {index}: {exc}") from None
+    return result
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split a JSON Pointer (RFC 6901) into unescaped reference tokens."""
+    if not isinstance(pointer, str):
+        raise JsonPatchError("path must be a string")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"invalid pointer '{pointer}'")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _apply_operation(document: Any, operation: Any) -> Any:
+    if not isinstance(operation, dict):
+        raise JsonPatchError("operation must be an object")
+    op = operation.get("op")
+    path = parse_pointer(operation.get("path"))
+
+    if op == "add":
+        return _add(document, path, copy.deepcopy(_require_value(operation)))
+    if op == "remove":
+        document, _ = _remove(document, path)
+        return document
+    if op == "replace":
+        value = copy.deepcopy(_require_value(operation))
+        document, _ = _remove(document, path)
+        return _add(document, path, value)
+    if op == "move":
+        source = parse_pointer(operation.get("from"))
+        if path[: len(source)] == source and len(path) > len(source):
+            raise JsonPatchError("cannot move a value into one of its children")
+        document, value = _remove(document, source)
+        return _add(document, path, value)
+    if op == "copy":
+        source = parse_pointer(operation.get("from"))
+        return _add(document, path, copy.deepcopy(_resolve(document, source)))
+    if op == "test":
+        if not _json_equal(_resolve(document, path), _require_value(operation)):
+            raise JsonPatchError(f"test failed at '{operation.get('path')}'")
+        return document
+    raise JsonPatchError(f"unsupported op '{op}'")
+
+
+def _require_value(operation: Dict[str, Any]) -> Any:
+    if "value" not in operation:
+        raise JsonPatchError("missing 'value'")
+    return operation["value"]
+
+
+def _json_equal(left: Any, right: Any) -> bool:
+    """RFC 6902 equality: same JSON type, numbers by value, containers member by member."""
+    if isinstance(left, bool) or isinstance(right, bool):
+        return isinstance(left, bool) and isinstance(right, bool) and left == right
+    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+        return left == right
+    if isinstance(left, list) and isinstance(right, list):
+        return len(left) == len(right) and all(_json_equal(a, b) for a, b in zip(left, right))
+    if isinstance(left, dict) and isinstance(right, dict):
+        return left.keys() == right.keys() and all(_json_equal(left[key], right[key]) for key in left)
+    return type(left) is type(right) and left == right
+
+
+def _resolve(document: Any, tokens: List[str]) -> Any:
+    current = document
+    for token in tokens:
+        current = _child(current, token)
+        if current is _MISSING:
+            raise JsonPatchError(f"path not found: /{'/'.join(tokens)}")
+    return current
+
+
+def _child(container: Any, token: str) -> Any:
+    if isinstance(container, dict):
+        return container.get(token, _MISSING)
+    if isinstance(container, list):
+        index = _list_index(token, len(container))
+        return container[index] if index < len(container) else _MISSING
+    return _MISSING
+
+
+def _split_parent(document: Any, tokens: List[str]) -> Tuple[Any, str]:
+    return _resolve(document, tokens[:-1]), tokens[-1]
+
+
+def _add(document: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent, token = _split_parent(document, tokens)
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        if token == "-":
+            parent.append(value)
+        else:
+            index = _list_index(token, len(parent) + 1)
+            if index > len(parent):
+                raise JsonPatchError(f"index {token} out of range")
+            parent.insert(index, value)
+    else:
+        raise JsonPatchError(f"cannot add into a {type(parent).__name__}")
+    return document
+
+
+def _remove(document: Any, tokens: List[str]) -> Tuple[Any, Any]:
+    if not tokens:
+        return None, document
+    parent, token = _split_parent(document, tokens)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"path not found: /{'/'.join(tokens)}")
+        return document, parent.pop(token)
+    if isinstance(parent, list):
+        index = _list_index(token, len(parent))
+        if index >= len(parent):
+            raise JsonPatchError(f"index {token} out of range")
+        return document, parent.pop(index)
+    raise JsonPatchError(f"cannot remove from a {type(parent).__name__}")
+
+
+def _list_index(token: str, length: int) -> int:
+    if token == "-":
+        return length
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"invalid array index '{token}'")
+    return int(token)
+
+
+__all__ = ["JsonPatchError", "apply_patch", "parse_pointer"]
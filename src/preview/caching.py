@@ -0,0 +1,157 @@
+"""HTTP validators and compression helpers for the preview server."""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+GZIP_MIN_BYTES = 1024
+GZIP_SUFFIX = "-gzip"
+COMPILE_CACHE_SIZE = 256
+
+_STATIC_CACHE: Dict[Path, Tuple[int, int, bytes, str]] = {}
+
+
+def content_etag(data: bytes) -> str:
+    """Return a strong ETag for raw response bytes."""
+    return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+
+def asset_digest(asset: Dict[str, Any]) -> str:
+    """Hash an asset by its canonical JSON form (key order independent)."""
+    canonical = json.dumps(asset, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def compile_etag(asset: Dict[str, Any], compiler_version: str) -> str:
+    """Return a strong ETag for a compile result of `asset`."""
+    digest = hashlib.sha256(f"{compiler_version}:{asset_digest(asset)}".encode("utf-8"))
+    return f'"c-{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against `etag`.
+
+    The gzip variant of a representation carries its own suffixed tag, so both
+    forms are accepted as a match for the identity ETag.
+    """
+    return matching_etag(if_none_match, etag) is not None
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """Return the variant of `etag` (identity or gzip) that If-None-Match names, or None.
+
+    A 304 must carry the tag the client cached, so this is what it echoes.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in (etag, _gzip_etag(etag)):
+            return candidate
+    return None
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Return True when the Accept-Encoding header allows gzip."""
+    if not accept_encoding:
+        return False
+    for part in accept_encoding.split(","):
+        fields = [field.strip() for field in part.split(";")]
+        if fields[0].lower() not in ("gzip", "*"):
+            continue
+        quality = 1.0
+        for param in fields[1:]:
+            if param.lower().startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            return True
+    return False
+
+
+def encode_body(data: bytes, etag: Optional[str], accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str], Optional[str]]:
+    """Compress `data` when worthwhile and return (body, content_encoding, etag)."""
+    if len(data) < GZIP_MIN_BYTES or not accepts_gzip(accept_encoding):
+        return data, None, etag
+    compressed = gzip.compress(data, compresslevel=6, mtime=0)
+    if len(compressed) >= len(data):
+        return data, None, etag
+    return compressed, "gzip", _gzip_etag(etag) if etag else None
+
+
+def read_static(path: Path) -> Tuple[bytes, str]:
+    """Read a static file and its ETag, reusing the hash while mtime/size are unchanged."""
+    stat = path.stat()
+    cached = _STATIC_CACHE.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2], cached[3]
+    data = path.read_bytes()
+    etag = content_etag(data)
+    _STATIC_CACHE[path] = (stat.st_mtime_ns, stat.st_size, data, etag)
+    return data, etag
+
+
+class CompileCache:
+    """Thread-safe LRU of compile ETag → SVG.
+
+    Keys come from `compile_etag`, so an entry is only ever reused for the
+    same normalized asset under the same compiler version and was validated
+    when it was stored.
+    """
+
+    def __init__(self, max_entries: int = COMPILE_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str) -> Optional[str]:
+        with self._lock:
+            svg = self._entries.get(etag)
+            if svg is not None:
+                self._entries.move_to_end(etag)
+            return svg
+
+    def put(self, etag: str, svg: str) -> None:
+        with self._lock:
+            self._entries[etag] = svg
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, etag: object) -> bool:
+        with self._lock:
+            return etag in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def _gzip_etag(etag: str) -> str:
+    if etag.endswith('"'):
+        return f"{etag[:-1]}{GZIP_SUFFIX}\""
+    return f"{etag}{GZIP_SUFFIX}"
+
+
+__all__ = [
+    "CompileCache",
+    "accepts_gzip",
+    "asset_digest",
+    "compile_etag",
+    "content_etag",
+    "encode_body",
+    "etag_matches",
+    "matching_etag",
+    "read_static",
+]
@@ -0,0 +1,60 @@
+"""Fan-out of server push events to streaming (SSE) clients."""
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Any, Dict, List
+
+SUBSCRIBER_BACKLOG = 256
+
+Event = Dict[str, Any]
+
+
+class EventHub:
+    """Broadcast events to bounded per-subscriber queues.
+
+    Publishing never blocks: a subscriber that falls `backlog` events behind
+    has its queue replaced by a single `reset` event, telling the client to
+    refetch state instead of replaying a stale backlog.
+    """
+
+    def __init__(self, backlog: int = SUBSCRIBER_BACKLOG) -> None:
+        self.backlog = backlog
+        self._subscribers: List["queue.Queue[Event]"] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> "queue.Queue[Event]":
+        subscriber: "queue.Queue[Event]" = queue.Queue(maxsize=self.backlog)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: "queue.Queue[Event]") -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, event: Event, reset: Event | None = None) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                _drain(subscriber)
+                subscriber.put_nowait(reset or {"event": "reset"})
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def _drain(subscriber: "queue.Queue[Event]") -> None:
+    while True:
+        try:
+            subscriber.get_nowait()
+        except queue.Empty:
+            return
+
+
+__all__ = ["Event", "EventHub", "SUBSCRIBER_BACKLOG"]
@@ -0,0 +1,108 @@
+"""Single-flight coalescing and per-client supersession for compile requests."""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class Superseded(Exception):
+    """Raised when a newer request from the same client replaced this one."""
+
+
+@dataclass
+class Ticket:
+    """One in-flight request of a client; `wake` fires when it is superseded."""
+
+    client: str
+    seq: int
+    superseded: bool = False
+    wake: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def check(self) -> None:
+        if self.superseded:
+            raise Superseded(f"request {self.seq} of client {self.client} was superseded")
+
+
+class Supersession:
+    """Track the latest request per client; starting a new one supersedes the old."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Ticket] = {}
+        self._seq = 0
+
+    def begin(self, client: str) -> Ticket:
+        with self._lock:
+            self._seq += 1
+            ticket = Ticket(client=client, seq=self._seq)
+            previous = self._latest.get(client)
+            self._latest[client] = ticket
+        if previous is not None:
+            previous.superseded = True
+            previous.wake.set()
+        return ticket
+
+    def finish(self, ticket: Ticket) -> None:
+        with self._lock:
+            if self._latest.get(ticket.client) is ticket:
+                del self._latest[ticket.client]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._latest)
+
+
+class SingleFlight(Generic[T]):
+    """Share one execution of `fn` among concurrent callers with the same key.
+
+    The first caller (the leader) runs `fn`; callers arriving while it runs
+    wait for the leader's result or exception instead of repeating the work.
+    A waiting caller holding a ticket stops waiting as soon as the ticket is
+    superseded. The leader always finishes, since other callers may depend
+    on its result.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, "Future[T]"] = {}
+
+    def do(self, key: str, fn: Callable[[], T], ticket: Optional[Ticket] = None) -> Tuple[T, bool]:
+        """Return (result, shared) where `shared` is True for coalesced callers."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        assert future is not None
+
+        if not leader:
+            if ticket is not None:
+                future.add_done_callback(lambda _: ticket.wake.set())
+                ticket.wake.wait()
+                if not future.done():
+                    ticket.check()
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+__all__ = ["SingleFlight", "Superseded", "Supersession", "Ticket"]
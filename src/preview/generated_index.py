@@ -0,0 +1,244 @@
+"""Persistent index of saved assets under `generated/`."""
+from __future__ import annotations
+
+import base64
+import json
+import os
+import threading
+from bisect import bisect_right, insort
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+INDEX_FILENAME = ".index.json"
+INDEX_VERSION = 1
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Listing order: newest first, then by name for equal mtimes.
+_SortKey = Tuple[float, str]
+
+
+@dataclass(frozen=True)
+class GeneratedEntry:
+    name: str
+    modified: float
+    size: int
+    tags: Tuple[str, ...] = ()
+    template_id: Optional[str] = None
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "path": str(Path("generated") / self.name),
+            "modified": self.modified,
+            "size": self.size,
+            "tags": list(self.tags),
+            "templateId": self.template_id,
+        }
+
+
+class GeneratedIndex:
+    """In-memory view of `generated/*.json`, persisted next to the files."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, GeneratedEntry] = {}
+        self._order: List[_SortKey] = []
+        self._next_suffix: Dict[str, int] = {}
+        # Names handed out by `unique_name` whose files are not recorded yet.
+        self._reserved: Set[str] = set()
+        self._dir_mtime_ns: Optional[int] = None
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / INDEX_FILENAME
+
+    def rebuild(self) -> None:
+        """Reconcile the index with the directory, reusing unchanged persisted entries."""
+        with self._lock:
+            self._rebuild_locked()
+
+    def record(self, path: Path, asset: Dict[str, Any]) -> GeneratedEntry:
+        """Add or replace the entry for a file that was just written."""
+        stat = path.stat()
+        entry = _entry_from_asset(path.name, stat.st_mtime, stat.st_size, asset)
+        with self._lock:
+            self._reserved.discard(entry.name)
+            self._put(entry)
+            self._persist()
+            self._dir_mtime_ns = _dir_mtime_ns(self.directory)
+        return entry
+
+    def unique_name(self, filename: str) -> str:
+        """Reserve and return `filename` or the first free `{stem}_{n}{suffix}` variant.
+
+        The name stays reserved until `record` (or `release`) is called for
+        it, so concurrent saves of one filename never get the same name.
+        """
+        stem = Path(filename).stem
+        suffix = Path(filename).suffix
+        with self._lock:
+            self._refresh_if_stale()
+            candidate = filename
+            counter = self._next_suffix.get(filename, 1)
+            while candidate in self._entries or candidate in self._reserved or (self.directory / candidate).exists():
+                candidate = f"{stem}_{counter}{suffix}"
+                counter += 1
+            if candidate != filename:
+                self._next_suffix[filename] = counter
+            self._reserved.add(candidate)
+            return candidate
+
+    def release(self, name: str) -> None:
+        """Give back a name from `unique_name` whose file was never written."""
+        with self._lock:
+            self._reserved.discard(name)
+
+    def page(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        tags: Iterable[str] = (),
+        template_id: Optional[str] = None,
+    ) -> Tuple[List[GeneratedEntry], Optional[str]]:
+        """Return one page of entries (newest first) and the cursor for the next one."""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        required = set(tags)
+        with self._lock:
+            self._refresh_if_stale()
+            start = 0
+            if cursor:
+                start = bisect_right(self._order, decode_cursor(cursor))
+            results: List[GeneratedEntry] = []
+            last_key: Optional[_SortKey] = None
+            position = start
+            while position < len(self._order) and len(results) < limit:
+                key = self._order[position]
+                position += 1
+                entry = self._entries[key[1]]
+                if required and not required.issubset(entry.tags):
+                    continue
+                if template_id and entry.template_id != template_id:
+                    continue
+                results.append(entry)
+                last_key = key
+            has_more = position < len(self._order) and last_key is not None
+            return results, encode_cursor(last_key) if has_more else None
+
+    def _refresh_if_stale(self) -> None:
+        # Files added/removed outside the server change the directory mtime.
+        if _dir_mtime_ns(self.directory) != self._dir_mtime_ns:
+            self._rebuild_locked()
+
+    def _rebuild_locked(self) -> None:
+        persisted = self._read_persisted()
+        self._entries = {}
+        self._order = []
+        if self.directory.is_dir():
+            with os.scandir(self.directory) as scan:
+                for item in scan:
+                    if item.name.startswith(".") or not item.name.endswith(".json") or not item.is_file():
+                        continue
+                    stat = item.stat()
+                    cached = persisted.get(item.name)
+                    if cached and cached.modified == stat.st_mtime and cached.size == stat.st_size:
+                        self._put(cached)
+                        continue
+                    self._put(_entry_from_file(Path(item.path), stat.st_mtime, stat.st_size))
+        if self.directory.is_dir() and persisted != self._entries:
+            self._persist()
+        self._dir_mtime_ns = _dir_mtime_ns(self.directory)
+
+    def _put(self, entry: GeneratedEntry) -> None:
+        previous = self._entries.get(entry.name)
+        if previous is not None:
+            self._order.remove(_sort_key(previous))
+        self._entries[entry.name] = entry
+        insort(self._order, _sort_key(entry))
+
+    def _read_persisted(self) -> Dict[str, GeneratedEntry]:
+        try:
+            with self.index_path.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return {}
+        entries: Dict[str, GeneratedEntry] = {}
+        for raw in data.get("entries", []):
+            try:
+                entry = GeneratedEntry(
+                    name=str(raw["name"]),
+                    modified=float(raw["modified"]),
+                    size=int(raw["size"]),
+                    tags=tuple(raw.get("tags") or ()),
+                    template_id=raw.get("template_id"),
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            entries[entry.name] = entry
+        return entries
+
+    def _persist(self) -> None:
+        payload = {
+            "version": INDEX_VERSION,
+            "entries": [asdict(self._entries[name]) for _, name in self._order],
+        }
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.index_path)
+
+
+def encode_cursor(key: _SortKey) -> str:
+    raw = json.dumps([key[0], key[1]], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> _SortKey:
+    """Decode a listing cursor; raises ValueError when it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return (float(value[0]), str(value[1]))
+    except (ValueError, TypeError, IndexError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _sort_key(entry: GeneratedEntry) -> _SortKey:
+    return (-entry.modified, entry.name)
+
+
+def _dir_mtime_ns(directory: Path) -> Optional[int]:
+    try:
+        return directory.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _entry_from_file(path: Path, modified: float, size: int) -> GeneratedEntry:
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            asset = json.load(handle)
+    except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+        asset = {}
+    return _entry_from_asset(path.name, modified, size, asset)
+
+
+def _entry_from_asset(name: str, modified: float, size: int, asset: Any) -> GeneratedEntry:
+    metadata = asset.get("metadata") if isinstance(asset, dict) else None
+    metadata = metadata if isinstance(metadata, dict) else {}
+    tags = metadata.get("tags")
+    templates = metadata.get("selected_templates")
+    template_id = templates[0] if isinstance(templates, list) and templates else None
+    return GeneratedEntry(
+        name=name,
+        modified=modified,
+        size=size,
+        tags=tuple(str(tag) for tag in tags) if isinstance(tags, list) else (),
+        template_id=str(template_id) if template_id is not None else None,
+    )
+
+
+__all__ = ["GeneratedEntry", "GeneratedIndex", "decode_cursor", "encode_cursor"]
@@ -0,0 +1,220 @@
+"""In-memory template library backing `/api/generate`."""
+from __future__ import annotations
+
+import copy
+import json
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.constraints import normalize_asset_constraints
+from src.validator import ValidationError, validate_asset
+
+KEYWORD_WEIGHT = 1.0
+TAG_WEIGHT = 0.5
+# Japanese keywords are matched through character bigrams; a keyword counts
+# as hit once this share of its bigrams appears in the prompt.
+MIN_COVERAGE = 0.6
+
+_ASCII_WORD_RE = re.compile(r"[a-z0-9_]+")
+_NON_ASCII_RUN_RE = re.compile(r"[^\x00-\x7f\s、。・,.!?！？「」（）()]+")
+
+
+@dataclass(frozen=True)
+class TemplateEntry:
+    id: str
+    path: str
+    keywords: Tuple[str, ...]
+    tags: Tuple[str, ...]
+    intent: Optional[str] = None
+    when: Tuple[str, ...] = ()
+
+
+@dataclass
+class _CachedAsset:
+    mtime_ns: int
+    size: int
+    asset: Dict[str, Any]
+
+
+# (entry index, field name, term) — one posting per indexed keyword or tag.
+_Posting = Tuple[int, str, str]
+
+
+class TemplateLibrary:
+    """Pre-validated templates with an inverted keyword/tag index."""
+
+    def __init__(self, entries: Iterable[Dict[str, Any]], root_dir: Path) -> None:
+        self._root_dir = Path(root_dir)
+        self._entries: List[TemplateEntry] = [_entry_from_dict(raw) for raw in entries]
+        self._cache: Dict[str, _CachedAsset] = {}
+        self.errors: Dict[str, str] = {}
+        self._index: Dict[str, List[_Posting]] = {}
+        self._term_grams: Dict[_Posting, frozenset[str]] = {}
+        self._idf: Dict[Tuple[str, str], float] = {}
+        self._build_index()
+
+    @property
+    def entries(self) -> List[TemplateEntry]:
+        return list(self._entries)
+
+    def preload(self) -> None:
+        """Load and validate every template; failures are kept in `errors`."""
+        for entry in self._entries:
+            try:
+                self._load(entry)
+            except (OSError, json.JSONDecodeError, ValidationError) as exc:
+                self.errors[entry.id] = str(exc)
+
+    def asset(self, entry: TemplateEntry) -> Dict[str, Any]:
+        """Return a private deep copy of the template asset."""
+        return copy.deepcopy(self._load(entry))
+
+    def select(self, prompt: str) -> Dict[str, Any]:
+        """Rank templates against `prompt` and load the best one."""
+        scored = self.rank(prompt)
+        usable = [item for item in scored if item["id"] not in self.errors]
+        if usable and usable[0]["score"] > 0:
+            selected = usable[0]
+            reason = "keyword_match"
+        else:
+            selected = usable[0] if usable else {"id": "", "path": ""}
+            reason = "fallback"
+
+        asset = None
+        entry = self._entry_by_id(selected["id"])
+        if entry is not None:
+            asset = self.asset(entry)
+        return {
+            "selected": selected["id"],
+            "reason": reason,
+            "candidates": scored,
+            "rationale": {
+                "matched_tags": selected.get("tag_matches", []),
+                "intent": selected.get("intent"),
+                "when": selected.get("when", []),
+            },
+            "asset": asset,
+        }
+
+    def rank(self, prompt: str) -> List[Dict[str, Any]]:
+        """Score every template; higher scores first, library order breaks ties."""
+        hits: Dict[_Posting, int] = {}
+        for gram in _prompt_grams(prompt):
+            for posting in self._index.get(gram, []):
+                hits[posting] = hits.get(posting, 0) + 1
+
+        matched: Dict[int, Dict[str, List[str]]] = {}
+        scores: Dict[int, float] = {}
+        for (entry_index, field_name, term), count in hits.items():
+            grams = self._term_grams[(entry_index, field_name, term)]
+            coverage = count / len(grams)
+            if coverage < MIN_COVERAGE:
+                continue
+            weight = KEYWORD_WEIGHT if field_name == "keywords" else TAG_WEIGHT
+            scores[entry_index] = scores.get(entry_index, 0.0) + weight * coverage * self._idf[(field_name, term)]
+            matched.setdefault(entry_index, {"keywords": [], "tags": []})[field_name].append(term)
+
+        scored: List[Dict[str, Any]] = []
+        for index, entry in enumerate(self._entries):
+            entry_matches = matched.get(index, {"keywords": [], "tags": []})
+            scored.append(
+                {
+                    "id": entry.id,
+                    "path": entry.path,
+                    "matches": [kw for kw in entry.keywords if kw in entry_matches["keywords"]],
+                    "tag_matches": [tag for tag in entry.tags if tag in entry_matches["tags"]],
+                    "tags": list(entry.tags),
+                    "intent": entry.intent,
+                    "when": list(entry.when),
+                    "score": round(scores.get(index, 0.0), 3),
+                }
+            )
+        order = sorted(range(len(scored)), key=lambda index: (-scored[index]["score"], index))
+        return [scored[index] for index in order]
+
+    def _build_index(self) -> None:
+        document_frequency: Dict[Tuple[str, str], int] = {}
+        for index, entry in enumerate(self._entries):
+            for field_name, terms in (("keywords", entry.keywords), ("tags", entry.tags)):
+                for term in dict.fromkeys(terms):
+                    grams = _term_grams(term)
+                    if not grams:
+                        continue
+                    posting = (index, field_name, term)
+                    self._term_grams[posting] = grams
+                    for gram in grams:
+                        self._index.setdefault(gram, []).append(posting)
+                    df_key = (field_name, term)
+                    document_frequency[df_key] = document_frequency.get(df_key, 0) + 1
+
+        total = max(len(self._entries), 1)
+        self._idf = {key: math.log(1.0 + total / count) for key, count in document_frequency.items()}
+
+    def _entry_by_id(self, entry_id: str) -> Optional[TemplateEntry]:
+        for entry in self._entries:
+            if entry.id == entry_id:
+                return entry
+        return None
+
+    def _load(self, entry: TemplateEntry) -> Dict[str, Any]:
+        path = Path(entry.path).expanduser()
+        if not path.is_absolute():
+            path = (self._root_dir / path).resolve()
+        stat = path.stat()
+        cached = self._cache.get(entry.id)
+        if cached and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+            return cached.asset
+
+        with path.open("r", encoding="utf-8") as handle:
+            asset = json.load(handle)
+        normalize_asset_constraints(asset)
+        validate_asset(asset)
+        self._cache[entry.id] = _CachedAsset(stat.st_mtime_ns, stat.st_size, asset)
+        self.errors.pop(entry.id, None)
+        return asset
+
+
+def _entry_from_dict(raw: Dict[str, Any]) -> TemplateEntry:
+    return TemplateEntry(
+        id=str(raw["id"]),
+        path=str(raw["path"]),
+        keywords=tuple(str(kw).lower() for kw in raw.get("keywords", []) if str(kw).strip()),
+        tags=tuple(str(tag).lower() for tag in raw.get("tags", []) if isinstance(tag, str) and tag.strip()),
+        intent=raw.get("intent"),
+        when=tuple(raw.get("when") or ()),
+    )
+
+
+def _term_grams(term: str) -> frozenset[str]:
+    """Index units for a keyword: whole ASCII words, character bigrams otherwise."""
+    lowered = term.lower().strip()
+    grams: set[str] = set(_ASCII_WORD_RE.findall(lowered))
+    for run in _NON_ASCII_RUN_RE.findall(lowered):
+        grams.update(_char_ngrams(run))
+    return frozenset(grams)
+
+
+def _prompt_grams(prompt: str) -> set[str]:
+    lowered = prompt.lower()
+    grams: set[str] = set()
+    for word in _ASCII_WORD_RE.findall(lowered):
+        grams.add(word)
+        # Cheap plural folding so "buttons" still hits "button".
+        if len(word) > 3 and word.endswith("s"):
+            grams.add(word[:-1])
+    for run in _NON_ASCII_RUN_RE.findall(lowered):
+        grams.update(run)
+        grams.update(_char_ngrams(run))
+    return grams
+
+
+def _char_ngrams(run: str, size: int = 2) -> List[str]:
+    if len(run) <= size:
+        return [run]
+    return [run[index : index + size] for index in range(len(run) - size + 1)]
+
+
+__all__ = ["TemplateEntry", "TemplateLibrary"]
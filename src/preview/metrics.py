@@ -0,0 +1,211 @@
+"""Request/stage latency histograms and counters for the preview server."""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+PREFIX = "preview"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        rows: List[Tuple[str, int]] = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            rows.append((_format_bound(bound), total))
+        rows.append(("+Inf", self.count))
+        return rows
+
+    def quantile(self, q: float) -> float | str | None:
+        """Upper bucket bound containing the q-quantile (None when empty).
+
+        Past the top bucket the bound is "+Inf", as in `cumulative`, which
+        keeps `to_json` valid JSON (`float("inf")` would not be).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return "+Inf"
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": {bound: count for bound, count in self.cumulative()},
+        }
+
+
+class RequestTimer:
+    """Monotonic per-stage timings for one request (also feeds Server-Timing)."""
+
+    def __init__(self, endpoint: str, method: str) -> None:
+        self.endpoint = endpoint
+        self.method = method
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+        self.status = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - started))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages]
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+
+class MetricsRegistry:
+    """Thread-safe store of per-endpoint counters and histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._errors: Dict[str, int] = {}
+        self._latency: Dict[str, Histogram] = {}
+        self._stages: Dict[Tuple[str, str], Histogram] = {}
+        self._request_sizes: Dict[str, Histogram] = {}
+        self._response_sizes: Dict[str, Histogram] = {}
+        self.started = time.time()
+
+    def record(self, timer: RequestTimer) -> None:
+        elapsed = timer.elapsed()
+        endpoint = timer.endpoint
+        with self._lock:
+            key = (endpoint, timer.method, timer.status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if timer.status >= 400 or timer.status == 0:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+            self._histogram(self._latency, endpoint, LATENCY_BUCKETS).observe(elapsed)
+            for stage, seconds in timer.stages:
+                self._histogram(self._stages, (endpoint, stage), LATENCY_BUCKETS).observe(seconds)
+            self._histogram(self._request_sizes, endpoint, SIZE_BUCKETS).observe(timer.request_bytes)
+            self._histogram(self._response_sizes, endpoint, SIZE_BUCKETS).observe(timer.response_bytes)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._errors.clear()
+            self._latency.clear()
+            self._stages.clear()
+            self._request_sizes.clear()
+            self._response_sizes.clear()
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints: Dict[str, Dict[str, Any]] = {}
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                entry = endpoints.setdefault(endpoint, {"requests": {}, "stages": {}})
+                entry["requests"][f"{method} {status}"] = count
+            for endpoint, entry in endpoints.items():
+                entry["errors"] = self._errors.get(endpoint, 0)
+                entry["latency_seconds"] = self._latency[endpoint].to_json()
+                entry["request_bytes"] = self._request_sizes[endpoint].to_json()
+                entry["response_bytes"] = self._response_sizes[endpoint].to_json()
+            for (endpoint, stage), histogram in sorted(self._stages.items()):
+                endpoints[endpoint]["stages"][stage] = histogram.to_json()
+            return {"uptime_seconds": round(time.time() - self.started, 3), "endpoints": endpoints}
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            lines.append(f"# HELP {PREFIX}_requests_total Requests handled, by endpoint, method and status.")
+            lines.append(f"# TYPE {PREFIX}_requests_total counter")
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                labels = _labels(endpoint=endpoint, method=method, status=str(status))
+                lines.append(f"{PREFIX}_requests_total{labels} {count}")
+
+            lines.append(f"# HELP {PREFIX}_request_errors_total Responses with status >= 400.")
+            lines.append(f"# TYPE {PREFIX}_request_errors_total counter")
+            for endpoint, count in sorted(self._errors.items()):
+                lines.append(f"{PREFIX}_request_errors_total{_labels(endpoint=endpoint)} {count}")
+
+            _histogram_lines(lines, "request_duration_seconds", "End-to-end request latency.", {
+                (("endpoint", endpoint),): histogram for endpoint, histogram in self._latency.items()
+            })
+            _histogram_lines(lines, "stage_duration_seconds", "Latency of each handler stage.", {
+                (("endpoint", endpoint), ("stage", stage)): histogram
+                for (endpoint, stage), histogram in self._stages.items()
+            })
+            _histogram_lines(lines, "request_size_bytes", "Request body size.", {
+                (("endpoint", endpoint),): histogram for endpoint, histogram in self._request_sizes.items()
+            })
+            _histogram_lines(lines, "response_size_bytes", "Response body size (after compression).", {
+                (("endpoint", endpoint),): histogram for endpoint, histogram in self._response_sizes.items()
+            })
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram(store: Dict[Any, Histogram], key: Any, buckets: Sequence[float]) -> Histogram:
+        histogram = store.get(key)
+        if histogram is None:
+            histogram = store[key] = Histogram(buckets)
+        return histogram
+
+
+def _histogram_lines(
+    lines: List[str],
+    name: str,
+    help_text: str,
+    histograms: Dict[Tuple[Tuple[str, str], ...], Histogram],
+) -> None:
+    metric = f"{PREFIX}_{name}"
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    for label_pairs, histogram in sorted(histograms.items()):
+        base = dict(label_pairs)
+        for bound, count in histogram.cumulative():
+            lines.append(f"{metric}_bucket{_labels(**base, le=bound)} {count}")
+        lines.append(f"{metric}_sum{_labels(**base)} {histogram.sum:.6f}")
+        lines.append(f"{metric}_count{_labels(**base)} {histogram.count}")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return str(int(bound)) if float(bound).is_integer() else repr(float(bound))
+
+
+__all__ = ["Histogram", "MetricsRegistry", "RequestTimer", "LATENCY_BUCKETS", "SIZE_BUCKETS"]
@@ -3,17 +3,36 @@ from __future__ import annotations
 
 import argparse
 import json
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import queue
+import re
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Dict
-from urllib.parse import urlparse
+from typing import Any, Callable, Dict
+from urllib.parse import parse_qs, urlparse
 
-from src.compiler import compile_svg
+from src.catalog import load_tags
+from src.compiler import COMPILER_VERSION, BudgetExceeded, CompileBudget, compile_svg, diff_svg
 from src.constraints import normalize_asset_constraints
+from src.json_patch import JsonPatchError
+from src.renderer import RenderBusy, RenderPool, RenderRequest
 from src.validator import ValidationError, validate_asset
 
+from .caching import CompileCache, compile_etag, content_etag, encode_body, matching_etag, read_static
+from .events import EventHub
+from .flight import SingleFlight, Superseded, Supersession, Ticket
+from .generated_index import DEFAULT_PAGE_SIZE, GeneratedIndex
+from .library import TemplateLibrary
+from .metrics import MetricsRegistry, RequestTimer
+from .sessions import SessionConflict, SessionStore
+from .watcher import FileWatcher
+
 ROOT_DIR = Path(__file__).resolve().parents[2]
 STATIC_DIR = ROOT_DIR / "preview"
+GENERATED_DIR = ROOT_DIR / "generated"
+WATCH_DIRS = (ROOT_DIR / "examples", GENERATED_DIR, ROOT_DIR / "ui-templates")
 STUDIO_VERSION = "0.1.0"
 GENERATOR_LIBRARY = [
     {
@@ -145,18 +164,93 @@ GENERATOR_LIBRARY = [
         "when": ["カードの希少度を枠で表現する"],
     },
 ]
+_TEMPLATE_LIBRARY: TemplateLibrary | None = None
+_GENERATED_INDEX: GeneratedIndex | None = None
+_WATCHER: FileWatcher | None = None
+_RENDER_POOL: RenderPool | None = None
+_RENDER_POOL_LOCK = threading.Lock()
+COMPILE_DEADLINE_SECONDS = 5.0
+# Interactive requests get a tighter budget than the CLI defaults.
+COMPILE_BUDGET = CompileBudget(
+    max_elements=50_000,
+    max_depth=12,
+    deadline_seconds=COMPILE_DEADLINE_SECONDS,
+    max_bytes=4_000_000,
+)
+SESSIONS = SessionStore(budget=COMPILE_BUDGET)
+METRICS = MetricsRegistry()
+COMPILE_CACHE = CompileCache()
+COMPILE_FLIGHT: SingleFlight[str] = SingleFlight()
+SUPERSESSION = Supersession()
+EVENTS = EventHub()
+SESSION_PATH_RE = re.compile(r"^/api/session/([A-Za-z0-9_-]+)(?:/(patch|state|events))?$")
+API_ENDPOINTS = frozenset(
+    {
+        "/api/compile",
+        "/api/diff",
+        "/api/events",
+        "/api/generate",
+        "/api/list_generated",
+        "/api/metrics",
+        "/api/render",
+        "/api/save",
+        "/api/session",
+        "/api/tags",
+    }
+)
+STREAM_KEEPALIVE_SECONDS = 15.0
+RENDER_TIMEOUT_SECONDS = 180.0
+MAX_RENDER_SIZE = 8192
 
 
 class PreviewHandler(BaseHTTPRequestHandler):
+    _timer: RequestTimer | None = None
+
     def do_GET(self) -> None:
+        self._dispatch("GET", self._route_get)
+
+    def do_POST(self) -> None:
+        self._dispatch("POST", self._route_post)
+
+    def send_response(self, code: int, message: str | None = None) -> None:
+        if self._timer is not None:
+            self._timer.status = code
+        super().send_response(code, message)
+
+    def _dispatch(self, method: str, route: Any) -> None:
         parsed = urlparse(self.path)
+        self._timer = RequestTimer(_endpoint_label(parsed.path or "/"), method)
+        try:
+            route(parsed)
+        finally:
+            METRICS.record(self._timer)
+            self._timer = None
+
+    def _stage(self, name: str) -> Any:
+        """Time a handler stage for /api/metrics and the Server-Timing header."""
+        return self._timer.stage(name) if self._timer is not None else nullcontext()
+
+    def _route_get(self, parsed: Any) -> None:
         path = parsed.path or "/"
+        if path == "/api/metrics":
+            self._handle_metrics(parse_qs(parsed.query))
+            return
         if path == "/api/list_generated":
-            self._handle_list_generated()
+            self._handle_list_generated(parse_qs(parsed.query))
             return
         if path == "/api/tags":
             self._handle_tags()
             return
+        if path == "/api/events":
+            self._handle_events()
+            return
+        session_match = SESSION_PATH_RE.match(path)
+        if session_match and not session_match.group(2):
+            self._handle_session_get(session_match.group(1))
+            return
+        if session_match and session_match.group(2) == "events":
+            self._handle_session_events(session_match.group(1))
+            return
         if path == "/":
             path = "/index.html"
 
@@ -169,17 +263,14 @@ class PreviewHandler(BaseHTTPRequestHandler):
             self._send_error(404, "Not found")
             return
 
-        content_type = _content_type(file_path)
-        data = file_path.read_bytes()
-        self.send_response(200)
-        self.send_header("Content-Type", content_type)
-        self.send_header("Content-Length", str(len(data)))
-        self.send_header("Cache-Control", "no-store")
-        self.end_headers()
-        self.wfile.write(data)
+        data, etag = read_static(file_path)
+        matched = matching_etag(self.headers.get("If-None-Match"), etag)
+        if matched:
+            self._send_not_modified(matched)
+            return
+        self._send_body(200, data, _content_type(file_path), etag=etag)
 
-    def do_POST(self) -> None:
-        parsed = urlparse(self.path)
+    def _route_post(self, parsed: Any) -> None:
         if parsed.path == "/api/compile":
             self._handle_compile()
             return
@@ -189,24 +280,48 @@ class PreviewHandler(BaseHTTPRequestHandler):
         if parsed.path == "/api/save":
             self._handle_save()
             return
+        if parsed.path == "/api/session":
+            self._handle_session_create()
+            return
+        if parsed.path == "/api/diff":
+            self._handle_diff()
+            return
+        if parsed.path == "/api/render":
+            self._handle_render()
+            return
+        session_match = SESSION_PATH_RE.match(parsed.path)
+        if session_match and session_match.group(2) == "patch":
+            self._handle_session_patch(session_match.group(1))
+            return
+        if session_match and session_match.group(2) == "state":
+            self._handle_session_state(session_match.group(1))
+            return
         self._send_error(404, "Not found")
         return
 
     def _handle_compile(self) -> None:
-        length = int(self.headers.get("Content-Length", "0"))
-        raw = self.rfile.read(length)
-        try:
-            payload = json.loads(raw.decode("utf-8"))
-        except json.JSONDecodeError:
-            self._send_error(400, "Invalid JSON")
+        payload = self._read_json_body()
+        if payload is None:
             return
 
+        client = self.headers.get("X-Client-Id")
+        ticket = SUPERSESSION.begin(client) if client else None
+        try:
+            self._compile_payload(payload, ticket)
+        except Superseded:
+            self._send_json(409, {"error": "Superseded by a newer request", "superseded": True})
+        finally:
+            if ticket is not None:
+                SUPERSESSION.finish(ticket)
+
+    def _compile_payload(self, payload: Dict[str, Any], ticket: Ticket | None) -> None:
         asset = payload.get("asset")
         path = payload.get("path")
 
         if asset is None and path:
             try:
-                asset = _load_json_from_path(str(path))
+                with self._stage("load"):
+                    asset = _load_json_from_path(str(path))
             except OSError:
                 self._send_error(400, "Failed to read file")
                 return
@@ -218,24 +333,35 @@ class PreviewHandler(BaseHTTPRequestHandler):
             self._send_error(400, "Asset must be an object")
             return
 
-        normalize_asset_constraints(asset)
+        with self._stage("normalize"):
+            normalize_asset_constraints(asset)
 
+        with self._stage("etag"):
+            etag = compile_etag(asset, COMPILER_VERSION)
+        matched = matching_etag(self.headers.get("If-None-Match"), etag)
+        if matched:
+            self._send_not_modified(matched)
+            return
+
+        if ticket is not None:
+            ticket.check()
         try:
-            validate_asset(asset)
+            svg = _compile_cached(asset, etag, ticket=ticket, stage=self._stage)
         except ValidationError as exc:
             self._send_json(400, {"error": str(exc)})
             return
-
-        svg = compile_svg(asset)
-        self._send_json(200, {"svg": svg, "asset": asset})
+        except BudgetExceeded as exc:
+            self._send_budget_error(exc)
+            return
+        if ticket is not None:
+            # Compiled (and cached) for any identical request, but this
+            # client has already moved on: skip serializing the response.
+            ticket.check()
+        self._send_json(200, {"svg": svg, "asset": asset}, etag=etag)
 
     def _handle_generate(self) -> None:
-        length = int(self.headers.get("Content-Length", "0"))
-        raw = self.rfile.read(length)
-        try:
-            payload = json.loads(raw.decode("utf-8"))
-        except json.JSONDecodeError:
-            self._send_error(400, "Invalid JSON")
+        payload = self._read_json_body()
+        if payload is None:
             return
 
         prompt = payload.get("prompt", "")
@@ -243,7 +369,12 @@ class PreviewHandler(BaseHTTPRequestHandler):
             self._send_error(400, "Prompt is required")
             return
 
-        selection = _select_template(prompt)
+        try:
+            with self._stage("select"):
+                selection = _select_template(prompt)
+        except (OSError, json.JSONDecodeError, ValidationError):
+            self._send_error(500, "Template selection failed")
+            return
         template_id = selection["selected"]
         asset = selection["asset"]
         if asset is None:
@@ -251,15 +382,22 @@ class PreviewHandler(BaseHTTPRequestHandler):
             return
 
         _apply_generation_metadata(asset, prompt, template_id)
-        normalize_asset_constraints(asset)
+        with self._stage("normalize"):
+            normalize_asset_constraints(asset)
 
         try:
-            validate_asset(asset)
+            with self._stage("validate"):
+                validate_asset(asset)
         except ValidationError as exc:
             self._send_json(400, {"error": str(exc)})
             return
 
-        svg = compile_svg(asset)
+        try:
+            with self._stage("compile"):
+                svg = compile_svg(asset, COMPILE_BUDGET)
+        except BudgetExceeded as exc:
+            self._send_budget_error(exc)
+            return
         self._send_json(
             200,
             {
@@ -271,12 +409,8 @@ class PreviewHandler(BaseHTTPRequestHandler):
         )
 
     def _handle_save(self) -> None:
-        length = int(self.headers.get("Content-Length", "0"))
-        raw = self.rfile.read(length)
-        try:
-            payload = json.loads(raw.decode("utf-8"))
-        except json.JSONDecodeError:
-            self._send_error(400, "Invalid JSON")
+        payload = self._read_json_body()
+        if payload is None:
             return
 
         asset = payload.get("asset")
@@ -312,11 +446,17 @@ class PreviewHandler(BaseHTTPRequestHandler):
             self._send_error(400, "Filename is required")
             return
 
-        generated_dir = ROOT_DIR / "generated"
-        generated_dir.mkdir(parents=True, exist_ok=True)
-        final_name = _ensure_unique_filename(generated_dir, safe_name)
-        file_path = generated_dir / final_name
-        file_path.write_text(json.dumps(asset, ensure_ascii=False, indent=2), encoding="utf-8")
+        GENERATED_DIR.mkdir(parents=True, exist_ok=True)
+        index = _generated_index()
+        final_name = index.unique_name(safe_name)
+        file_path = GENERATED_DIR / final_name
+        try:
+            with self._stage("write"):
+                file_path.write_text(json.dumps(asset, ensure_ascii=False, indent=2), encoding="utf-8")
+                index.record(file_path, asset)
+        except OSError:
+            index.release(final_name)
+            raise
 
         self._send_json(
             200,
@@ -328,40 +468,351 @@ class PreviewHandler(BaseHTTPRequestHandler):
             },
         )
 
-    def _handle_list_generated(self) -> None:
-        generated_dir = ROOT_DIR / "generated"
-        if not generated_dir.exists():
-            self._send_json(200, {"files": []})
+    def _handle_list_generated(self, query: Dict[str, list[str]]) -> None:
+        try:
+            limit = int(query.get("limit", [str(DEFAULT_PAGE_SIZE)])[0])
+        except ValueError:
+            self._send_error(400, "limit must be an integer")
             return
+        cursor = query.get("cursor", [None])[0]
+        template_id = query.get("template", [None])[0]
+        tags = [tag for value in query.get("tag", []) for tag in _coerce_tags(value)]
 
-        files = []
-        for path in sorted(generated_dir.glob("*.json"), key=lambda item: item.stat().st_mtime, reverse=True):
-            files.append(
-                {
-                    "name": path.name,
-                    "path": str(Path("generated") / path.name),
-                    "modified": path.stat().st_mtime,
-                }
-            )
-        self._send_json(200, {"files": files})
+        try:
+            entries, next_cursor = _generated_index().page(limit, cursor, tags, template_id)
+        except ValueError:
+            self._send_error(400, "Invalid cursor")
+            return
+        self._send_json(
+            200,
+            {"files": [entry.to_json() for entry in entries], "next_cursor": next_cursor},
+        )
+
+    def _handle_metrics(self, query: Dict[str, list[str]]) -> None:
+        wants_json = query.get("format", [""])[0] == "json" or "application/json" in (self.headers.get("Accept") or "")
+        if wants_json:
+            self._send_json(200, METRICS.to_json())
+            return
+        self._send_body(200, METRICS.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
 
     def _handle_tags(self) -> None:
-        vocab = _load_tags_vocab()
-        allowed = sorted(_allowed_tags(vocab))
-        self._send_json(200, {"tags": allowed, "vocab": vocab})
+        vocab = load_tags(ROOT_DIR)
+        self._send_json(200, {"tags": sorted(vocab.allowed), "vocab": vocab.as_dict()})
 
-    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
-        data = json.dumps(payload).encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(data)))
+    def _handle_session_create(self) -> None:
+        payload = self._read_json_body()
+        if payload is None:
+            return
+        asset = payload.get("asset")
+        path = payload.get("path")
+        if asset is None and path:
+            try:
+                asset = _load_json_from_path(str(path))
+            except (OSError, json.JSONDecodeError):
+                self._send_error(400, "Failed to read file")
+                return
+        if not isinstance(asset, dict):
+            self._send_error(400, "Asset must be an object")
+            return
+
+        try:
+            with self._stage("compile"):
+                session = SESSIONS.create(asset)
+        except ValidationError as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+        except BudgetExceeded as exc:
+            self._send_budget_error(exc)
+            return
+        self._send_json(
+            200,
+            {"id": session.id, "version": session.version, "svg": session.svg, "asset": session.asset},
+        )
+
+    def _handle_session_get(self, session_id: str) -> None:
+        try:
+            session = SESSIONS.get(session_id)
+        except KeyError:
+            self._send_error(404, "Session not found")
+            return
+        with session.lock:
+            payload = {"id": session.id, "version": session.version, "svg": session.current_svg(), "asset": session.asset}
+        self._send_json(200, payload)
+
+    def _handle_session_patch(self, session_id: str) -> None:
+        payload = self._read_json_body()
+        if payload is None:
+            return
+        operations = payload.get("ops", payload.get("patch"))
+        base_version = payload.get("version")
+        if base_version is not None and (not isinstance(base_version, int) or isinstance(base_version, bool)):
+            self._send_error(400, "version must be an integer")
+            return
+
+        try:
+            with self._stage("patch"):
+                result = SESSIONS.patch(session_id, operations, base_version)
+        except KeyError:
+            self._send_error(404, "Session not found")
+            return
+        except SessionConflict as exc:
+            self._send_error(409, str(exc))
+            return
+        except BudgetExceeded as exc:
+            self._send_budget_error(exc)
+            return
+        except (JsonPatchError, ValueError) as exc:
+            self._send_error(400, str(exc))
+            return
+        except ValidationError as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+
+        response: Dict[str, Any] = {"id": session_id, "version": result.version, "unchanged": result.unchanged}
+        if payload.get("mode") == "delta" and result.changes is not None:
+            response["changes"] = result.changes
+        else:
+            response["svg"] = result.svg
+        self._send_json(200, response)
+
+    def _handle_session_state(self, session_id: str) -> None:
+        payload = self._read_json_body()
+        if payload is None:
+            return
+        try:
+            with self._stage("state"):
+                result = SESSIONS.update_state(session_id, payload.get("mockState"), merge=bool(payload.get("merge")))
+        except KeyError:
+            self._send_error(404, "Session not found")
+            return
+        except ValueError as exc:
+            self._send_error(400, str(exc))
+            return
+        self._send_json(200, {"id": session_id, "seq": result.seq, "deltas": result.deltas})
+
+    def _handle_session_events(self, session_id: str) -> None:
+        """Stream live-state deltas as Server-Sent Events until the client leaves."""
+        try:
+            subscriber = SESSIONS.subscribe(session_id)
+        except KeyError:
+            self._send_error(404, "Session not found")
+            return
+
+        def alive() -> bool:
+            # Watching a session keeps it alive; stop once it has expired.
+            try:
+                SESSIONS.get(session_id)
+            except KeyError:
+                return False
+            return True
+
+        try:
+            self._stream_events(subscriber, {"event": "hello", "id": session_id}, alive)
+        finally:
+            SESSIONS.unsubscribe(session_id, subscriber)
+
+    def _handle_events(self) -> None:
+        """Stream file-change notifications from the watcher as Server-Sent Events."""
+        subscriber = EVENTS.subscribe()
+        try:
+            self._stream_events(subscriber, {"event": "hello", "watching": _WATCHER is not None}, lambda: True)
+        finally:
+            EVENTS.unsubscribe(subscriber)
+
+    def _stream_events(self, subscriber: "queue.Queue[Dict[str, Any]]", hello: Dict[str, Any], alive: Any) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
         self.send_header("Cache-Control", "no-store")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            self._write_event(hello)
+            while True:
+                try:
+                    event = subscriber.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    if not alive():
+                        break
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                self._write_event(event)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _write_event(self, event: Dict[str, Any]) -> None:
+        lines = [f"event: {event['event']}"]
+        if "seq" in event:
+            lines.append(f"id: {event['seq']}")
+        lines.append(f"data: {json.dumps(event)}")
+        self.wfile.write(("\n".join(lines) + "\n\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def _handle_render(self) -> None:
+        payload = self._read_json_body()
+        if payload is None:
+            return
+        backend = payload.get("backend", "inkscape")
+        try:
+            with self._stage("compile"):
+                compile_key, svg = _render_source(payload)
+            width, height = _render_size(svg, payload.get("width"), payload.get("height"))
+        except KeyError:
+            self._send_error(404, "Unknown compile key; compile the asset first")
+            return
+        except (OSError, json.JSONDecodeError):
+            self._send_error(400, "Failed to read file")
+            return
+        except ValidationError as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+        except BudgetExceeded as exc:
+            self._send_budget_error(exc)
+            return
+        except ValueError as exc:
+            self._send_error(400, str(exc))
+            return
+
+        etag = content_etag(f"{compile_key}:{width}x{height}:{backend}".encode("utf-8"))
+        matched = matching_etag(self.headers.get("If-None-Match"), etag)
+        if matched:
+            self._send_not_modified(matched)
+            return
+
+        request = RenderRequest(svg=svg, width=width, height=height, backend=str(backend))
+        # Every Studio tab connects from 127.0.0.1, so tabs get their own limit
+        # under their address; the address keeps an overall cap either way.
+        host = self.client_address[0]
+        tab = self.headers.get("X-Client-Id")
+        client = f"{host}/{tab}" if tab else host
+        try:
+            with self._stage("render"):
+                png = _render_pool().render(request, client=client, timeout=RENDER_TIMEOUT_SECONDS, host=host)
+        except RenderBusy as exc:
+            self._send_json(
+                exc.status,
+                {"error": str(exc), "retry_after": exc.retry_after},
+                headers={"Retry-After": str(exc.retry_after)},
+            )
+            return
+        except ValueError as exc:
+            self._send_error(400, str(exc))
+            return
+        except FutureTimeout:
+            self._send_error(504, "Render timed out")
+            return
+        except RuntimeError as exc:
+            self._send_error(502, str(exc))
+            return
+        self._send_body(200, png, "image/png", etag=etag)
+
+    def _handle_diff(self) -> None:
+        payload = self._read_json_body()
+        if payload is None:
+            return
+        svgs = []
+        for side in ("before", "after"):
+            try:
+                with self._stage(f"compile_{side}"):
+                    svgs.append(_diff_side_svg(payload.get(side)))
+            except KeyError:
+                self._send_error(404, f"{side}: session not found")
+                return
+            except (OSError, json.JSONDecodeError):
+                self._send_error(400, f"{side}: failed to read file")
+                return
+            except ValidationError as exc:
+                self._send_json(400, {"error": f"{side}: {exc}"})
+                return
+            except BudgetExceeded as exc:
+                self._send_budget_error(exc, side)
+                return
+            except ValueError as exc:
+                self._send_error(400, f"{side}: {exc}")
+                return
+        with self._stage("diff"):
+            result = diff_svg(svgs[0], svgs[1])
+        self._send_json(200, result)
+
+    def _read_json_body(self) -> Dict[str, Any] | None:
+        """Decode a JSON object body, answering 400 and returning None on failure."""
+        length = int(self.headers.get("Content-Length", "0"))
+        with self._stage("read"):
+            raw = self.rfile.read(length)
+        if self._timer is not None:
+            self._timer.request_bytes = len(raw)
+        try:
+            with self._stage("decode"):
+                payload = json.loads(raw.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._send_error(400, "Invalid JSON")
+            return None
+        if not isinstance(payload, dict):
+            self._send_error(400, "Payload must be an object")
+            return None
+        return payload
+
+    def _send_json(
+        self,
+        status: int,
+        payload: Dict[str, Any],
+        etag: str | None = None,
+        headers: Dict[str, str] | None = None,
+    ) -> None:
+        with self._stage("serialize"):
+            data = json.dumps(payload).encode("utf-8")
+        self._send_body(status, data, "application/json", etag=etag, headers=headers)
+
+    def _send_body(
+        self,
+        status: int,
+        data: bytes,
+        content_type: str,
+        etag: str | None = None,
+        headers: Dict[str, str] | None = None,
+    ) -> None:
+        with self._stage("encode"):
+            body, encoding, etag = encode_body(data, etag, self.headers.get("Accept-Encoding"))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if self._timer is not None:
+            self._timer.response_bytes = len(body)
+            self.send_header("Server-Timing", self._timer.server_timing())
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if etag:
+            # Cacheable, but the client must revalidate with If-None-Match.
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        else:
+            self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_not_modified(self, etag: str) -> None:
+        self.send_response(304)
+        if self._timer is not None:
+            self.send_header("Server-Timing", self._timer.server_timing())
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
         self.end_headers()
-        self.wfile.write(data)
 
     def _send_error(self, status: int, message: str) -> None:
         self._send_json(status, {"error": message})
 
+    def _send_budget_error(self, exc: BudgetExceeded, side: str | None = None) -> None:
+        """422 for assets over the size/depth budget, 504 when the compile deadline passed."""
+        payload = exc.to_json()
+        if side:
+            payload["error"] = f"{side}: {payload['error']}"
+        self._send_json(504 if exc.limit == "deadline" else 422, payload)
+
 
 def _load_json_from_path(path_text: str) -> Dict[str, Any]:
     path = Path(path_text).expanduser()
@@ -373,32 +824,109 @@ def _load_json_from_path(path_text: str) -> Dict[str, Any]:
         return json.load(handle)
 
 
-def _load_tags_vocab() -> Dict[str, list[str]]:
-    tags_path = ROOT_DIR / "ui-templates" / "_catalog" / "tags.yaml"
-    if not tags_path.exists():
-        return {}
-    vocab: Dict[str, list[str]] = {}
-    current_key: str | None = None
-    for line in tags_path.read_text(encoding="utf-8").splitlines():
-        stripped = line.strip()
-        if not stripped or stripped.startswith("#"):
-            continue
-        if not line.startswith(" "):
-            current_key = stripped.rstrip(":")
-            vocab.setdefault(current_key, [])
-            continue
-        if current_key and stripped.startswith("- "):
-            value = stripped[2:].strip()
-            if value:
-                vocab[current_key].append(value)
-    return vocab
-
-
-def _allowed_tags(vocab: Dict[str, list[str]]) -> set[str]:
-    allowed: set[str] = set()
-    for key in ("roles", "importance", "states", "constraints", "fx_tags"):
-        allowed.update(vocab.get(key, []))
-    return allowed
+def _diff_side_svg(side: Any) -> str:
+    """Compile one side of a diff request: `{asset}`, `{path}` or `{session}`."""
+    if not isinstance(side, dict):
+        raise ValueError("must be an object with asset, path or session")
+    session_id = side.get("session")
+    if session_id is not None:
+        session = SESSIONS.get(str(session_id))
+        with session.lock:
+            return session.current_svg()
+    asset = side.get("asset")
+    path = side.get("path")
+    if asset is None and path:
+        asset = _load_json_from_path(str(path))
+    if not isinstance(asset, dict):
+        raise ValueError("Asset must be an object")
+    normalize_asset_constraints(asset)
+    validate_asset(asset)
+    return compile_svg(asset, COMPILE_BUDGET)
+
+
+def _no_stage(name: str) -> Any:
+    return nullcontext()
+
+
+def _compile_cached(
+    asset: Dict[str, Any],
+    etag: str,
+    ticket: Ticket | None = None,
+    stage: Callable[[str], Any] = _no_stage,
+) -> str:
+    """Return the SVG for a normalized asset via the compile cache.
+
+    On a miss, concurrent requests for the same `etag` share one
+    validate + compile (single-flight); raises ValidationError, BudgetExceeded
+    or Superseded.
+    """
+    svg = COMPILE_CACHE.get(etag)
+    if svg is not None:
+        return svg
+
+    def compile_once() -> str:
+        with stage("validate"):
+            validate_asset(asset)
+        with stage("compile"):
+            result = compile_svg(asset, COMPILE_BUDGET)
+        COMPILE_CACHE.put(etag, result)
+        return result
+
+    svg, _shared = COMPILE_FLIGHT.do(etag, compile_once, ticket)
+    return svg
+
+
+def _endpoint_label(path: str) -> str:
+    """Collapse request paths into a bounded set of metric labels."""
+    if path in API_ENDPOINTS:
+        return path
+    session_match = SESSION_PATH_RE.match(path)
+    if session_match:
+        suffix = session_match.group(2)
+        return f"/api/session/{{id}}/{suffix}" if suffix else "/api/session/{id}"
+    if path.startswith("/api/"):
+        return "/api/unknown"
+    return "static"
+
+
+def _render_source(payload: Dict[str, Any]) -> tuple[str, str]:
+    """Return (compile key, svg) for a render request.
+
+    `key` reuses an SVG already in the compile cache (the `ETag` returned by
+    `/api/compile`); otherwise `asset` / `path` is compiled through the cache.
+    Raises KeyError for an unknown key.
+    """
+    key = payload.get("key")
+    if key is not None:
+        svg = COMPILE_CACHE.get(str(key))
+        if svg is None:
+            raise KeyError(key)
+        return str(key), svg
+    asset = payload.get("asset")
+    path = payload.get("path")
+    if asset is None and path:
+        asset = _load_json_from_path(str(path))
+    if not isinstance(asset, dict):
+        raise ValueError("Asset must be an object")
+    normalize_asset_constraints(asset)
+    etag = compile_etag(asset, COMPILER_VERSION)
+    return etag, _compile_cached(asset, etag)
+
+
+def _render_size(svg: str, width: Any, height: Any) -> tuple[int, int]:
+    """Resolve the PNG size, keeping the SVG aspect ratio when one side is omitted."""
+    for value in (width, height):
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or not 0 < value <= MAX_RENDER_SIZE):
+            raise ValueError(f"width/height must be integers between 1 and {MAX_RENDER_SIZE}")
+    match = re.search(r'<svg\b[^>]*\bwidth="([\d.]+)"[^>]*\bheight="([\d.]+)"', svg)
+    base_width, base_height = (float(match.group(1)), float(match.group(2))) if match else (512.0, 512.0)
+    if width is None and height is None:
+        return int(round(base_width)), int(round(base_height))
+    if width is None:
+        return max(1, int(round(base_width * height / base_height))), height
+    if height is None:
+        return width, max(1, int(round(base_height * width / base_width)))
+    return width, height
 
 
 def _coerce_tags(tags: Any) -> list[str]:
@@ -412,9 +940,7 @@ def _coerce_tags(tags: Any) -> list[str]:
 
 
 def _warn_unknown_tags(tags: list[str]) -> list[str]:
-    vocab = _load_tags_vocab()
-    allowed = _allowed_tags(vocab)
-    return [tag for tag in tags if tag not in allowed]
+    return load_tags(ROOT_DIR).unknown(tags)
 
 
 def _merge_tags(existing: list[str], extra: list[str]) -> list[str]:
@@ -440,57 +966,32 @@ def _sanitize_filename(filename: Any) -> str:
     return safe
 
 
-def _ensure_unique_filename(base_dir: Path, filename: str) -> str:
-    candidate = filename
-    stem = Path(filename).stem
-    suffix = Path(filename).suffix
-    counter = 1
-    while (base_dir / candidate).exists():
-        candidate = f"{stem}_{counter}{suffix}"
-        counter += 1
-    return candidate
+def _generated_index() -> GeneratedIndex:
+    global _GENERATED_INDEX
+    if _GENERATED_INDEX is None:
+        _GENERATED_INDEX = GeneratedIndex(GENERATED_DIR)
+        _GENERATED_INDEX.rebuild()
+    return _GENERATED_INDEX
 
 
-def _select_template(prompt: str) -> Dict[str, Any]:
-    lowered = prompt.lower()
-    scored: list[dict[str, Any]] = []
-    for entry in GENERATOR_LIBRARY:
-        matches = [kw for kw in entry["keywords"] if kw.lower() in lowered]
-        tags = entry.get("tags", [])
-        tag_matches = [tag for tag in tags if isinstance(tag, str) and tag.lower() in lowered]
-        scored.append(
-            {
-                "id": entry["id"],
-                "path": entry["path"],
-                "matches": matches,
-                "tag_matches": tag_matches,
-                "tags": tags,
-                "intent": entry.get("intent"),
-                "when": entry.get("when"),
-                "score": len(matches),
-            }
-        )
+def _render_pool() -> RenderPool:
+    global _RENDER_POOL
+    with _RENDER_POOL_LOCK:
+        if _RENDER_POOL is None:
+            _RENDER_POOL = RenderPool()
+        return _RENDER_POOL
 
-    scored.sort(key=lambda item: item["score"], reverse=True)
-    if scored and scored[0]["score"] > 0:
-        selected = scored[0]
-        reason = "keyword_match"
-    else:
-        selected = scored[0] if scored else {"id": "", "path": ""}
-        reason = "fallback"
-
-    asset = _load_json_from_path(selected["path"])
-    return {
-        "selected": selected["id"],
-        "reason": reason,
-        "candidates": scored,
-        "rationale": {
-            "matched_tags": selected.get("tag_matches", []),
-            "intent": selected.get("intent"),
-            "when": selected.get("when", []),
-        },
-        "asset": asset,
-    }
+
+def _template_library() -> TemplateLibrary:
+    global _TEMPLATE_LIBRARY
+    if _TEMPLATE_LIBRARY is None:
+        _TEMPLATE_LIBRARY = TemplateLibrary(GENERATOR_LIBRARY, ROOT_DIR)
+        _TEMPLATE_LIBRARY.preload()
+    return _TEMPLATE_LIBRARY
+
+
+def _select_template(prompt: str) -> Dict[str, Any]:
+    return _template_library().select(prompt)
 
 
 def _apply_generation_metadata(asset: Dict[str, Any], prompt: str, template_id: str) -> None:
@@ -504,6 +1005,48 @@ def _apply_generation_metadata(asset: Dict[str, Any], prompt: str, template_id:
     asset["metadata"] = metadata
 
 
+def refresh_changed_files(paths: list[Path]) -> list[Dict[str, Any]]:
+    """Recompile changed assets into the compile cache and notify Studio clients.
+
+    Asset JSON under `examples/` and `generated/` is recompiled so the next
+    `/api/compile` for it is a cache hit and the generated index is
+    reconciled; catalog files only trigger a notification (their loaders
+    revalidate by mtime on their own).
+    """
+    files: list[Dict[str, Any]] = []
+    for path in paths:
+        try:
+            relative = path.resolve().relative_to(ROOT_DIR).as_posix()
+        except ValueError:
+            continue
+        entry: Dict[str, Any] = {"path": relative}
+        if relative.startswith("ui-templates/"):
+            entry["kind"] = "catalog"
+        elif not path.exists():
+            entry["kind"] = "removed"
+        elif path.suffix == ".json":
+            entry["kind"] = "asset"
+            try:
+                asset = _load_json_from_path(str(path))
+                if not isinstance(asset, dict):
+                    raise ValueError("Asset must be an object")
+                normalize_asset_constraints(asset)
+                etag = compile_etag(asset, COMPILER_VERSION)
+                _compile_cached(asset, etag)
+                entry["etag"] = etag
+            except (OSError, ValueError, ValidationError) as exc:
+                entry["error"] = str(exc)
+        else:
+            continue
+        files.append(entry)
+    if any(entry["path"].startswith("generated/") for entry in files):
+        # In-place edits do not touch the directory mtime the index watches.
+        _generated_index().rebuild()
+    if files:
+        EVENTS.publish({"event": "changed", "files": files}, reset={"event": "reset"})
+    return files
+
+
 def _content_type(path: Path) -> str:
     if path.suffix == ".html":
         return "text/html; charset=utf-8"
@@ -524,8 +1067,19 @@ def _is_safe_path(path: Path) -> bool:
     return True
 
 
-def run(host: str, port: int) -> None:
-    server = HTTPServer((host, port), PreviewHandler)
+def run(host: str, port: int, watch: bool = True) -> None:
+    global _WATCHER
+    library = _template_library()
+    for template_id, error in sorted(library.errors.items()):
+        print(f"WARN: template '{template_id}' failed to load: {error}")
+    _generated_index()
+    if watch:
+        _WATCHER = FileWatcher([path for path in WATCH_DIRS if path.is_dir()], refresh_changed_files)
+        _WATCHER.start()
+        print(f"Watching {', '.join(path.name for path in WATCH_DIRS)} ({_WATCHER.backend.name})")
+    # Threaded so long-lived event streams do not block other requests.
+    server = ThreadingHTTPServer((host, port), PreviewHandler)
+    server.daemon_threads = True
     print(f"Preview server running at http://{host}:{port}")
     server.serve_forever()
 
@@ -534,9 +1088,10 @@ def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Preview server")
     parser.add_argument("--host", default="127.0.0.1")
     parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--no-watch", action="store_true", help="Disable file watching / live reload")
     args = parser.parse_args(argv)
 
-    run(args.host, args.port)
+    run(args.host, args.port, watch=not args.no_watch)
     return 0
 
 
@@ -0,0 +1,282 @@
+"""Server-held edit sessions that accept JSON Patch deltas."""
+from __future__ import annotations
+
+import copy
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from xml.etree import ElementTree as ET
+
+from src.compiler import CompileBudget, compile_svg
+from src.compiler.live import LiveBindings
+from src.constraints import normalize_asset_constraints
+from src.json_patch import apply_patch
+from src.validator import validate_asset
+
+from .caching import asset_digest
+from .events import EventHub
+
+SVG_NS = "http://www.w3.org/2000/svg"
+DEFAULT_MAX_SESSIONS = 64
+DEFAULT_TTL_SECONDS = 30 * 60
+
+
+class SessionConflict(Exception):
+    """Raised when a patch targets an outdated session version."""
+
+
+@dataclass
+class EditSession:
+    id: str
+    asset: Dict[str, Any]
+    svg: str
+    digest: str
+    version: int = 1
+    last_used: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    live: Optional[LiveBindings] = field(default=None, repr=False)
+    svg_stale: bool = False
+    state_seq: int = 0
+    events: EventHub = field(default_factory=EventHub, repr=False)
+    budget: Optional[CompileBudget] = field(default=None, repr=False)
+
+    def current_svg(self) -> str:
+        """Full SVG for the current asset; recompiled lazily after live state updates.
+
+        Callers must hold `lock`.
+        """
+        if self.svg_stale:
+            self.svg = compile_svg(self.asset, self.budget)
+            self.digest = asset_digest(self.asset)
+            self.svg_stale = False
+        return self.svg
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Push `event` to stream subscribers; lagging ones get a `reset`."""
+        self.events.publish(event, reset={"event": "reset", "version": self.version})
+
+
+@dataclass(frozen=True)
+class PatchResult:
+    version: int
+    svg: str
+    changes: Optional[List[Dict[str, str]]]
+    unchanged: bool = False
+
+
+@dataclass(frozen=True)
+class StateResult:
+    seq: int
+    deltas: List[Dict[str, Any]]
+
+
+class SessionStore:
+    """LRU-bounded, TTL-expiring map of session id → EditSession."""
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        budget: Optional[CompileBudget] = None,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.budget = budget
+        self._sessions: "OrderedDict[str, EditSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, asset: Dict[str, Any]) -> EditSession:
+        """Normalize, validate and compile `asset`, then open a session for it."""
+        normalize_asset_constraints(asset)
+        validate_asset(asset)
+        svg = compile_svg(asset, self.budget)
+        session = EditSession(
+            id=secrets.token_urlsafe(12),
+            asset=asset,
+            svg=svg,
+            digest=asset_digest(asset),
+            budget=self.budget,
+        )
+        with self._lock:
+            self._expire_locked()
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> EditSession:
+        """Return a live session; raises KeyError when unknown or expired."""
+        with self._lock:
+            self._expire_locked()
+            session = self._sessions[session_id]
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            return session
+
+    def patch(
+        self,
+        session_id: str,
+        operations: List[Dict[str, Any]],
+        base_version: Optional[int] = None,
+    ) -> PatchResult:
+        """Apply a JSON Patch to a session and recompile.
+
+        Raises KeyError, SessionConflict, JsonPatchError or ValidationError;
+        the session is left unchanged on any failure.
+        """
+        session = self.get(session_id)
+        with session.lock:
+            if base_version is not None and base_version != session.version:
+                raise SessionConflict(f"session is at version {session.version}, not {base_version}")
+            session.current_svg()
+            candidate = apply_patch(session.asset, operations)
+            if not isinstance(candidate, dict):
+                raise ValueError("Asset must be an object")
+            normalize_asset_constraints(candidate)
+            digest = asset_digest(candidate)
+            if digest == session.digest:
+                return PatchResult(version=session.version, svg=session.svg, changes=[], unchanged=True)
+
+            validate_asset(candidate)
+            svg = compile_svg(candidate, self.budget)
+            changes = changed_subtrees(session.svg, svg)
+            session.asset = candidate
+            session.svg = svg
+            session.digest = digest
+            session.version += 1
+            session.live = None
+            session.publish({"event": "reset", "version": session.version})
+            return PatchResult(version=session.version, svg=svg, changes=changes)
+
+    def update_state(self, session_id: str, state: Dict[str, Any], merge: bool = False) -> StateResult:
+        """Swap in a new mockState and re-evaluate only the bound layers.
+
+        Returns the attribute/text deltas keyed by element id and pushes them
+        to stream subscribers. The full SVG is recompiled lazily the next
+        time it is requested. Raises KeyError or ValueError.
+        """
+        if not isinstance(state, dict):
+            raise ValueError("mockState must be an object")
+        session = self.get(session_id)
+        with session.lock:
+            if session.live is None:
+                session.live = LiveBindings(session.asset)
+                session.live.update(session.asset.get("mockState") or {})
+            current = session.asset.get("mockState") or {}
+            next_state = _merge_state(current, state) if merge else copy.deepcopy(state)
+            deltas = session.live.update(next_state)
+            session.asset = {**session.asset, "mockState": next_state}
+            session.svg_stale = True
+            session.state_seq += 1
+            if deltas:
+                session.publish({"event": "delta", "seq": session.state_seq, "deltas": deltas})
+            return StateResult(seq=session.state_seq, deltas=deltas)
+
+    def subscribe(self, session_id: str) -> "queue.Queue[Dict[str, Any]]":
+        """Register a stream subscriber; raises KeyError for unknown sessions."""
+        return self.get(session_id).events.subscribe()
+
+    def unsubscribe(self, session_id: str, subscriber: "queue.Queue[Dict[str, Any]]") -> None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is not None:
+            session.events.unsubscribe(subscriber)
+
+    def _expire_locked(self) -> None:
+        deadline = time.monotonic() - self.ttl
+        expired = [key for key, session in self._sessions.items() if session.last_used < deadline]
+        for key in expired:
+            del self._sessions[key]
+
+
+def _merge_state(current: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Deep-merge `update` into a copy of `current` (objects merge, values replace)."""
+    merged = copy.deepcopy(current)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge_state(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def changed_subtrees(old_svg: str, new_svg: str) -> Optional[List[Dict[str, str]]]:
+    """Return the smallest id-keyed subtrees that differ between two renders.
+
+    Each change is `{"id": ..., "svg": <outer markup>}` in document order.
+    Returns None when the change cannot be expressed as in-place subtree
+    replacements (root attributes, `<defs>`, or added/removed/reordered ids
+    at a level without an id'd parent).
+    """
+    old_root = ET.fromstring(old_svg)
+    new_root = ET.fromstring(new_svg)
+    if old_root.attrib != new_root.attrib:
+        return None
+    changes: List[Dict[str, str]] = []
+    if not _diff_children(old_root, new_root, changes):
+        return None
+    return changes
+
+
+def _diff_children(old: ET.Element, new: ET.Element, changes: List[Dict[str, str]]) -> bool:
+    """Collect replacements for the children of `old`/`new`; False if not expressible."""
+    old_children = list(old)
+    new_children = list(new)
+    if [_child_key(child) for child in old_children] != [_child_key(child) for child in new_children]:
+        return False
+    for old_child, new_child in zip(old_children, new_children):
+        if _same_tree(old_child, new_child):
+            continue
+        element_id = old_child.get("id")
+        if not element_id or _local_name(old_child.tag) == "defs":
+            return False
+        nested: List[Dict[str, str]] = []
+        if (
+            old_child.attrib == new_child.attrib
+            and (old_child.text or "") == (new_child.text or "")
+            and _diff_children(old_child, new_child, nested)
+        ):
+            changes.extend(nested)
+            continue
+        changes.append({"id": element_id, "svg": _serialize(new_child)})
+    return True
+
+
+def _child_key(element: ET.Element) -> tuple[str, Optional[str]]:
+    return (_local_name(element.tag), element.get("id"))
+
+
+def _same_tree(left: ET.Element, right: ET.Element) -> bool:
+    if left.tag != right.tag or left.attrib != right.attrib or (left.text or "") != (right.text or ""):
+        return False
+    if len(left) != len(right):
+        return False
+    return all(_same_tree(a, b) for a, b in zip(left, right))
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _serialize(element: ET.Element) -> str:
+    """Serialize a parsed subtree back to the compiler's un-prefixed SVG form."""
+    clone = copy.deepcopy(element)
+    clone.tail = None
+    for node in clone.iter():
+        node.tag = _local_name(node.tag)
+    clone.set("xmlns", SVG_NS)
+    return ET.tostring(clone, encoding="unicode")
+
+
+__all__ = [
+    "EditSession",
+    "PatchResult",
+    "SessionConflict",
+    "SessionStore",
+    "StateResult",
+    "changed_subtrees",
+]
@@ -0,0 +1,234 @@
+"""Debounced file watching for the preview server (inotify with a polling fallback)."""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+WATCH_SUFFIXES = (".json", ".yaml", ".yml")
+DEFAULT_DEBOUNCE_SECONDS = 0.2
+MAX_COALESCE_SECONDS = 2.0
+POLL_INTERVAL_SECONDS = 0.5
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingBackend:
+    """Detect changes by comparing (mtime_ns, size) snapshots of the watched trees."""
+
+    name = "polling"
+
+    def __init__(self, roots: Sequence[Path], suffixes: Sequence[str] = WATCH_SUFFIXES) -> None:
+        self.roots = [Path(root) for root in roots]
+        self.suffixes = tuple(suffixes)
+        self._snapshot = self._scan()
+
+    def poll(self, timeout: float) -> Set[Path]:
+        time.sleep(timeout)
+        current = self._scan()
+        changed = {path for path, stamp in current.items() if self._snapshot.get(path) != stamp}
+        changed.update(path for path in self._snapshot if path not in current)
+        self._snapshot = current
+        return changed
+
+    def close(self) -> None:
+        return None
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot: Dict[Path, Tuple[int, int]] = {}
+        for path in _iter_files(self.roots, self.suffixes):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+
+class InotifyBackend:
+    """Linux inotify via libc; raises OSError where it is unavailable."""
+
+    name = "inotify"
+
+    def __init__(self, roots: Sequence[Path], suffixes: Sequence[str] = WATCH_SUFFIXES) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.roots = [Path(root) for root in roots]
+        self.suffixes = tuple(suffixes)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, Path] = {}
+        try:
+            for root in self.roots:
+                if root.is_dir():
+                    self._watch_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def poll(self, timeout: float) -> Set[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: Set[Path] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            changed.update(self._parse(data))
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _parse(self, data: bytes) -> Set[Path]:
+        changed: Set[Path] = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                # The kernel dropped events: report everything so nothing is missed.
+                changed.update(_iter_files(self.roots, self.suffixes))
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / name
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._watch_tree(path)
+                    changed.update(_iter_files([path], self.suffixes))
+                continue
+            if _is_watched(path, self.suffixes):
+                changed.add(path)
+        return changed
+
+    def _watch_tree(self, root: Path) -> None:
+        for directory, dirnames, _ in os.walk(root):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self._dirs[wd] = Path(directory)
+
+
+def open_backend(roots: Sequence[Path], suffixes: Sequence[str] = WATCH_SUFFIXES) -> "PollingBackend | InotifyBackend":
+    """Prefer inotify; fall back to mtime polling (non-Linux, watch limits, etc.)."""
+    try:
+        return InotifyBackend(roots, suffixes)
+    except (OSError, AttributeError):
+        return PollingBackend(roots, suffixes)
+
+
+class FileWatcher:
+    """Watch directory trees and report changed files in debounced batches.
+
+    A batch is delivered once no new change has arrived for `debounce`
+    seconds, or `max_delay` seconds after its first change, so a burst of
+    saves (or an editor's write-then-rename) becomes a single callback.
+    """
+
+    def __init__(
+        self,
+        roots: Iterable[Path],
+        callback: Callable[[List[Path]], None],
+        debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+        max_delay: float = MAX_COALESCE_SECONDS,
+        backend: "PollingBackend | InotifyBackend | None" = None,
+        poll_interval: float = POLL_INTERVAL_SECONDS,
+    ) -> None:
+        self.roots = [Path(root) for root in roots]
+        self.callback = callback
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.backend = backend or open_backend(self.roots)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="preview-file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+        self.backend.close()
+
+    def _run(self) -> None:
+        pending: Set[Path] = set()
+        first_seen = last_seen = 0.0
+        while not self._stop.is_set():
+            timeout = self.poll_interval
+            if pending:
+                now = time.monotonic()
+                timeout = max(0.0, min(last_seen + self.debounce, first_seen + self.max_delay) - now)
+            changed = self.backend.poll(min(timeout, self.poll_interval))
+            now = time.monotonic()
+            if changed:
+                if not pending:
+                    first_seen = now
+                pending.update(changed)
+                last_seen = now
+            if pending and (now - last_seen >= self.debounce or now - first_seen >= self.max_delay):
+                batch = sorted(pending)
+                pending.clear()
+                try:
+                    self.callback(batch)
+                except Exception as exc:  # keep watching after a failing refresh
+                    print(f"WARN: file watcher callback failed: {exc}")
+
+
+def _is_watched(path: Path, suffixes: Sequence[str]) -> bool:
+    return path.suffix in suffixes and not path.name.startswith(".")
+
+
+def _iter_files(roots: Iterable[Path], suffixes: Sequence[str]) -> Iterable[Path]:
+    for root in roots:
+        if not root.is_dir():
+            continue
+        for directory, dirnames, filenames in os.walk(root):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            for filename in filenames:
+                path = Path(directory) / filename
+                if _is_watched(path, suffixes):
+                    yield path
+
+
+__all__ = [
+    "FileWatcher",
+    "InotifyBackend",
+    "PollingBackend",
+    "open_backend",
+]
@@ -1,10 +1,28 @@
 """Renderer package exports."""
+from .atlas import build_atlas, pack_sprites, render_sprites
 from .inkscape import export_pdf as inkscape_export_pdf
 from .inkscape import export_png as inkscape_export_png
+from .pool import RenderBusy, RenderPool, RenderRequest
+from .raster import PNGError, RasterImage, blend_cost, decode_png, encode_png
 from .resvg import export_png as resvg_export_png
+from .session import RasterSession
+from .tiles import render_tiled
 
 __all__ = [
+    "PNGError",
+    "RasterImage",
+    "RasterSession",
+    "RenderBusy",
+    "RenderPool",
+    "RenderRequest",
+    "blend_cost",
+    "build_atlas",
+    "decode_png",
+    "encode_png",
     "inkscape_export_png",
     "inkscape_export_pdf",
+    "pack_sprites",
+    "render_sprites",
+    "render_tiled",
     "resvg_export_png",
 ]
@@ -0,0 +1,216 @@
+"""Texture atlases: skyline bin-packing of rendered sprites into PNG pages."""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .pool import Renderer, RenderPool, RenderRequest, default_renderer
+from .raster import RasterImage, decode_png
+
+DEFAULT_MAX_SIZE = 2048
+DEFAULT_PADDING = 2
+
+
+@dataclass(frozen=True)
+class AtlasPlacement:
+    name: str
+    page: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+    def to_json(self) -> Dict[str, int]:
+        return {"page": self.page, "x": self.x, "y": self.y, "width": self.width, "height": self.height}
+
+
+@dataclass
+class AtlasPage:
+    width: int
+    height: int
+    placements: List[AtlasPlacement] = field(default_factory=list)
+
+
+class SkylinePacker:
+    """Bottom-left skyline packing into one fixed-size bin.
+
+    The skyline is the list of `(x, y, width)` segments forming the top
+    edge of everything placed so far; each rect goes where its top edge
+    ends lowest, which keeps pages dense for UI-sized sprites.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self._skyline: List[Tuple[int, int, int]] = [(0, 0, width)]
+
+    def insert(self, width: int, height: int) -> Optional[Tuple[int, int]]:
+        """Reserve a `width` x `height` rect; returns its top-left or None when full."""
+        best: Optional[Tuple[int, int, int, int]] = None
+        for index, (x, _, _) in enumerate(self._skyline):
+            y = self._fit(index, width, height)
+            if y is None:
+                continue
+            candidate = (y + height, x, index, y)
+            if best is None or candidate < best:
+                best = candidate
+        if best is None:
+            return None
+        _, x, index, y = best
+        self._raise(index, x, y + height, width)
+        return x, y
+
+    def _fit(self, index: int, width: int, height: int) -> Optional[int]:
+        x = self._skyline[index][0]
+        if x + width > self.width:
+            return None
+        y = 0
+        remaining = width
+        while remaining > 0:
+            _, segment_y, segment_width = self._skyline[index]
+            y = max(y, segment_y)
+            if y + height > self.height:
+                return None
+            remaining -= segment_width
+            index += 1
+        return y
+
+    def _raise(self, index: int, x: int, top: int, width: int) -> None:
+        self._skyline.insert(index, (x, top, width))
+        right = x + width
+        following = index + 1
+        while following < len(self._skyline):
+            segment_x, segment_y, segment_width = self._skyline[following]
+            if segment_x >= right:
+                break
+            overlap = right - segment_x
+            if overlap < segment_width:
+                self._skyline[following] = (right, segment_y, segment_width - overlap)
+                break
+            del self._skyline[following]
+        merged: List[Tuple[int, int, int]] = []
+        for segment in self._skyline:
+            if merged and merged[-1][1] == segment[1]:
+                merged[-1] = (merged[-1][0], segment[1], merged[-1][2] + segment[2])
+            else:
+                merged.append(segment)
+        self._skyline = merged
+
+
+def pack_sprites(
+    sizes: Sequence[Tuple[str, int, int]],
+    max_size: int = DEFAULT_MAX_SIZE,
+    padding: int = DEFAULT_PADDING,
+    power_of_two: bool = False,
+) -> List[AtlasPage]:
+    """Assign `(name, width, height)` sprites to as few pages as the packer manages.
+
+    Sprites are kept `padding` pixels apart (not from the page edge), pages
+    are trimmed to what they use, and with `power_of_two` both page sides
+    are rounded up to a power of two no larger than `max_size`. Placement
+    depends only on the input, never on dict or render order.
+    """
+    if padding < 0:
+        raise ValueError("padding must be >= 0")
+    limit = _floor_power_of_two(max_size) if power_of_two else max_size
+    if limit < 1:
+        raise ValueError("max_size must be >= 1")
+    duplicates = sorted(name for name, count in Counter(name for name, _, _ in sizes).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Duplicate sprite names: {', '.join(duplicates)}")
+
+    packers: List[SkylinePacker] = []
+    pages: List[AtlasPage] = []
+    for name, width, height in sorted(sizes, key=lambda item: (-item[2], -item[1], item[0])):
+        if width > limit or height > limit:
+            raise ValueError(f"Sprite {name} ({width}x{height}) does not fit in a {limit}x{limit} page")
+        for page_index, packer in enumerate(packers):
+            position = packer.insert(width + padding, height + padding)
+            if position is not None:
+                break
+        else:
+            # The extra padding lets sprites touch the far page edges.
+            packers.append(SkylinePacker(limit + padding, limit + padding))
+            pages.append(AtlasPage(0, 0))
+            page_index = len(packers) - 1
+            position = packers[page_index].insert(width + padding, height + padding)
+            assert position is not None
+        page = pages[page_index]
+        page.placements.append(AtlasPlacement(name, page_index, position[0], position[1], width, height))
+        page.width = max(page.width, position[0] + width)
+        page.height = max(page.height, position[1] + height)
+    if power_of_two:
+        for page in pages:
+            page.width, page.height = _ceil_power_of_two(page.width), _ceil_power_of_two(page.height)
+    return pages
+
+
+def build_atlas(
+    sprites: Sequence[Tuple[str, RasterImage]],
+    max_size: int = DEFAULT_MAX_SIZE,
+    padding: int = DEFAULT_PADDING,
+    power_of_two: bool = False,
+) -> Tuple[List[RasterImage], Dict[str, Any]]:
+    """Pack images into atlas pages; returns the pages and a JSON sprite map."""
+    images = dict(sprites)
+    pages = pack_sprites(
+        [(name, image.width, image.height) for name, image in sprites], max_size, padding, power_of_two
+    )
+    rasters: List[RasterImage] = []
+    placements: Dict[str, Dict[str, int]] = {}
+    for page in pages:
+        raster = RasterImage(page.width, page.height)
+        for placement in page.placements:
+            raster.blit(images[placement.name], placement.x, placement.y)
+            placements[placement.name] = placement.to_json()
+        rasters.append(raster)
+    manifest = {
+        "pages": [{"width": page.width, "height": page.height} for page in pages],
+        "sprites": dict(sorted(placements.items())),
+    }
+    return rasters, manifest
+
+
+def render_sprites(
+    jobs: Sequence[Tuple[str, str, int, int]],
+    backend: str = "resvg",
+    workers: int = 2,
+    renderer_factory: Callable[[str], Renderer] = default_renderer,
+) -> List[Tuple[str, RasterImage]]:
+    """Rasterize `(name, svg, width, height)` jobs in parallel on persistent renderers.
+
+    Each PNG is decoded on the worker that rendered it.
+    """
+    pool = RenderPool(
+        workers=workers,
+        queue_size=max(1, len(jobs)),
+        per_client=max(1, len(jobs)),
+        renderer_factory=renderer_factory,
+    )
+    try:
+        futures = [
+            (name, pool.submit(RenderRequest(svg=svg, width=width, height=height, backend=backend), postprocess=decode_png))
+            for name, svg, width, height in jobs
+        ]
+        return [(name, future.result()) for name, future in futures]
+    finally:
+        pool.close()
+
+
+def _floor_power_of_two(value: int) -> int:
+    return 1 << (value.bit_length() - 1) if value >= 1 else 0
+
+
+def _ceil_power_of_two(value: int) -> int:
+    return 1 << max(value - 1, 0).bit_length()
+
+
+__all__ = [
+    "AtlasPage",
+    "AtlasPlacement",
+    "SkylinePacker",
+    "build_atlas",
+    "pack_sprites",
+    "render_sprites",
+]
@@ -1,8 +1,11 @@
 """Inkscape CLI renderer for SVG → PNG/PDF."""
 from __future__ import annotations
 
+import os
+import select
 import shutil
 import subprocess
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -51,6 +54,104 @@ def export_pdf(svg_path: Path, pdf_path: Path) -> None:
     _run_inkscape(args)
 
 
+class InkscapeShell:
+    """A long-lived `inkscape --shell` process reused across PNG exports.
+
+    Starting Inkscape dominates the cost of a single export, so render
+    workers keep one shell each and feed it actions line by line. The
+    process is restarted transparently if it exits or times out.
+    """
+
+    PROMPT = b"> "
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT_SECONDS) -> None:
+        self.timeout = timeout
+        self._process: Optional[subprocess.Popen[bytes]] = None
+
+    def export_png(
+        self,
+        svg_path: Path,
+        png_path: Path,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+    ) -> None:
+        if not width or not height:
+            # Export size is sticky inside a shell session; only reuse the
+            # shell when the caller pins both dimensions.
+            export_png(svg_path, png_path, width=width, height=height)
+            return
+        png_path = Path(png_path)
+        png_path.parent.mkdir(parents=True, exist_ok=True)
+        actions = [
+            f"file-open:{Path(svg_path)}",
+            "export-type:png",
+            f"export-filename:{png_path}",
+            "export-area-page",
+            f"export-width:{int(width)}",
+            f"export-height:{int(height)}",
+            "export-do",
+            "file-close",
+        ]
+        process = self._ensure_process()
+        assert process.stdin is not None
+        try:
+            process.stdin.write((";".join(actions) + "\n").encode("utf-8"))
+            process.stdin.flush()
+        except BrokenPipeError as exc:
+            self.close()
+            raise RuntimeError("Inkscape shell exited unexpectedly.") from exc
+        self._read_prompt()
+        if not png_path.exists():
+            raise RuntimeError(f"Inkscape did not write {png_path}.")
+
+    def close(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.poll() is None:
+            try:
+                assert process.stdin is not None
+                process.stdin.write(b"quit\n")
+                process.stdin.flush()
+                process.wait(timeout=5)
+            except (BrokenPipeError, OSError, subprocess.TimeoutExpired):
+                process.kill()
+                process.wait()
+
+    def _ensure_process(self) -> "subprocess.Popen[bytes]":
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                [_inkscape_binary(), "--shell"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            self._read_prompt()
+        return self._process
+
+    def _read_prompt(self) -> None:
+        process = self._process
+        assert process is not None and process.stdout is not None
+        fd = process.stdout.fileno()
+        deadline = time.monotonic() + self.timeout
+        buffer = b""
+        while not buffer.endswith(self.PROMPT):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.close()
+                raise RuntimeError(
+                    "Inkscape timed out. Launch the GUI once to finish initial setup and retry."
+                )
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                self.close()
+                raise RuntimeError("Inkscape shell exited unexpectedly.")
+            buffer = (buffer + chunk)[-64:]
+
+
 def _inkscape_binary() -> str:
     binary = shutil.which("inkscape")
     if not binary:
@@ -69,4 +170,4 @@ def _run_inkscape(args: list[str]) -> None:
         raise RuntimeError(f"Inkscape failed with exit code {exc.returncode}.") from exc
 
 
-__all__ = ["export_png", "export_pdf"]
+__all__ = ["InkscapeShell", "export_png", "export_pdf"]
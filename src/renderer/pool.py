@@ -0,0 +1,234 @@
+"""Bounded pool of persistent renderer workers for SVG → PNG."""
+from __future__ import annotations
+
+import math
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Protocol
+
+from .inkscape import InkscapeShell
+from .resvg import export_png as resvg_export_png
+
+BACKENDS = ("inkscape", "resvg")
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_PER_CLIENT = 4
+# Half the default queue, so no one address can fill it whatever clients it claims to be.
+DEFAULT_PER_HOST = 8
+INITIAL_JOB_SECONDS = 1.0
+
+
+class Renderer(Protocol):
+    def export_png(self, svg_path: Path, png_path: Path, width: Optional[int] = None, height: Optional[int] = None) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class _OneShotResvg:
+    """resvg has no resident mode; each job is a short-lived process."""
+
+    def export_png(self, svg_path: Path, png_path: Path, width: Optional[int] = None, height: Optional[int] = None) -> None:
+        resvg_export_png(svg_path, png_path, width=width, height=height)
+
+    def close(self) -> None:
+        return None
+
+
+def default_renderer(backend: str) -> Renderer:
+    if backend == "inkscape":
+        return InkscapeShell()
+    if backend == "resvg":
+        return _OneShotResvg()
+    raise ValueError(f"Unsupported backend: {backend}")
+
+
+class RenderBusy(Exception):
+    """Raised when a job cannot be queued; carries the HTTP status and a retry hint."""
+
+    def __init__(self, message: str, status: int, retry_after: int) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class RenderRequest:
+    svg: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    backend: str = "inkscape"
+
+
+@dataclass
+class _Job:
+    request: RenderRequest
+    client: str
+    host: Optional[str]
+    future: "Future[Any]"
+    postprocess: Optional[Callable[[bytes], Any]] = None
+
+
+class RenderPool:
+    """Fixed worker threads, each holding its own renderer per backend.
+
+    The queue is bounded globally (`queue_size`, answered with 503) and per
+    client (`per_client` queued or running jobs, answered with 429), so a
+    single bulk exporter cannot crowd out everyone else. Clients that name
+    themselves (browser tabs sharing an address, say) also count towards
+    their `host`, capped at `per_host`, so inventing client names does not
+    buy more of the queue.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        per_client: int = DEFAULT_PER_CLIENT,
+        per_host: int = DEFAULT_PER_HOST,
+        renderer_factory: Callable[[str], Renderer] = default_renderer,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.per_client = per_client
+        self.per_host = per_host
+        self.renderer_factory = renderer_factory
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._per_client: Dict[str, int] = {}
+        self._per_host: Dict[str, int] = {}
+        self._job_seconds = INITIAL_JOB_SECONDS
+        self._threads = [
+            threading.Thread(target=self._work, name=f"render-worker-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self,
+        request: RenderRequest,
+        client: str = "",
+        postprocess: Optional[Callable[[bytes], Any]] = None,
+        host: Optional[str] = None,
+    ) -> "Future[Any]":
+        """Queue a job and return a Future for the PNG bytes; raises RenderBusy.
+
+        With `postprocess` (decoding the PNG, say), the worker applies it to
+        the bytes and the Future holds its result instead, so that work runs
+        on the worker threads rather than wherever the results are gathered.
+        """
+        if request.backend not in BACKENDS:
+            raise ValueError(f"Unsupported backend: {request.backend}")
+        with self._lock:
+            if self._per_client.get(client, 0) >= self.per_client:
+                raise RenderBusy("Too many render jobs for this client", 429, self.retry_after())
+            if host is not None and self._per_host.get(host, 0) >= self.per_host:
+                raise RenderBusy("Too many render jobs from this address", 429, self.retry_after())
+            job = _Job(request=request, client=client, host=host, future=Future(), postprocess=postprocess)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise RenderBusy("Render queue is full", 503, self.retry_after()) from None
+            self._per_client[client] = self._per_client.get(client, 0) + 1
+            if host is not None:
+                self._per_host[host] = self._per_host.get(host, 0) + 1
+        job.future.add_done_callback(lambda _: self._release(client, host))
+        return job.future
+
+    def render(
+        self,
+        request: RenderRequest,
+        client: str = "",
+        timeout: Optional[float] = None,
+        host: Optional[str] = None,
+    ) -> bytes:
+        return self.submit(request, client, host=host).result(timeout=timeout)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        backlog = self._queue.qsize() + self.workers
+        return max(1, math.ceil(self._job_seconds * backlog / self.workers))
+
+    def close(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def _release(self, client: str, host: Optional[str]) -> None:
+        with self._lock:
+            _decrement(self._per_client, client)
+            if host is not None:
+                _decrement(self._per_host, host)
+
+    def _work(self) -> None:
+        renderers: Dict[str, Renderer] = {}
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    return
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                started = time.monotonic()
+                try:
+                    renderer = renderers.get(job.request.backend)
+                    if renderer is None:
+                        renderer = self.renderer_factory(job.request.backend)
+                        renderers[job.request.backend] = renderer
+                    png = _render_with(renderer, job.request)
+                except Exception as exc:
+                    # A failed persistent renderer may be wedged; start fresh next time.
+                    stale = renderers.pop(job.request.backend, None)
+                    if stale is not None:
+                        stale.close()
+                    if isinstance(exc, subprocess.CalledProcessError):
+                        exc = RuntimeError(f"{job.request.backend} failed with exit code {exc.returncode}.")
+                    job.future.set_exception(exc)
+                else:
+                    try:
+                        result = png if job.postprocess is None else job.postprocess(png)
+                    except Exception as exc:
+                        job.future.set_exception(exc)
+                    else:
+                        job.future.set_result(result)
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    self._job_seconds = self._job_seconds * 0.8 + elapsed * 0.2
+        finally:
+            for renderer in renderers.values():
+                renderer.close()
+
+
+def _decrement(counts: Dict[str, int], key: str) -> None:
+    remaining = counts.get(key, 0) - 1
+    if remaining > 0:
+        counts[key] = remaining
+    else:
+        counts.pop(key, None)
+
+
+def _render_with(renderer: Renderer, request: RenderRequest) -> bytes:
+    with tempfile.TemporaryDirectory(prefix="render-") as tmp:
+        svg_path = Path(tmp) / "input.svg"
+        png_path = Path(tmp) / "output.png"
+        svg_path.write_text(request.svg, encoding="utf-8")
+        renderer.export_png(svg_path, png_path, width=request.width, height=request.height)
+        return png_path.read_bytes()
+
+
+__all__ = [
+    "BACKENDS",
+    "RenderBusy",
+    "RenderPool",
+    "RenderRequest",
+    "Renderer",
+    "default_renderer",
+]
@@ -0,0 +1,324 @@
+"""RGBA raster images with a small stdlib PNG reader/writer.
+
+NumPy is optional: when it is installed, PNG unfiltering and alpha
+compositing run vectorized; otherwise the pure-Python paths below are
+used and give byte-identical results.
+"""
+from __future__ import annotations
+
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, List
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised by forcing `np = None` in tests
+    np = None
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# PNG color type -> channels, for 8-bit non-palette images.
+_CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+# Rows unfiltered together when Average/Paeth rows force a diagonal sweep;
+# the sweep holds about rows x (rows + width) pixels at once.
+_SWEEP_ROWS = 1024
+_SWEEP_PIXELS = 1 << 20
+# Cost of blending one pixel in `RasterImage.composite`, relative to the
+# rasterizer filling one (see `blend_cost`), with and without NumPy.
+_BLEND_COST_VECTORIZED = 20.0
+_BLEND_COST_PURE = 1000.0
+
+
+class PNGError(ValueError):
+    """Raised for PNG data this reader does not support or cannot parse."""
+
+
+@dataclass
+class RasterImage:
+    """Straight (non-premultiplied) 8-bit RGBA pixels, row-major."""
+
+    width: int
+    height: int
+    pixels: bytearray = field(default_factory=bytearray)
+
+    def __post_init__(self) -> None:
+        if self.width < 0 or self.height < 0:
+            raise ValueError("Image size must be >= 0")
+        if not self.pixels:
+            self.pixels = bytearray(self.width * self.height * 4)
+        elif len(self.pixels) != self.width * self.height * 4:
+            raise ValueError("Pixel buffer does not match the image size")
+
+    @property
+    def stride(self) -> int:
+        return self.width * 4
+
+    def pixel(self, x: int, y: int) -> tuple[int, int, int, int]:
+        offset = (y * self.width + x) * 4
+        return tuple(self.pixels[offset:offset + 4])  # type: ignore[return-value]
+
+    def blit(self, source: "RasterImage", x: int, y: int) -> None:
+        """Copy `source` over this image with its top-left at (x, y); parts outside are dropped."""
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + source.width, self.width), min(y + source.height, self.height)
+        if right <= left or bottom <= top:
+            return
+        span = (right - left) * 4
+        source_left = (left - x) * 4
+        for row in range(top, bottom):
+            source_offset = (row - y) * source.stride + source_left
+            target_offset = row * self.stride + left * 4
+            self.pixels[target_offset:target_offset + span] = source.pixels[source_offset:source_offset + span]
+
+    def composite(self, source: "RasterImage", x: int, y: int) -> None:
+        """Alpha-blend `source` over this image ("source over") with its top-left at (x, y)."""
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + source.width, self.width), min(y + source.height, self.height)
+        if right <= left or bottom <= top:
+            return
+        if np is not None:
+            _blend_into(source.array()[top - y:bottom - y, left - x:right - x], self.array()[top:bottom, left:right])
+            return
+        span = (right - left) * 4
+        source_left = (left - x) * 4
+        for row in range(top, bottom):
+            source_offset = (row - y) * source.stride + source_left
+            target_offset = row * self.stride + left * 4
+            src = source.pixels[source_offset:source_offset + span]
+            dst = self.pixels[target_offset:target_offset + span]
+            source_alpha = src[3::4]
+            if not any(source_alpha):
+                continue
+            # Whole-row fast paths: opaque source, or nothing underneath yet.
+            if min(source_alpha) == 255 or not any(dst[3::4]):
+                self.pixels[target_offset:target_offset + span] = src
+                continue
+            for offset in range(0, span, 4):
+                alpha = src[offset + 3]
+                if alpha == 0:
+                    continue
+                below = dst[offset + 3]
+                if alpha == 255 or below == 0:
+                    dst[offset:offset + 4] = src[offset:offset + 4]
+                    continue
+                # Straight alpha, everything scaled by 255 * 255 to stay in integers.
+                kept = below * (255 - alpha)
+                total = alpha * 255 + kept
+                for channel in range(3):
+                    dst[offset + channel] = (src[offset + channel] * alpha * 255 + dst[offset + channel] * kept + total // 2) // total
+                dst[offset + 3] = (total + 127) // 255
+            self.pixels[target_offset:target_offset + span] = dst
+
+    def array(self) -> Any:
+        """The pixels as a writable `(height, width, 4)` uint8 NumPy view (requires NumPy)."""
+        return np.frombuffer(self.pixels, np.uint8).reshape(self.height, self.width, 4)
+
+    def crop(self, x: int, y: int, width: int, height: int) -> "RasterImage":
+        cropped = RasterImage(width, height)
+        cropped.blit(self, -x, -y)
+        return cropped
+
+
+def decode_png(data: bytes) -> RasterImage:
+    """Decode an 8-bit, non-interlaced grayscale/RGB(A) PNG (what resvg and Inkscape write)."""
+    if not data.startswith(PNG_SIGNATURE):
+        raise PNGError("Not a PNG file")
+    offset = len(PNG_SIGNATURE)
+    header = None
+    chunks: List[bytes] = []
+    while offset + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[offset:offset + 8])
+        body = data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            chunks.append(body)
+        elif kind == b"IEND":
+            break
+    if header is None:
+        raise PNGError("PNG has no IHDR chunk")
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if bit_depth != 8 or color_type not in _CHANNELS or interlace:
+        raise PNGError(f"Unsupported PNG format (bit depth {bit_depth}, color type {color_type}, interlace {interlace})")
+    channels = _CHANNELS[color_type]
+    try:
+        raw = zlib.decompress(b"".join(chunks))
+    except zlib.error as exc:
+        raise PNGError(f"Corrupt PNG data: {exc}") from None
+    unfilter = _unfilter if np is None else _unfilter_vectorized
+    rows = unfilter(raw, width * channels, height, channels)
+    return RasterImage(width, height, _to_rgba(rows, channels))
+
+
+def encode_png(image: RasterImage, level: int = 6) -> bytes:
+    """Encode as 8-bit RGBA PNG; the output depends only on the pixels."""
+    stride = image.stride
+    raw = bytearray()
+    for row in range(image.height):
+        raw.append(0)
+        raw += image.pixels[row * stride:(row + 1) * stride]
+    header = struct.pack(">IIBBBBB", image.width, image.height, 8, 6, 0, 0, 0)
+    return PNG_SIGNATURE + _chunk(b"IHDR", header) + _chunk(b"IDAT", zlib.compress(bytes(raw), level)) + _chunk(b"IEND", b"")
+
+
+def blend_cost() -> float:
+    """Cost of compositing one pixel, in the thousands of pixel operations of `analyze_svg`'s `raster_cost`."""
+    return (_BLEND_COST_PURE if np is None else _BLEND_COST_VECTORIZED) / 1000
+
+
+def _chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+
+
+def _unfilter(raw: bytes, stride: int, height: int, bpp: int) -> bytearray:
+    if len(raw) < (stride + 1) * height:
+        raise PNGError("PNG image data is truncated")
+    out = bytearray(stride * height)
+    previous = bytearray(stride)
+    for row in range(height):
+        start = row * (stride + 1)
+        kind = raw[start]
+        line = bytearray(raw[start + 1:start + 1 + stride])
+        if kind == 1:
+            for i in range(bpp, stride):
+                line[i] = (line[i] + line[i - bpp]) & 0xFF
+        elif kind == 2:
+            line = bytearray((a + b) & 0xFF for a, b in zip(line, previous))
+        elif kind == 3:
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                up = previous[i]
+                upper_left = previous[i - bpp] if i >= bpp else 0
+                estimate = left + up - upper_left
+                pa, pb, pc = abs(estimate - left), abs(estimate - up), abs(estimate - upper_left)
+                predictor = left if pa <= pb and pa <= pc else (up if pb <= pc else upper_left)
+                line[i] = (line[i] + predictor) & 0xFF
+        elif kind != 0:
+            raise PNGError(f"Unknown PNG filter type {kind}")
+        out[row * stride:(row + 1) * stride] = line
+        previous = line
+    return out
+
+
+def _unfilter_vectorized(raw: bytes, stride: int, height: int, bpp: int) -> bytearray:
+    if len(raw) < (stride + 1) * height:
+        raise PNGError("PNG image data is truncated")
+    rows = np.frombuffer(raw, np.uint8, count=(stride + 1) * height).reshape(height, stride + 1)
+    kinds, filtered = rows[:, 0], rows[:, 1:]
+    if height and kinds.max() > 4:
+        raise PNGError(f"Unknown PNG filter type {kinds.max()}")
+    out = np.empty((height, stride), np.uint8)
+    if not (kinds >= 3).any():
+        # None, Sub and Up only depend on the row itself and the one above: one step per row.
+        previous = np.zeros(stride, np.uint8)
+        for row in range(height):
+            line = filtered[row]
+            if kinds[row] == 1:
+                line = line.reshape(-1, bpp).cumsum(axis=0, dtype=np.uint8).reshape(-1)
+            elif kinds[row] == 2:
+                line = line + previous
+            out[row] = line
+            previous = out[row]
+        return bytearray(out)
+    width = stride // bpp
+    band = max(1, min(_SWEEP_ROWS, _SWEEP_PIXELS // max(width, 1)))
+    previous = np.zeros((width, bpp), np.uint8)
+    for top in range(0, height, band):
+        rows_here = min(band, height - top)
+        shape = (rows_here, width, bpp)
+        _unfilter_sweep(filtered[top:top + rows_here].reshape(shape), kinds[top:top + rows_here], previous, out[top:top + rows_here].reshape(shape))
+        previous = out[top + rows_here - 1].reshape(width, bpp)
+    return bytearray(out)
+
+
+def _unfilter_sweep(filtered: Any, kinds: Any, previous: Any, out: Any) -> None:
+    """Unfilter rows whose Average/Paeth predictors chain along the row.
+
+    A pixel depends on its left, upper and upper-left neighbours, so every
+    anti-diagonal (row + x constant) only needs the two before it. The rows
+    are skewed so that diagonal `d` is the contiguous slice `skewed[d + 2]`
+    (pixel (r, x) sits at `skewed[r + x + 2, r + 1]`, with zero padding for
+    the row above and the column left of the image) and each step decodes a
+    whole diagonal at once.
+    """
+    rows, width, bpp = filtered.shape
+    skewed = np.zeros((rows + width + 1, rows + 1, bpp), np.int16)
+    source = np.zeros((rows + width + 1, rows, bpp), np.uint8)
+    skewed[1:width + 1, 0] = previous
+    for row in range(rows):
+        source[row + 2:row + 2 + width, row] = filtered[row]
+    present = {int(kind) for kind in np.unique(kinds)}
+    masks = {kind: (kinds == kind)[:, None] for kind in present}
+    for diagonal in range(rows + width - 1):
+        low, high = max(0, diagonal - width + 1), min(rows, diagonal + 1)
+        column = diagonal + 2
+        left = skewed[column - 1, low + 1:high + 1]
+        up = skewed[column - 1, low:high]
+        upper_left = skewed[column - 2, low:high]
+        target = skewed[column, low + 1:high + 1]
+        np.copyto(target, source[column, low:high])
+        if 4 in present:
+            pa, pb = np.abs(up - upper_left), np.abs(left - upper_left)
+            pc = np.abs(left + up - 2 * upper_left)
+            paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upper_left))
+            target += paeth if len(present) == 1 else np.where(masks[4][low:high], paeth, 0)
+        if 3 in present:
+            target += np.where(masks[3][low:high], (left + up) >> 1, 0)
+        if 2 in present:
+            target += np.where(masks[2][low:high], up, 0)
+        if 1 in present:
+            target += np.where(masks[1][low:high], left, 0)
+        target &= 0xFF
+    for row in range(rows):
+        out[row] = skewed[row + 2:row + 2 + width, row + 1]
+
+
+def _blend_into(source: Any, target: Any) -> None:
+    """`source` over `target` in place, for straight-alpha uint8 arrays; rounds like `RasterImage.composite`."""
+    alpha, below = source[..., 3], target[..., 3]
+    painted = alpha > 0
+    # Opaque source pixels and pixels with nothing underneath are copied, as are
+    # whole rows with nothing underneath (the pure-Python row fast path).
+    copied = painted & ((alpha == 255) | (below == 0))
+    copied |= (~below.any(axis=1) & painted.any(axis=1))[:, None]
+    mixed = painted & ~copied
+    target[copied] = source[copied]
+    count = int(np.count_nonzero(mixed))
+    if count * 4 > mixed.size:
+        # Mostly translucent: blend the whole region and keep the mixed pixels.
+        np.copyto(target, _over(source, target), where=mixed[..., None])
+    elif count:
+        target[mixed] = _over(source[mixed], target[mixed])
+
+
+def _over(source: Any, target: Any) -> Any:
+    src, dst = source.astype(np.uint32), target.astype(np.uint32)
+    alpha = src[..., 3:]
+    kept = dst[..., 3:] * (255 - alpha)
+    total = np.maximum(alpha * 255 + kept, 1)
+    color = (src[..., :3] * (alpha * 255) + dst[..., :3] * kept + total // 2) // total
+    return np.concatenate((color, (total + 127) // 255), axis=-1).astype(np.uint8)
+
+
+def _to_rgba(data: bytearray, channels: int) -> bytearray:
+    if channels == 4:
+        return data
+    rgba = bytearray(len(data) // channels * 4)
+    if channels == 3:
+        rgba[0::4], rgba[1::4], rgba[2::4] = data[0::3], data[1::3], data[2::3]
+        rgba[3::4] = b"\xff" * (len(data) // 3)
+    elif channels == 2:
+        gray, alpha = data[0::2], data[1::2]
+        rgba[0::4], rgba[1::4], rgba[2::4], rgba[3::4] = gray, gray, gray, alpha
+    else:
+        rgba[0::4], rgba[1::4], rgba[2::4] = data, data, data
+        rgba[3::4] = b"\xff" * len(data)
+    return rgba
+
+
+__all__ = ["PNGError", "RasterImage", "decode_png", "encode_png"]
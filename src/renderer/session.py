@@ -0,0 +1,112 @@
+"""Raster sessions: re-render only the region a new SVG changed and patch the last image."""
+from __future__ import annotations
+
+import math
+from typing import Callable, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+from src.compiler.diff import diff_svg
+from src.compiler.geometry import BBoxIndex, intersects
+
+from .pool import Renderer, RenderPool, RenderRequest, default_renderer
+from .raster import RasterImage, decode_png
+from .tiles import parse_svg, region_svg, view_mapping
+
+# Pixels added around a dirty region for antialiasing that spills past its bbox.
+EDGE_PAD = 1
+
+Region = Tuple[int, int, int, int]
+
+
+class RasterSession:
+    """The last rendered image of a document and the SVG it came from.
+
+    Each `update` diffs the new SVG against the previous one by the ids the
+    compiler emits, re-renders only the union of the changed elements'
+    before/after bounding boxes (for changed defs, those of the elements
+    using them) through a narrowed `viewBox`, and blits that region into
+    the cached image, so a state update costs about as much as
+    the area it touches. Renders go through a persistent `RenderPool`; pass
+    one in to share it (the preview server's, say).
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        backend: str = "resvg",
+        pool: Optional[RenderPool] = None,
+        renderer_factory: Callable[[str], Renderer] = default_renderer,
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.backend = backend
+        self.image: Optional[RasterImage] = None
+        self._svg: Optional[str] = None
+        self._owns_pool = pool is None
+        self._pool = pool or RenderPool(workers=1, queue_size=1, per_client=1, renderer_factory=renderer_factory)
+
+    def update(self, svg: str) -> Optional[Region]:
+        """Bring `image` in line with `svg`; returns the re-rendered `(x, y, width, height)`, or None."""
+        root = parse_svg(svg)
+        mapping = view_mapping(root, self.width, self.height)
+        region: Optional[Region] = (0, 0, self.width, self.height)
+        if self.image is not None and self._svg is not None:
+            diff = diff_svg(self._svg, svg)
+            entries = diff["added"] + diff["removed"] + diff["changed"]
+            if diff["identical"]:
+                region = None
+            elif not diff["root"] and all(entry["bbox"] is not None for entry in entries):
+                region = self._dirty_region(diff["bounds"], mapping)
+            # Otherwise something changed that has no box to narrow to (the root,
+            # a def nothing paints with, a hidden element): repaint everything.
+        self._svg = svg
+        if region is None:
+            return None
+
+        left, top, width, height = region
+        bleed = self._bleed(root, mapping, region)
+        # Render a margin around the region so blurs crossing its edge see their whole source.
+        box_left, box_top = max(left - bleed, 0), max(top - bleed, 0)
+        box_right, box_bottom = min(left + width + bleed, self.width), min(top + height + bleed, self.height)
+        box = (box_left, box_top, box_right - box_left, box_bottom - box_top)
+        request = RenderRequest(region_svg(root, mapping, box), box[2], box[3], self.backend)
+        rendered = decode_png(self._pool.render(request))
+        patch = rendered.crop(left - box_left, top - box_top, width, height)
+        if self.image is None:
+            self.image = patch
+        else:
+            self.image.blit(patch, left, top)
+        return region
+
+    def close(self) -> None:
+        if self._owns_pool:
+            self._pool.close()
+
+    def _bleed(self, root: ET.Element, mapping: Tuple[float, float, float], region: Region) -> int:
+        """Pixels of blur that can reach into `region` from the filtered elements around it."""
+        scale, origin_x, origin_y = mapping
+        left, top, width, height = region
+        area = (origin_x + left / scale, origin_y + top / scale, width / scale, height / scale)
+        index = BBoxIndex(root)
+        spread = 0.0
+        for element in root.iter():
+            box = index.bbox(element)
+            if box is not None and intersects(box, area):
+                # Measured through the element's transform, like its inflated box.
+                spread = max(spread, index.spread(element))
+        return math.ceil(spread * scale) + 1 if spread else 0
+
+    def _dirty_region(self, bounds: list, mapping: Tuple[float, float, float]) -> Optional[Region]:
+        scale, origin_x, origin_y = mapping
+        x, y, width, height = bounds
+        left = max(math.floor((x - origin_x) * scale) - EDGE_PAD, 0)
+        top = max(math.floor((y - origin_y) * scale) - EDGE_PAD, 0)
+        right = min(math.ceil((x + width - origin_x) * scale) + EDGE_PAD, self.width)
+        bottom = min(math.ceil((y + height - origin_y) * scale) + EDGE_PAD, self.height)
+        if right <= left or bottom <= top:
+            return None
+        return (left, top, right - left, bottom - top)
+
+
+__all__ = ["RasterSession"]
@@ -0,0 +1,55 @@
+import json
+from pathlib import Path
+
+from src.cli import main
+from src.compiler import analyze_asset, analyze_svg
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+def test_analyze_counts_filters_clips_and_gradients():
+    report = analyze_asset(load_example("custom_fx_glow.json"))
+    assert report["elements"] == sum(report["by_tag"].values())
+    assert report["filters"] == {"uses": 1, "region_area": 534 * 254, "count": 1}
+    assert report["clip_paths"] == {"uses": 1, "count": 1}
+    assert report["gradients"] == {"uses": 1, "count": 1}
+    assert report["text_spans"] == 1
+    assert report["estimate"]["elements"] >= report["elements"]
+
+    [component] = report["components"]
+    assert component["id"] == "fx-card" and component["instances"] == 1
+    assert component["raster_cost"] == report["raster_cost"]
+
+
+def test_filter_region_follows_the_referencing_transform():
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+        '<defs><filter id="f" filterUnits="userSpaceOnUse" x="0" y="0" width="10" height="10">'
+        '<feGaussianBlur stdDeviation="2" /></filter></defs>'
+        '<g id="a" transform="scale(2 3)"><rect width="10" height="10" filter="url(#f)" /></g>'
+        '<g id="b" display="none"><rect width="10" height="10" filter="url(#f)" /></g>'
+        "</svg>"
+    )
+    report = analyze_svg(svg, {"a": "card", "b": "card"})
+    assert report["filters"]["uses"] == 1
+    assert report["filters"]["region_area"] == 600
+    assert report["painted_area"] == 600
+    assert report["components"][0]["instances"] == 2
+
+
+def test_analyze_cli_ranks_assets_and_enforces_budgets(tmp_path, capsys):
+    out = tmp_path / "report.json"
+    paths = [str(EXAMPLES_DIR / "button_sf.json"), str(EXAMPLES_DIR / "custom_fx_glow.json")]
+    assert main(["analyze", "--in", *paths, "--out", str(out)]) == 0
+    capsys.readouterr()
+    assets = json.loads(out.read_text(encoding="utf-8"))["assets"]
+    costs = [entry["raster_cost"] for entry in assets]
+    assert costs == sorted(costs, reverse=True)
+
+    assert main(["analyze", "--in", *paths, "--max-cost", str(min(costs))]) == 1
+    report = json.loads(capsys.readouterr().out)
+    assert "over_budget" in report["assets"][0]
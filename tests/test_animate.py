@@ -0,0 +1,147 @@
+import json
+import math
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+import pytest
+
+import src.cli as cli
+import src.compiler.animate as animate_module
+from src.compiler import animate_svg, compile_svg, with_state_var
+from src.compiler.geometry import local_name
+from src.compiler.optimize import paint_list
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+def parse(svg: str) -> ET.Element:
+    root = ET.fromstring(svg)
+    for element in root.iter():
+        element.tag = local_name(element.tag)
+    return root
+
+
+def at_keyframe(svg: str, index: int, count: int) -> ET.Element:
+    """The static document an SMIL player shows at keyframe `index` of `count`."""
+    root = parse(svg)
+    for parent in list(root.iter()):
+        for animation in [child for child in parent if child.tag == "animate"]:
+            times = [float(time) for time in animation.get("keyTimes").split(";")]
+            value = animation.get("values").split(";")[times.index(round(index / (count - 1), 4))]
+            name = animation.get("attributeName")
+            if name == "display" and value == "inline":
+                parent.attrib.pop("display", None)
+            else:
+                parent.set(name, value)
+            parent.remove(animation)
+    return root
+
+
+def test_every_keyframe_paints_like_a_full_compile():
+    asset = load_example("hud_basic.mock.json")
+    base = asset["mockState"]
+    sweeps = {
+        "player.hpRatio": [0, 0.25, 1],
+        "skill.cooldown": [1, 0.5, 0],
+        "badge.count": [0, 7, 120],
+        "settings.auto": [True, False],
+    }
+    for var, values in sweeps.items():
+        states = [with_state_var(base, var, value) for value in values]
+        svg = animate_svg(asset, states)
+        for index, state in enumerate(states):
+            expected = parse(compile_svg(dict(asset, mockState=state)))
+            assert paint_list(at_keyframe(svg, index, len(states))) == paint_list(expected), (var, index)
+        # Without SMIL support the document shows the first keyframe.
+        static = parse(svg)
+        for parent in list(static.iter()):
+            for animation in [child for child in parent if child.tag == "animate"]:
+                parent.remove(animation)
+        assert paint_list(static) == paint_list(parse(compile_svg(dict(asset, mockState=states[0]))))
+
+
+def test_bound_radial_gauges_animate_dash_and_arc():
+    for name, attribute in (("cooldown_wheel.json", "stroke-dasharray"), ("radial_gauge.json", "d")):
+        asset = load_example(name)
+        layers = asset["components"][0]["layers"] if "components" in asset else asset["layers"]
+        gauge = next(layer for layer in layers if layer["shape"] == "gauge")
+        gauge["bind"] = {"value": {"var": "ratio"}}
+        states = [{"ratio": value} for value in (0.1, 0.5, 0.9)]
+        svg = animate_svg(asset, states)
+        for index, state in enumerate(states):
+            expected = parse(compile_svg(dict(asset, mockState=state)))
+            assert paint_list(at_keyframe(svg, index, len(states))) == paint_list(expected), (name, index)
+        [animation] = [element for element in parse(svg).iter("animate") if element.get("attributeName") == attribute]
+        assert animation.get("calcMode") is None
+
+
+def test_gauge_arc_sweeps_along_its_ring():
+    asset = load_example("radial_gauge.json")
+    layers = asset["components"][0]["layers"] if "components" in asset else asset["layers"]
+    gauge = next(layer for layer in layers if layer["shape"] == "gauge")
+    gauge["bind"] = {"value": {"var": "ratio"}}
+    svg = animate_svg(asset, [{"ratio": value} for value in (0.1, 0.5, 0.9)])
+    [animation] = [element for element in parse(svg).iter("animate") if element.get("attributeName") == "d"]
+    times = [float(time) for time in animation.get("keyTimes").split(";")]
+    assert times == sorted(times) and len(set(times)) == len(times) and {0.0, 0.5, 1.0} <= set(times)
+
+    # 300-degree track from 12 o'clock: 30 -> 150 -> 270 degrees, at most 10 degrees per sample.
+    center, radius = (110.0, 110.0), 101.0
+    previous = None
+    for value in animation.get("values").split(";"):
+        numbers = value.split()
+        large, end = numbers[7], (float(numbers[9]), float(numbers[10]))
+        assert abs(math.hypot(end[0] - center[0], end[1] - center[1]) - radius) < 0.02
+        swept = math.degrees(math.atan2(end[0] - center[0], center[1] - end[1])) % 360
+        # The large-arc flag only turns on once the sweep passes 180 degrees.
+        assert large == ("1" if swept > 180.01 else "0"), value
+        if previous is not None:
+            assert 0 < swept - previous <= 10.01
+        previous = swept
+
+
+def test_arcs_whose_flags_change_switch_instead_of_interpolating():
+    small = "M 10.00 0.00 A 10.00 10.00 0 0 1 0.00 10.00"
+    large = "M 10.00 0.00 A 10.00 10.00 0 1 1 0.00 -10.00"
+    assert not animate_module._interpolates("d", [small, large])
+    assert animate_module._interpolates("d", [small, "M 10.00 0.00 A 10.00 10.00 0 0 1 7.07 7.07"])
+
+
+def test_geometry_interpolates_and_text_switches():
+    asset = load_example("hud_basic.mock.json")
+    base = asset["mockState"]
+    svg = animate_svg(asset, [with_state_var(base, "player.hpRatio", value) for value in (0.2, 0.6)], duration=2)
+    width = next(element for element in parse(svg).iter("animate") if element.get("attributeName") == "width")
+    assert width.get("values") == "64.00;192.00"
+    assert (width.get("dur"), width.get("keyTimes"), width.get("repeatCount")) == ("2s", "0;1", "indefinite")
+    assert width.get("calcMode") is None
+
+    svg = animate_svg(asset, [with_state_var(base, "badge.count", value) for value in (3, 4)], repeat=False)
+    switches = [element for element in parse(svg).iter("animate") if element.get("calcMode") == "discrete"]
+    assert [element.get("values") for element in switches] == ["inline;none", "none;inline"]
+    assert all(element.get("fill") == "freeze" for element in switches)
+    ids = [element.get("id") for element in parse(svg).iter() if element.get("id")]
+    assert len(ids) == len(set(ids))
+
+    with pytest.raises(ValueError, match="at least two"):
+        animate_svg(asset, [base])
+
+
+def test_animate_cli_sweeps_a_variable_or_reads_states(tmp_path):
+    source = str(EXAMPLES_DIR / "hud_basic.mock.json")
+    out = tmp_path / "hp.svg"
+    args = ["animate", "--in", source, "--out", str(out), "--var", "player.hpRatio", "--steps", "4", "--dur", "1.5"]
+    assert cli.main(args) == 0
+    assert 'keyTimes="0;0.3333;0.6667;1"' in out.read_text(encoding="utf-8")
+
+    states = tmp_path / "states.json"
+    base = load_example("hud_basic.mock.json")["mockState"]
+    states.write_text(json.dumps([base, with_state_var(base, "skill.cooldown", 0)]), encoding="utf-8")
+    assert cli.main(["animate", "--in", source, "--out", str(tmp_path / "cd.svg"), "--states", str(states), "--once"]) == 0
+    assert 'fill="freeze"' in (tmp_path / "cd.svg").read_text(encoding="utf-8")
+
+    assert cli.main(["animate", "--in", source, "--out", str(out), "--var", "nobody.reads"]) == 1
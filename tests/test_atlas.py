@@ -0,0 +1,141 @@
+import json
+import struct
+import zlib
+from pathlib import Path
+
+import pytest
+
+import src.cli as cli
+from src.renderer import RasterImage, build_atlas, decode_png, encode_png, pack_sprites, raster, render_sprites
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+
+
+def solid(width: int, height: int, rgba: tuple) -> RasterImage:
+    return RasterImage(width, height, bytearray(bytes(rgba) * (width * height)))
+
+
+class SolidRenderer:
+    """Writes a PNG of the requested size whose color encodes the SVG length."""
+
+    def export_png(self, svg_path: Path, png_path: Path, width=None, height=None) -> None:
+        shade = len(svg_path.read_text(encoding="utf-8")) % 256
+        png_path.write_bytes(encode_png(solid(width, height, (shade, 0, 0, 255))))
+
+    def close(self) -> None:
+        return None
+
+
+def test_png_round_trip_and_filtered_rgb_decode():
+    image = RasterImage(3, 2, bytearray(range(24)))
+    assert decode_png(encode_png(image)) == image
+
+    # 2x1 RGB, Sub filter: the second pixel is stored as a delta from the first.
+    raw = bytes([1, 10, 20, 30, 5, 5, 5])
+    body = struct.pack(">IIBBBBB", 2, 1, 8, 2, 0, 0, 0)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    png = b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", body) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+    decoded = decode_png(png)
+    assert decoded.pixel(0, 0) == (10, 20, 30, 255)
+    assert decoded.pixel(1, 0) == (15, 25, 35, 255)
+
+
+def filtered_png(image: RasterImage, kinds: list) -> bytes:
+    """Encode with the given PNG filter type per row, as libpng's adaptive filtering might pick."""
+    stride, previous, raw = image.stride, bytes(image.stride), bytearray()
+    for row, kind in enumerate(kinds):
+        line = image.pixels[row * stride:(row + 1) * stride]
+        raw.append(kind)
+        for i, value in enumerate(line):
+            left, up = (line[i - 4] if i >= 4 else 0), previous[i]
+            upper_left = previous[i - 4] if i >= 4 else 0
+            estimate = left + up - upper_left
+            paeth = min((abs(estimate - left), 0, left), (abs(estimate - up), 1, up), (abs(estimate - upper_left), 2, upper_left))[2]
+            raw.append((value - (0, left, up, (left + up) >> 1, paeth)[kind]) & 0xFF)
+        previous = line
+    header = struct.pack(">IIBBBBB", image.width, image.height, 8, 6, 0, 0, 0)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(bytes(raw))) + chunk(b"IEND", b"")
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_every_filter_type_decodes_with_and_without_numpy(vectorized, monkeypatch):
+    if not vectorized:
+        monkeypatch.setattr(raster, "np", None)
+    width, height = 23, 17
+    image = RasterImage(width, height, bytearray((x * 37 + y * 11 + c * 71 + (x * y) % 13) % 256 for y in range(height) for x in range(width) for c in range(4)))
+    for kinds in ([4] * height, [2, 1, 0, 2, 1] * 3 + [0, 0], [(row * 3) % 5 for row in range(height)]):
+        assert decode_png(filtered_png(image, kinds)) == image, kinds
+
+
+def test_packer_keeps_sprites_apart_and_inside_pages():
+    sizes = [(f"s{index}", 10 + index * 7 % 50, 8 + index * 11 % 40) for index in range(200)]
+    pages = pack_sprites(sizes, max_size=256, padding=2)
+    assert len(pages) > 1
+    placed = [placement for page in pages for placement in page.placements]
+    assert sorted(placement.name for placement in placed) == sorted(name for name, _, _ in sizes)
+    for page in pages:
+        assert page.width <= 256 and page.height <= 256
+        for index, a in enumerate(page.placements):
+            assert a.x + a.width <= page.width and a.y + a.height <= page.height
+            for b in page.placements[index + 1:]:
+                apart = (
+                    a.x + a.width + 2 <= b.x
+                    or b.x + b.width + 2 <= a.x
+                    or a.y + a.height + 2 <= b.y
+                    or b.y + b.height + 2 <= a.y
+                )
+                assert apart, (a, b)
+    assert pack_sprites(sizes, max_size=256, padding=2) == pages
+
+    [page] = pack_sprites([("a", 100, 30), ("b", 20, 20)], max_size=300, power_of_two=True)
+    assert (page.width, page.height) == (128, 32)
+    with pytest.raises(ValueError, match="does not fit"):
+        pack_sprites([("huge", 300, 10)], max_size=300, power_of_two=True)
+    with pytest.raises(ValueError, match="Duplicate sprite names"):
+        pack_sprites([("a", 1, 1), ("a", 2, 2)])
+
+
+def test_build_atlas_blits_each_sprite_at_its_placement():
+    sprites = [("red", solid(4, 3, (255, 0, 0, 255))), ("blue", solid(2, 5, (0, 0, 255, 128)))]
+    [page], manifest = build_atlas(sprites, padding=1)
+
+    for name, image in sprites:
+        entry = manifest["sprites"][name]
+        assert (entry["width"], entry["height"]) == (image.width, image.height)
+        assert page.crop(entry["x"], entry["y"], entry["width"], entry["height"]) == image
+    assert manifest["pages"] == [{"width": page.width, "height": page.height}]
+
+
+def test_render_sprites_uses_the_pool_and_decodes_pngs():
+    jobs = [("a", "<svg/>", 3, 2), ("b", "<svg></svg>", 1, 4)]
+    sprites = render_sprites(jobs, workers=2, renderer_factory=lambda backend: SolidRenderer())
+    assert [(name, image.width, image.height) for name, image in sprites] == [("a", 3, 2), ("b", 1, 4)]
+    assert sprites[1][1].pixel(0, 3) == (11, 0, 0, 255)
+
+
+def test_atlas_cli_renders_state_variants_into_pages(tmp_path, monkeypatch):
+    def fake_render(jobs, backend="resvg", workers=2):
+        return render_sprites(jobs, backend, workers, renderer_factory=lambda _: SolidRenderer())
+
+    monkeypatch.setattr(cli, "render_sprites", fake_render)
+    states = tmp_path / "states.json"
+    states.write_text(json.dumps({"empty": {"player": {"hpRatio": 0}}}), encoding="utf-8")
+    args = [
+        "atlas", "--in", str(EXAMPLES_DIR / "button_sf.json"), str(EXAMPLES_DIR / "gauge_segmented.json"),
+        "--out", str(tmp_path / "out"), "--states", str(states), "--scale", "0.5", "--pot",
+    ]
+    assert cli.main(args) == 0
+
+    manifest = json.loads((tmp_path / "out" / "atlas.json").read_text(encoding="utf-8"))
+    assert sorted(manifest["sprites"]) == ["button_sf", "button_sf@empty", "gauge_segmented", "gauge_segmented@empty"]
+    assert manifest["sprites"]["button_sf"]["width"] == 128
+    [page] = manifest["pages"]
+    image = decode_png((tmp_path / "out" / page["file"]).read_bytes())
+    assert (image.width, image.height) == (page["width"], page["height"])
@@ -0,0 +1,117 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from xml.etree import ElementTree as ET
+
+import pytest
+
+from src.compiler import BudgetExceeded, CompileBudget, compile_svg, estimate_cost
+from src.compiler import budget as budget_module
+from src.compiler.budget import BudgetTracker, layer_cost
+from src.constraints import normalize_asset_constraints
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+
+
+def load_example(name: str) -> dict:
+    asset = json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+    normalize_asset_constraints(asset)
+    return asset
+
+
+@pytest.mark.parametrize("name", ["button_sf.json", "grid_screen.json", "tab_bar.json", "gauge_segmented.json"])
+def test_estimate_is_an_upper_bound_on_emitted_elements(name):
+    asset = load_example(name)
+    svg = compile_svg(asset)
+    emitted = sum(1 for _ in ET.fromstring(svg).iter())
+    estimate = estimate_cost(asset)
+    assert emitted <= estimate.elements < emitted * 4
+    assert estimate.bytes >= len(svg) // 2
+
+
+def test_huge_segment_count_is_rejected_before_compiling():
+    asset = load_example("gauge_segmented.json")
+    asset["components"][0]["layers"][0]["shape_params"]["segment_count"] = 10_000_000
+    estimate = estimate_cost(asset)
+    assert estimate.elements > 10_000_000
+
+    with pytest.raises(BudgetExceeded) as excinfo:
+        compile_svg(asset)
+    assert excinfo.value.limit == "elements"
+    assert excinfo.value.estimate == estimate
+
+
+def test_huge_polygon_side_count_is_rejected_by_size():
+    asset = load_example("gauge_radial_polygon.json")
+    hexagon = next(component for component in asset["components"] if component["id"] == "gauge-hex")
+    hexagon["layers"][0]["shape_params"]["sides"] = 1_000_000
+    estimate = estimate_cost(asset)
+    # Two polygons' worth of points, but only a handful of elements.
+    assert estimate.elements < 100 and estimate.bytes > 2_000_000 * 14
+
+    with pytest.raises(BudgetExceeded) as excinfo:
+        compile_svg(asset)
+    assert excinfo.value.limit == "bytes"
+    assert excinfo.value.estimate == estimate
+
+    # The same bytes are charged while emitting, for callers that skip the estimate.
+    tracker = BudgetTracker(CompileBudget(max_bytes=1_000_000))
+    with pytest.raises(BudgetExceeded, match="more than 1000000 bytes"):
+        tracker.charge(*layer_cost(hexagon["layers"][0]))
+
+
+def test_grid_depth_and_cycles_are_bounded():
+    asset = load_example("grid_screen.json")
+    assert estimate_cost(asset).depth == 2
+    with pytest.raises(BudgetExceeded, match="nesting depth 2 exceeds the limit of 1"):
+        compile_svg(asset, CompileBudget(max_depth=1))
+
+    item = next(component for component in asset["components"] if component["id"] == "grid-item")
+    item["layers"].append(
+        {
+            "id": "loop",
+            "shape": "layoutRow",
+            "rect": {"x": 0, "y": 0, "width": 180, "height": 180},
+            "layout": {"gap": 0},
+            "items": [{"id": "again", "componentId": "grid-container", "size": {"width": 10, "height": 10}}],
+        }
+    )
+    with pytest.raises(BudgetExceeded, match="cycle: grid-container -> grid-item -> grid-container"):
+        estimate_cost(asset)
+
+
+def test_deadline_is_checked_while_emitting_layers():
+    asset = load_example("tab_bar.json")
+    with pytest.raises(BudgetExceeded) as excinfo:
+        compile_svg(asset, CompileBudget(deadline_seconds=0.0))
+    assert excinfo.value.limit == "deadline"
+    assert excinfo.value.estimate is None
+
+
+def test_deadline_is_checked_after_the_last_layer(monkeypatch):
+    asset = load_example("button_sf.json")
+    asset["layers"] = asset["layers"][:1]
+    # Each clock read is a second later: start, charge before the layer, check after it.
+    ticks = iter(range(100))
+    monkeypatch.setattr(budget_module, "time", SimpleNamespace(monotonic=lambda: float(next(ticks))))
+    with pytest.raises(BudgetExceeded) as excinfo:
+        compile_svg(asset, CompileBudget(deadline_seconds=1.5))
+    assert excinfo.value.limit == "deadline"
+
+
+def test_render_cli_reports_budget_errors_and_accepts_a_larger_budget(tmp_path, capsys):
+    import src.cli as cli
+
+    asset = load_example("gauge_segmented.json")
+    asset["components"][0]["layers"][0]["shape_params"]["segment_count"] = 500_000
+    path = tmp_path / "huge.json"
+    path.write_text(json.dumps(asset), encoding="utf-8")
+    args = ["render", "--in", str(path), "--out", str(tmp_path / "out"), "--only", "svg"]
+    assert cli.main(args) == 1
+    assert "the limit is 200000" in capsys.readouterr().out
+    assert not (tmp_path / "out" / "huge.svg").exists()
+
+    asset["components"][0]["layers"][0]["shape_params"]["segment_count"] = 400
+    path.write_text(json.dumps(asset), encoding="utf-8")
+    assert cli.main(args + ["--max-elements", "100"]) == 1
+    assert cli.main(args + ["--max-elements", "5000"]) == 0
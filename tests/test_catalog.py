@@ -0,0 +1,64 @@
+import os
+from pathlib import Path
+
+from src.catalog import load_index, load_pattern, load_tags, parse_yaml
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_parse_yaml_handles_catalog_subset():
+    text = """
+# comment
+templates:
+  - id: sample
+    summary: "a: quoted # not a comment"
+    tags: [action, "primary"]
+    size:
+      width: 64
+      ratio: 0.5
+flags:
+- min_tap
+enabled: true
+"""
+    assert parse_yaml(text) == {
+        "templates": [
+            {
+                "id": "sample",
+                "summary": "a: quoted # not a comment",
+                "tags": ["action", "primary"],
+                "size": {"width": 64, "ratio": 0.5},
+            }
+        ],
+        "flags": ["min_tap"],
+        "enabled": True,
+    }
+
+
+def test_tags_and_index_load_from_repository():
+    vocab = load_tags(ROOT_DIR)
+    assert "action" in vocab.allowed
+    assert "slot" not in vocab.allowed
+    assert vocab.unknown(["action", "made_up"]) == ["made_up"]
+
+    entries = load_index(ROOT_DIR)
+    ids = {entry.id for entry in entries}
+    assert "primary_action_button" in ids
+    for entry in entries:
+        pattern = load_pattern(ROOT_DIR / entry.path)
+        assert pattern is not None
+        assert pattern.id == entry.id
+
+
+def test_catalog_cache_invalidates_on_change(tmp_path):
+    catalog_dir = tmp_path / "ui-templates" / "_catalog"
+    catalog_dir.mkdir(parents=True)
+    tags_path = catalog_dir / "tags.yaml"
+    tags_path.write_text("roles:\n  - action\n", encoding="utf-8")
+
+    first = load_tags(tmp_path)
+    assert load_tags(tmp_path) is first
+
+    tags_path.write_text("roles:\n  - action\n  - navigation\n", encoding="utf-8")
+    stat = tags_path.stat()
+    os.utime(tags_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_tags(tmp_path).allowed == {"action", "navigation"}
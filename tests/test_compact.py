@@ -0,0 +1,63 @@
+import json
+import re
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+from src.cli import main
+from src.compiler import analyze_svg, compact_svg, compile_svg
+from src.compiler.compact import format_number
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+def test_format_number_trims_trailing_zeros():
+    assert format_number(120.0) == "120"
+    assert format_number(30.6) == "30.6"
+    assert format_number(0.004) == "0"
+    assert format_number(-0.001) == "0"
+    assert format_number(2.345, 1) == "2.3"
+    assert format_number(7.5, 0) == "8"
+
+
+def test_compact_output_drops_defaults_and_renders_the_same():
+    svg = compile_svg(load_example("gauge_segmented.json"))
+    compact, id_map = compact_svg(svg)
+
+    assert id_map == {}
+    assert compact == compact_svg(svg)[0]
+    assert ".00" not in compact
+    assert 'rx="0"' not in compact and 'stroke="none"' not in compact
+    assert "scale(1 1)" not in compact and 'spreadMethod="pad"' not in compact
+    assert len(compact) < len(svg) * 0.8
+
+    original, trimmed = analyze_svg(svg), analyze_svg(compact)
+    assert trimmed["elements"] == original["elements"]
+    assert trimmed["painted_area"] == original["painted_area"]
+
+
+def test_short_ids_keep_references_valid_and_map_back():
+    svg = compile_svg(load_example("custom_fx_glow.json"))
+    compact, id_map = compact_svg(svg, short_ids=True)
+    root = ET.fromstring(compact)
+
+    ids = [element.get("id") for element in root.iter() if element.get("id")]
+    assert ids[:3] == ["a", "b", "c"] and len(set(ids)) == len(ids)
+    assert sorted(id_map) == sorted(ids)
+    assert set(id_map.values()) == {element.get("id") for element in ET.fromstring(svg).iter() if element.get("id")}
+    referenced = set(re.findall(r"url\(#([^)]+)\)", compact))
+    assert referenced and referenced <= set(ids)
+
+
+def test_render_cli_writes_compact_svg_and_id_map(tmp_path):
+    source = EXAMPLES_DIR / "list_screen.json"
+    args = ["render", "--in", str(source), "--out", str(tmp_path), "--only", "svg", "--precision", "1", "--short-ids"]
+    assert main(args) == 0
+
+    svg = (tmp_path / "list_screen.svg").read_text(encoding="utf-8")
+    id_map = json.loads((tmp_path / "list_screen.ids.json").read_text(encoding="utf-8"))
+    assert (svg, id_map) == compact_svg(compile_svg(load_example("list_screen.json")), 1, short_ids=True)
+    assert len(svg) < len(compile_svg(load_example("list_screen.json"))) * 0.7
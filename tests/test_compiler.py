@@ -40,5 +40,23 @@ def test_compiler_emits_glow_filter():
     defs = root.find("svg:defs", ns)
     assert defs is not None
 
-    glow_filter = defs.find("svg:filter[@id='ui-softGlow']", ns)
-    assert glow_filter is not None
+    [glow_filter] = [element for element in defs.findall("svg:filter", ns) if element.get("id").startswith("ui-softGlow-")]
+    # Body rect 8,8 240x56 with a 2px stroke: padded by 3 * stdDeviation(9) + 1.
+    assert [glow_filter.get(name) for name in ("x", "y", "width", "height")] == ["-20.00", "-20.00", "296.00", "112.00"]
+    body = root.find("svg:g[@id='button-body']/svg:rect", ns)
+    assert body.get("filter") == f"url(#{glow_filter.get('id')})"
+
+
+def test_glow_filters_are_per_region_and_deduplicated():
+    asset = load_asset()
+    body = asset["layers"][0]
+    twin = {**body, "id": "button-twin"}
+    moved = {**body, "id": "button-moved", "rect": {**body["rect"], "x": 0}}
+    asset["layers"] = [body, twin, moved]
+    root = ET.fromstring(compile_svg(asset))
+
+    ns = {"svg": "http://www.w3.org/2000/svg"}
+    filters = root.findall("svg:defs/svg:filter", ns)
+    assert len(filters) == 2
+    refs = [root.find(f"svg:g[@id='{layer_id}']/svg:rect", ns).get("filter") for layer_id in ("button-body", "button-twin", "button-moved")]
+    assert refs[0] == refs[1] != refs[2]
@@ -0,0 +1,165 @@
+import json
+import random
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+import pytest
+
+import src.cli as cli
+from src.compiler import compile_svg, plan_composite
+from src.compiler.geometry import local_name
+from src.compiler.optimize import paint_list
+from src.renderer import RasterImage, decode_png, encode_png, raster
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+def parse(svg: str) -> ET.Element:
+    root = ET.fromstring(svg)
+    for element in root.iter():
+        element.tag = local_name(element.tag)
+    return root
+
+
+def reassemble(plan) -> ET.Element:
+    """The plan's sprites placed as vectors, in output pixel space."""
+    root = ET.Element("svg")
+    for placement in plan.placements:
+        sprite = plan.sprites[placement.key]
+        group = ET.SubElement(root, "g", {"transform": f"translate({placement.x - sprite.x} {placement.y - sprite.y})"})
+        group.extend(child for child in parse(sprite.svg) if child.tag != "defs")
+    return root
+
+
+def reference(asset: dict, width: int, height: int) -> ET.Element:
+    compiled = parse(compile_svg(asset))
+    _, _, view_width, view_height = (float(value) for value in compiled.get("viewBox").split())
+    scale = min(width / view_width, height / view_height)
+    offset_x, offset_y = (width - view_width * scale) / 2, (height - view_height * scale) / 2
+    root = ET.Element("svg")
+    group = ET.SubElement(root, "g", {"transform": f"matrix({scale} 0 0 {scale} {offset_x} {offset_y})"})
+    group.extend(child for child in compiled if child.tag != "defs")
+    return root
+
+
+def test_repeated_components_share_one_sprite():
+    grid = plan_composite(load_example("grid_screen.json"), 1280, 720)
+    assert (len(grid.sprites), len(grid.placements), grid.reused) == (2, 7, 5)
+    cells = grid.placements[1:]
+    assert len({placement.key for placement in cells}) == 1
+    assert [(placement.x, placement.y) for placement in cells[:3]] == [(328, 153), (548, 153), (768, 153)]
+    assert cells[0].element_ids == ("grid--grid-layout--item-1--grid-bg", "grid--grid-layout--item-1--grid-label")
+
+    # Placements follow zIndex order, like the vector render.
+    modal = load_example("modal_overlay.json")
+    plan = plan_composite(modal, 1280, 720)
+    order = [instance["id"] for instance in sorted(modal["instances"], key=lambda item: (item.get("zIndex", 0), item["id"]))]
+    assert [placement.element_ids[0].split("--")[0] for placement in plan.placements] == order
+    assert plan.reused == 0
+
+
+def test_placed_sprites_paint_like_the_vector_render():
+    cases = [
+        ("grid_screen.json", 1280, 720),
+        ("tab_bar.json", 640, 360),
+        ("hud_basic.mock.json", 1280, 800),
+        ("primary_action_states.json", 1920, 1080),
+    ]
+    for name, width, height in cases:
+        asset = load_example(name)
+        plan = plan_composite(asset, width, height)
+        assert paint_list(reassemble(plan)) == paint_list(reference(asset, width, height)), name
+        for sprite in plan.sprites.values():
+            assert 0 <= sprite.x and sprite.x + sprite.width <= width
+            assert 0 <= sprite.y and sprite.y + sprite.height <= height
+
+
+def test_cost_model_composites_only_when_reuse_pays():
+    grid = plan_composite(load_example("grid_screen.json"), 3840, 2160)
+    assert grid.full_cost > 0 and all(sprite.cost > 0 for sprite in grid.sprites.values())
+    # Seven placements from two renders win only if blending is nearly free.
+    assert grid.worth_compositing(0.0, workers=4)
+    assert not grid.worth_compositing(1.0, workers=4)
+    assert not plan_composite(load_example("grid_screen.json"), 640, 360).worth_compositing(0.02, workers=4)
+    # Nothing repeats in the HUD: never worth it.
+    assert not plan_composite(load_example("hud_basic.json"), 1280, 800).worth_compositing(0.0, workers=4)
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "pure"])
+def vectorized(request, monkeypatch):
+    if request.param and raster.np is None:
+        pytest.skip("numpy is not installed")
+    if not request.param:
+        monkeypatch.setattr(raster, "np", None)
+    return request.param
+
+
+def test_composite_blends_straight_alpha(vectorized):
+    image = RasterImage(3, 1, bytearray([0, 0, 255, 255, 0, 0, 255, 128, 0, 0, 0, 0]))
+    image.composite(RasterImage(3, 1, bytearray([255, 0, 0, 128] * 3)), 0, 0)
+    assert image.pixel(0, 0) == (128, 0, 127, 255)
+    assert image.pixel(1, 0) == (170, 0, 85, 192)
+    assert image.pixel(2, 0) == (255, 0, 0, 128)
+
+    opaque = RasterImage(2, 2, bytearray([9, 9, 9, 255] * 4))
+    image.composite(opaque, 2, 0)
+    assert image.pixel(2, 0) == (9, 9, 9, 255) and image.pixel(1, 0) == (170, 0, 85, 192)
+
+
+def test_vectorized_blend_matches_pure_python(monkeypatch):
+    if raster.np is None:
+        pytest.skip("numpy is not installed")
+    rng = random.Random(7)
+    for _ in range(50):
+        width, height = rng.randint(1, 12), rng.randint(1, 12)
+        # Mostly 0/255 alpha with some translucency, like rendered sprites.
+        pixels = lambda count: bytearray(rng.choice((0, 255, rng.randrange(256))) for _ in range(count * 4))
+        target = RasterImage(width, height, pixels(width * height))
+        source = RasterImage(width - 1 or 1, height, pixels((width - 1 or 1) * height))
+        x, y = rng.randint(-2, width), rng.randint(-2, height)
+        expected = RasterImage(width, height, bytearray(target.pixels))
+        with monkeypatch.context() as patch:
+            patch.setattr(raster, "np", None)
+            expected.composite(source, x, y)
+        target.composite(source, x, y)
+        assert target.pixels == expected.pixels
+
+
+def test_render_cli_composites_instances(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_render(jobs, backend="resvg", workers=2):
+        calls.append(len(jobs))
+        return [(name, RasterImage(width, height, bytearray([0, 200, 0, 255] * (width * height)))) for name, _, width, height in jobs]
+
+    def fake_export(svg_path, png_path, width=None, height=None):
+        calls.append("full")
+        png_path.write_bytes(encode_png(RasterImage(width, height)))
+
+    monkeypatch.setattr(cli, "render_sprites", fake_render)
+    monkeypatch.setattr(cli, "inkscape_export_png", fake_export)
+    monkeypatch.setattr(cli, "blend_cost", lambda: 0.0)
+    args = ["render", "--in", str(EXAMPLES_DIR / "grid_screen.json"), "--out", str(tmp_path), "--composite", "--only", "png"]
+    assert cli.main(args + ["--size", "3840x2160", "--workers", "4"]) == 0
+    assert calls == [2]
+    image = decode_png((tmp_path / "grid_screen.png").read_bytes())
+    assert (image.width, image.height) == (3840, 2160)
+    assert image.pixel(0, 0) == (0, 0, 0, 0)
+    assert image.pixel(1000, 500) == (0, 200, 0, 255)
+
+    # Blending costs more than rendering the few cells again: one full render, written as-is.
+    monkeypatch.setattr(cli, "blend_cost", lambda: 0.02)
+    assert cli.main(args + ["--size", "640x360"]) == 0
+    assert calls == [2, "full"]
+    assert decode_png((tmp_path / "grid_screen.png").read_bytes()).width == 640
+
+
+def test_render_cli_rejects_composite_with_svg_rewrites(tmp_path):
+    args = ["render", "--in", str(EXAMPLES_DIR / "grid_screen.json"), "--out", str(tmp_path), "--composite"]
+    for extra in (["--optimize"], ["--compact"], ["--precision", "1"], ["--short-ids"]):
+        with pytest.raises(SystemExit, match="--composite cannot be combined"):
+            cli.main(args + extra)
@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+from src.compiler import compile_svg
+from src.compiler.defs import intern_defs
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+NS = {"svg": "http://www.w3.org/2000/svg"}
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+def referenced_ids(root: ET.Element, attribute: str) -> set:
+    return {element.get(attribute)[5:-1] for element in root.iter() if element.get(attribute, "").startswith("url(#")}
+
+
+def test_rows_of_a_list_share_one_clip_path():
+    root = ET.fromstring(compile_svg(load_example("list_screen.json")))
+    clip_ids = {element.get("id") for element in root.findall("svg:defs/svg:clipPath", NS)}
+    texts = [element for element in root.iter(f"{{{NS['svg']}}}text") if element.get("clip-path")]
+    assert len(texts) > 1
+    assert len(clip_ids) == 1
+    assert referenced_ids(root, "clip-path") == clip_ids
+
+
+def test_identical_gradients_under_different_tokens_are_interned():
+    asset = load_example("button_sf.json")
+    primary = {"angle": 12, "stops": [{"offset": 0, "color": "#8AF3FF"}, {"offset": 1, "color": "#8576FF"}]}
+    asset["theme"] = {"gradients": {"ui.copyGradient": primary}}
+    asset["layers"][1]["style"]["fill"] = "ui.copyGradient"
+    asset["layers"][0]["style"]["fill"] = "ui.primaryGradient"
+
+    root = ET.fromstring(compile_svg(asset))
+    gradients = [element.get("id") for element in root.findall("svg:defs/svg:linearGradient", NS)]
+    assert gradients == ["ui-primaryGradient"]
+    assert referenced_ids(root, "fill") == {"ui-primaryGradient"}
+
+
+def test_intern_defs_keeps_first_occurrence_in_order():
+    root = ET.fromstring(
+        '<svg><defs><clipPath id="b"><rect width="1" /></clipPath><clipPath id="a"><rect width="1" /></clipPath>'
+        '<clipPath id="c"><rect width="2" /></clipPath></defs>'
+        '<g clip-path="url(#a)" /><g clip-path="url(#c)" /></svg>'
+    )
+    assert intern_defs(root) == {"a": "b"}
+    assert [element.get("id") for element in root.find("defs")] == ["b", "c"]
+    assert [element.get("clip-path") for element in root.findall("g")] == ["url(#b)", "url(#c)"]
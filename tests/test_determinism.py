@@ -6,16 +6,16 @@ from xml.etree import ElementTree as ET
 from src.compiler import compile_svg
 
 EXAMPLE_PATH = Path(__file__).resolve().parents[1] / "examples" / "button_sf.json"
-EXPECTED_SHA256 = "d7bb0a16e15d64a4f5288b74b5aae0a38ed6673c1350550628719196354babcd"
+EXPECTED_SHA256 = "168848460f7f23e10fc004329652cc7a37f1256b86e4b94e6be9eb98fa7fef1b"
 SCREEN_DIALOG_PATH = Path(__file__).resolve().parents[1] / "examples" / "screen_dialog.json"
 LIST_SCREEN_PATH = Path(__file__).resolve().parents[1] / "examples" / "list_screen.json"
 GRID_SCREEN_PATH = Path(__file__).resolve().parents[1] / "examples" / "grid_screen.json"
 HUD_MOCK_PATH = Path(__file__).resolve().parents[1] / "examples" / "hud_basic.mock.json"
 
-EXPECTED_SCREEN_DIALOG_SHA256 = "ee898454cf36103d348c513279fd9ae0a48860e0480517f55ecb39176ba01f24"
-EXPECTED_LIST_SCREEN_SHA256 = "52b9b50408ec34f419102e53f147c0a96006a58ef55c09bea5d8884992be4613"
-EXPECTED_GRID_SCREEN_SHA256 = "7080800a9adf6f5e42475fa5cd90335069cfcbd742bd37a39e82a43c2d1255be"
-EXPECTED_HUD_MOCK_SHA256 = "5a434e957e8c046dc51567847b3620070594e56860b619d51244f51bee1d0082"
+EXPECTED_SCREEN_DIALOG_SHA256 = "8acfa756226a52be9894f9649d00c124157fc02bbd25e783f85eeafe4d70d3e5"
+EXPECTED_LIST_SCREEN_SHA256 = "9a91b9bec4c46e43b2f416ebb888feac803c0267522f10ca34bcf44c95d78418"
+EXPECTED_GRID_SCREEN_SHA256 = "cb83eeb8b8fa07627fd547e069fcb4ab2e897c69acf9cf499ebd6af3be6687f5"
+EXPECTED_HUD_MOCK_SHA256 = "a44e374d68446e4a5e83ec7fe82a2f6f9142a148a05da600e5a7621c46cb53b2"
 
 
 def load_asset() -> dict:
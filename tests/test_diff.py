@@ -0,0 +1,82 @@
+import copy
+import json
+from pathlib import Path
+
+from src.compiler import compile_svg, diff_svg
+from src.compiler.geometry import BBoxIndex, parse_transform, transform_bbox
+from src.constraints import normalize_asset_constraints
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+
+
+def load_example(name: str) -> dict:
+    with (EXAMPLES_DIR / name).open("r", encoding="utf-8") as handle:
+        asset = json.load(handle)
+    normalize_asset_constraints(asset)
+    return asset
+
+
+def test_identical_outputs_produce_empty_diff():
+    svg = compile_svg(load_example("hud_basic.mock.json"))
+    result = diff_svg(svg, svg)
+    assert result["identical"] is True
+    assert result["changed"] == [] and result["added"] == [] and result["removed"] == []
+    assert result["bounds"] is None
+
+
+def test_mock_state_change_reports_only_the_affected_group():
+    before = load_example("hud_basic.mock.json")
+    after = copy.deepcopy(before)
+    after["mockState"]["player"]["hpRatio"] = 0.2
+
+    result = diff_svg(compile_svg(before), compile_svg(after))
+    assert [entry["id"] for entry in result["changed"]] == ["hud-hp--hp-progress"]
+    entry = result["changed"][0]
+    assert entry["content_changed"] is True
+    assert entry["bbox"] == result["bounds"]
+
+
+def test_removed_layer_and_attribute_changes_are_reported():
+    before = load_example("button_sf.json")
+    after = copy.deepcopy(before)
+    removed = after["layers"].pop()
+    after["layers"][0]["rect"]["width"] = 100
+
+    result = diff_svg(compile_svg(before), compile_svg(after))
+    removed_entries = {entry["id"]: entry for entry in result["removed"]}
+    assert removed_entries[removed["id"]]["bbox"] is not None
+    changed_ids = [entry["id"] for entry in result["changed"]]
+    assert after["layers"][0]["id"] in changed_ids
+    assert result["identical"] is False
+
+
+def test_bbox_index_applies_nested_transforms():
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 200 200">'
+        '<g id="outer" transform="translate(10 20) scale(2)">'
+        '<g id="inner" transform="translate(5 5)"><rect x="0" y="0" width="10" height="4"/></g>'
+        "</g></svg>"
+    )
+    index = BBoxIndex.from_svg(svg)
+    assert index.bbox_for_id("inner") == (20.0, 30.0, 20.0, 8.0)
+    assert index.bbox_for_id("outer") == index.bbox_for_id("inner")
+
+
+def test_rotation_about_center_keeps_center_fixed():
+    matrix = parse_transform("rotate(90 10 10)")
+    box = transform_bbox(matrix, (0.0, 5.0, 20.0, 10.0))
+    assert [round(value, 6) for value in box] == [5.0, 0.0, 10.0, 20.0]
+
+
+def test_changed_defs_take_the_bbox_of_the_elements_using_them():
+    svg = compile_svg(load_example("button_sf.json"))
+    index = BBoxIndex.from_svg(svg)
+
+    result = diff_svg(svg, svg.replace('stop-color="#FFFFFF" stop-opacity="0.650"', 'stop-color="#FFEE00" stop-opacity="0.650"'))
+    assert [entry["id"] for entry in result["changed"]] == ["ui-highlightGradient"]
+    assert result["bounds"] == [16.0, 14.0, 224.0, 22.0] == list(index.bbox_for_id("button-highlight"))
+
+    # A wider blur grows the glowing body's box by the extra spread.
+    result = diff_svg(svg, svg.replace('stdDeviation="9.00"', 'stdDeviation="12.00"'))
+    assert [entry["id"] for entry in result["changed"]] == ["ui-softGlow-a9f1bb53"]
+    assert result["bounds"] == [-29.0, -29.0, 314.0, 130.0]
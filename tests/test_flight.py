@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from src.preview.flight import SingleFlight, Superseded, Supersession
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def work():
+        calls.append(1)
+        assert release.wait(5)
+        return "svg"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", work))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while flight.in_flight() == 0:
+        time.sleep(0.005)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {value for value, _ in results} == {"svg"}
+    assert flight.in_flight() == 0
+
+
+def test_leader_errors_reach_waiters_and_are_not_cached():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: (_ for _ in ()).throw(ValueError("bad")))
+    assert flight.do("key", lambda: "ok") == ("ok", False)
+
+
+def test_newer_request_supersedes_a_waiting_one():
+    flight = SingleFlight()
+    supersession = Supersession()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do("key", lambda: release.wait(5) and "svg"))
+    leader.start()
+    while flight.in_flight() == 0:
+        time.sleep(0.005)
+
+    old_ticket = supersession.begin("tab-1")
+    outcome = []
+
+    def waiter():
+        try:
+            outcome.append(flight.do("key", lambda: "unused", old_ticket))
+        except Superseded:
+            outcome.append("superseded")
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    new_ticket = supersession.begin("tab-1")
+    thread.join(5)
+    assert outcome == ["superseded"]
+    assert not new_ticket.superseded
+
+    release.set()
+    leader.join(5)
+    supersession.finish(old_ticket)
+    assert len(supersession) == 1
+    supersession.finish(new_ticket)
+    assert len(supersession) == 0
@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+import src.cli as cli
+from src.compiler import FrameSequence, compile_svg, sweep_values
+from src.compiler.frames import with_state_var
+from src.compiler.live import bind_vars
+from src.renderer import RasterImage, decode_png, encode_png, render_sprites
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+class WidthRenderer:
+    """Writes a PNG of the requested size whose red channel encodes the SVG length."""
+
+    def export_png(self, svg_path: Path, png_path: Path, width=None, height=None) -> None:
+        shade = len(svg_path.read_text(encoding="utf-8")) % 256
+        png_path.write_bytes(encode_png(RasterImage(width, height, bytearray(bytes((shade, 0, 0, 255)) * (width * height)))))
+
+    def close(self) -> None:
+        return None
+
+
+def fake_render(jobs, backend="resvg", workers=2):
+    return render_sprites(jobs, backend, workers, renderer_factory=lambda _: WidthRenderer())
+
+
+def test_sweep_frames_match_a_full_compile():
+    asset = load_example("hud_basic.mock.json")
+    sequence = FrameSequence(asset)
+    values = sweep_values(5)
+    assert values == [0.0, 0.25, 0.5, 0.75, 1.0]
+
+    for var in ("player.hpRatio", "skill.cooldown"):
+        for value, svg in zip(values, sequence.sweep(var, values)):
+            expected = dict(asset, mockState=with_state_var(asset["mockState"], var, value))
+            assert svg == compile_svg(expected)
+
+
+def test_readers_follow_bind_vars():
+    asset = load_example("hud_basic.mock.json")
+    sequence = FrameSequence(asset)
+    readers = sequence.readers("player.hpRatio")
+    assert readers
+    assert sequence.readers("no.such.var") == []
+    # A parent path reaches every layer reading one of its children.
+    assert set(readers) <= set(sequence.readers("player"))
+
+    assert bind_vars({"op": "mul", "args": [{"var": "player.hpRatio"}, {"var": "scale"}, 2]}) == {
+        "player.hpRatio",
+        "scale",
+    }
+    assert with_state_var({}, "a.b", 1) == {"a": {"b": 1}}
+
+
+def test_frames_cli_writes_numbered_pngs_or_a_strip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "render_sprites", fake_render)
+    source = str(EXAMPLES_DIR / "hud_basic.mock.json")
+    base = ["frames", "--in", source, "--var", "player.hpRatio", "--steps", "3", "--fps", "20"]
+
+    assert cli.main(base + ["--out", str(tmp_path / "pngs")]) == 0
+    metadata = json.loads((tmp_path / "pngs" / "hud_basic.mock.frames.json").read_text(encoding="utf-8"))
+    assert metadata["frame_ms"] == 50 and metadata["duration_ms"] == 150
+    assert [frame["value"] for frame in metadata["frames"]] == [0.0, 0.5, 1.0]
+    first = decode_png((tmp_path / "pngs" / metadata["frames"][0]["file"]).read_bytes())
+    assert (first.width, first.height) == (metadata["width"], metadata["height"])
+
+    assert cli.main(base + ["--out", str(tmp_path / "strip"), "--strip", "--scale", "0.25"]) == 0
+    metadata = json.loads((tmp_path / "strip" / "hud_basic.mock.frames.json").read_text(encoding="utf-8"))
+    strip = decode_png((tmp_path / "strip" / metadata["strip"]).read_bytes())
+    assert (strip.width, strip.height) == (metadata["width"] * 3, metadata["height"])
+    assert [frame["x"] for frame in metadata["frames"]] == [0, metadata["width"], metadata["width"] * 2]
+
+    assert cli.main(["frames", "--in", source, "--var", "nobody.reads", "--out", str(tmp_path / "x")]) == 1
@@ -0,0 +1,90 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.preview.generated_index import GeneratedIndex, INDEX_FILENAME
+
+
+def write_asset(directory, name, mtime, tags=(), template=None):
+    metadata = {"tags": list(tags)}
+    if template:
+        metadata["selected_templates"] = [template]
+    path = directory / name
+    path.write_text(json.dumps({"metadata": metadata}), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_pages_are_newest_first_and_resume_from_cursor(tmp_path):
+    for index in range(5):
+        write_asset(tmp_path, f"asset_{index}.json", 1_000 + index)
+    index = GeneratedIndex(tmp_path)
+    index.rebuild()
+
+    first, cursor = index.page(limit=2)
+    assert [entry.name for entry in first] == ["asset_4.json", "asset_3.json"]
+    second, cursor = index.page(limit=2, cursor=cursor)
+    assert [entry.name for entry in second] == ["asset_2.json", "asset_1.json"]
+    third, cursor = index.page(limit=2, cursor=cursor)
+    assert [entry.name for entry in third] == ["asset_0.json"]
+    assert cursor is None
+
+
+def test_filters_by_tags_and_template(tmp_path):
+    write_asset(tmp_path, "a.json", 1_000, tags=["action", "primary"], template="button_sf")
+    write_asset(tmp_path, "b.json", 1_001, tags=["action"], template="tab_bar")
+    index = GeneratedIndex(tmp_path)
+    index.rebuild()
+
+    entries, _ = index.page(tags=["action", "primary"])
+    assert [entry.name for entry in entries] == ["a.json"]
+    entries, _ = index.page(template_id="tab_bar")
+    assert [entry.name for entry in entries] == ["b.json"]
+
+
+def test_index_is_persisted_and_reused(tmp_path):
+    write_asset(tmp_path, "a.json", 1_000, tags=["action"])
+    GeneratedIndex(tmp_path).rebuild()
+    assert (tmp_path / INDEX_FILENAME).exists()
+
+    path = write_asset(tmp_path, "b.json", 1_001)
+    index = GeneratedIndex(tmp_path)
+    index.rebuild()
+    entry = index.record(path, {"metadata": {"tags": ["feedback"]}})
+    assert entry.tags == ("feedback",)
+    names = [entry.name for entry in index.page()[0]]
+    assert names == ["b.json", "a.json"]
+
+
+def test_unique_name_skips_taken_names(tmp_path):
+    write_asset(tmp_path, "asset.json", 1_000)
+    write_asset(tmp_path, "asset_1.json", 1_001)
+    index = GeneratedIndex(tmp_path)
+    index.rebuild()
+    assert index.unique_name("asset.json") == "asset_2.json"
+    assert index.unique_name("other.json") == "other.json"
+
+
+def test_unique_name_reserves_until_recorded_or_released(tmp_path):
+    index = GeneratedIndex(tmp_path)
+    index.rebuild()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        names = list(pool.map(lambda _: index.unique_name("asset.json"), range(8)))
+    assert sorted(names) == sorted(["asset.json"] + [f"asset_{n}.json" for n in range(1, 8)])
+
+    path = write_asset(tmp_path, "asset.json", 1_000)
+    index.record(path, {})
+    assert index.unique_name("asset.json") == "asset_8.json"
+    index.release("asset_8.json")
+    assert index.unique_name("fresh.json") == "fresh.json"
+    index.release("fresh.json")
+    assert index.unique_name("fresh.json") == "fresh.json"
+
+
+def test_invalid_cursor_is_rejected(tmp_path):
+    index = GeneratedIndex(tmp_path)
+    index.rebuild()
+    with pytest.raises(ValueError):
+        index.page(cursor="not-a-cursor")
@@ -0,0 +1,79 @@
+import pytest
+
+from src.json_patch import JsonPatchError, apply_patch
+
+
+def test_add_replace_remove_and_append():
+    document = {"layers": [{"id": "a"}], "meta": {"x": 1}}
+    patched = apply_patch(
+        document,
+        [
+            {"op": "add", "path": "/layers/-", "value": {"id": "b"}},
+            {"op": "add", "path": "/layers/0", "value": {"id": "first"}},
+            {"op": "replace", "path": "/meta/x", "value": 2},
+            {"op": "remove", "path": "/layers/1"},
+        ],
+    )
+    assert patched == {"layers": [{"id": "first"}, {"id": "b"}], "meta": {"x": 2}}
+    assert document == {"layers": [{"id": "a"}], "meta": {"x": 1}}
+
+
+def test_move_copy_test_and_escaped_pointers():
+    document = {"a/b": 1, "m~n": {"v": [1, 2]}}
+    patched = apply_patch(
+        document,
+        [
+            {"op": "test", "path": "/a~1b", "value": 1},
+            {"op": "copy", "from": "/m~0n/v", "path": "/copy"},
+            {"op": "move", "from": "/a~1b", "path": "/moved"},
+        ],
+    )
+    assert patched == {"m~n": {"v": [1, 2]}, "copy": [1, 2], "moved": 1}
+
+
+def test_test_op_compares_json_types():
+    document = {"flag": True, "count": 1, "nested": {"values": [1, False, None]}}
+    operations = [
+        {"op": "test", "path": "/flag", "value": True},
+        {"op": "test", "path": "/count", "value": 1.0},
+        {"op": "test", "path": "/nested", "value": {"values": [1, False, None]}},
+    ]
+    assert apply_patch(document, operations) == document
+    for path, value in (("/flag", 1), ("/count", True), ("/nested/values", [True, 0, None])):
+        with pytest.raises(JsonPatchError):
+            apply_patch(document, [{"op": "test", "path": path, "value": value}])
+
+
+def test_failed_operation_is_atomic():
+    document = {"value": 1}
+    with pytest.raises(JsonPatchError) as excinfo:
+        apply_patch(
+            document,
+            [
+                {"op": "replace", "path": "/value", "value": 2},
+                {"op": "remove", "path": "/missing"},
+            ],
+        )
+    assert "operation 1" in str(excinfo.value)
+    assert document == {"value": 1}
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        {"op": "replace", "path": "/missing", "value": 1},
+        {"op": "add", "path": "/list/5", "value": 1},
+        {"op": "add", "path": "/list/01", "value": 1},
+        {"op": "add", "path": "no-slash", "value": 1},
+        {"op": "add", "path": "/x"},
+        {"op": "test", "path": "/list/0", "value": 9},
+        {"op": "test", "path": "/list/0", "value": True},
+        {"op": "test", "path": "/list", "value": [True]},
+        {"op": "test", "path": "/list", "value": {"0": 1}},
+        {"op": "move", "from": "/list", "path": "/list/0"},
+        {"op": "frobnicate", "path": "/x"},
+    ],
+)
+def test_invalid_operations_raise(operation):
+    with pytest.raises(JsonPatchError):
+        apply_patch({"list": [1]}, [operation])
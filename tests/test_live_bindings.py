@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+from src.compiler import compile_svg
+from src.compiler.live import LiveBindings, element_deltas
+from src.constraints import normalize_asset_constraints
+
+HUD_PATH = Path(__file__).resolve().parents[1] / "examples" / "hud_basic.mock.json"
+
+
+def load_hud() -> dict:
+    with HUD_PATH.open("r", encoding="utf-8") as handle:
+        asset = json.load(handle)
+    normalize_asset_constraints(asset)
+    return asset
+
+
+def test_only_bound_layers_are_tracked():
+    asset = load_hud()
+    live = LiveBindings(asset)
+    ids = {target.group_id for target in live.targets}
+    assert "hud-hp--hp-progress" in ids
+    assert "hud-badge--notice-badge" in ids
+    for target in live.targets:
+        assert target.layer.get("bind")
+
+
+def test_rendered_groups_match_full_compile():
+    asset = load_hud()
+    live = LiveBindings(asset)
+    root = ET.fromstring(compile_svg(asset))
+    ns = "{http://www.w3.org/2000/svg}"
+    for group_id, group in live.render(asset["mockState"]).items():
+        compiled = root.find(f".//{ns}g[@id='{group_id}']")
+        assert compiled is not None
+        assert compiled.attrib == group.attrib
+        assert len(compiled) == len(group)
+
+
+def test_first_update_primes_and_later_updates_return_deltas():
+    asset = load_hud()
+    live = LiveBindings(asset)
+    assert live.update(asset["mockState"]) == []
+    state = json.loads(json.dumps(asset["mockState"]))
+    state["player"]["hpRatio"] = 0.3
+    assert live.update(state) == [{"id": "hud-hp--hp-progress", "path": [1], "attrs": {"width": "96.00"}}]
+
+
+def test_structure_change_replaces_the_element():
+    old = ET.fromstring('<g id="a"><rect width="1"/></g>')
+    new = ET.fromstring('<g id="a"/>')
+    deltas = element_deltas("a", old, new)
+    assert deltas == [{"id": "a", "svg": '<g id="a" xmlns="http://www.w3.org/2000/svg" />'}]
@@ -0,0 +1,45 @@
+import json
+
+from src.preview.metrics import Histogram, MetricsRegistry, RequestTimer
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 5, 10))
+    for value in (0.5, 1, 3, 7, 50):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("1", 2), ("5", 3), ("10", 4), ("+Inf", 5)]
+    assert histogram.quantile(0.5) == 5
+    assert histogram.quantile(1.0) == "+Inf"
+
+
+def test_quantiles_above_the_top_bucket_stay_valid_json():
+    # A long-lived SSE stream outlasts every latency bucket.
+    histogram = Histogram((1, 5))
+    histogram.observe(3600)
+    report = json.loads(json.dumps(histogram.to_json(), allow_nan=False))
+    assert report["p50"] == report["p95"] == "+Inf"
+    assert report["buckets"]["+Inf"] == 1
+
+
+def test_registry_counts_errors_and_escapes_labels():
+    registry = MetricsRegistry()
+    timer = RequestTimer('/api/"odd"', "GET")
+    with timer.stage("decode"):
+        pass
+    timer.status = 404
+    registry.record(timer)
+
+    text = registry.to_prometheus()
+    assert 'preview_request_errors_total{endpoint="/api/\\"odd\\""} 1' in text
+    assert 'stage="decode"' in text
+    assert registry.to_json()["endpoints"]['/api/"odd"']["errors"] == 1
+
+
+def test_server_timing_lists_stages_in_order():
+    timer = RequestTimer("/api/compile", "POST")
+    with timer.stage("validate"):
+        pass
+    with timer.stage("compile"):
+        pass
+    names = [part.split(";")[0] for part in timer.server_timing().split(", ")]
+    assert names == ["validate", "compile", "total"]
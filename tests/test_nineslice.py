@@ -0,0 +1,75 @@
+import copy
+import json
+from pathlib import Path
+
+import src.cli as cli
+from src.compiler import compile_svg, nine_slice_asset
+from src.renderer import RasterImage, decode_png, encode_png, render_sprites
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+def test_glowing_button_becomes_a_horizontal_three_slice():
+    [plan] = nine_slice_asset(load_example("button_sf.json"), "button_sf")
+
+    # x 8 + radius 18 + half stroke 1 + glow blur 3 * 9.
+    assert plan.stretchable and plan.stretch == ["x"]
+    assert plan.insets == (54, 36, 54, 36)
+    assert plan.size == (110, 72)
+    body = plan.asset["layers"][0]["rect"]
+    assert (body["x"], body["width"], body["height"]) == (8, 94, 56)
+    assert [warning.layer for warning in plan.warnings] == ["button-body", "button-highlight"]
+    assert 'viewBox="0 0 110 72"' in compile_svg(plan.asset)
+
+
+def test_unstretchable_content_is_reported():
+    [button] = nine_slice_asset(load_example("button_theme.json"), "button_theme")
+    assert not button.stretchable and button.asset is None
+    assert [issue.to_json() for issue in button.issues] == [
+        {"layer": "button-label", "reason": "text content cannot be stretched"}
+    ]
+
+    plans = {plan.name: plan for plan in nine_slice_asset(load_example("modal_overlay.json"), "modal")}
+    assert plans["modal--close-button"].stretch == ["x", "y"]
+    assert plans["modal--close-button"].insets == (12, 12, 12, 12)
+    assert not plans["modal--modal-panel"].stretchable
+
+    panel = load_example("card_frame_rarity.json")
+    layers = panel["components"][0]["layers"]
+    inset = copy.deepcopy(layers[0])
+    inset.update({"id": "gem", "rect": {"x": 150, "y": 150, "width": 20, "height": 20, "radius": 0}})
+    layers.append(inset)
+    [plan] = nine_slice_asset(panel)
+    # Fixed slices grow to keep the gem's edges out of the stretchable center.
+    assert plan.name == "asset--card-frame"
+    assert plan.insets == (152, 152, 152, 252)
+    assert plan.size == (306, 406)
+
+
+def test_nineslice_cli_writes_sources_pngs_and_metadata(tmp_path, monkeypatch):
+    class FlatRenderer:
+        def export_png(self, svg_path, png_path, width=None, height=None):
+            png_path.write_bytes(encode_png(RasterImage(width, height)))
+
+        def close(self):
+            return None
+
+    def fake_render(jobs, backend="resvg", workers=2):
+        return render_sprites(jobs, backend, workers, renderer_factory=lambda _: FlatRenderer())
+
+    monkeypatch.setattr(cli, "render_sprites", fake_render)
+    args = ["nineslice", "--in", str(EXAMPLES_DIR / "button_sf.json"), str(EXAMPLES_DIR / "button_theme.json")]
+    assert cli.main(args + ["--out", str(tmp_path), "--png", "--scale", "2"]) == 0
+
+    slices = json.loads((tmp_path / "nineslice.json").read_text(encoding="utf-8"))["slices"]
+    button, labelled = slices
+    assert button["insets"] == {"left": 108, "top": 72, "right": 108, "bottom": 72}
+    assert button["size"] == {"width": 220, "height": 144}
+    assert (tmp_path / button["svg"]).exists()
+    image = decode_png((tmp_path / button["png"]).read_bytes())
+    assert (image.width, image.height) == (220, 144)
+    assert labelled["stretchable"] is False and "svg" not in labelled
@@ -0,0 +1,83 @@
+import json
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+import pytest
+
+from src.cli import main
+from src.compiler import DEFAULT_PASSES, OptimizationError, compile_svg, optimize_svg
+from src.compiler.optimize import PASSES, paint_list
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+SVG_NS = "{http://www.w3.org/2000/svg}"
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+def test_every_pass_preserves_the_paint_list_of_every_example():
+    for path in sorted(EXAMPLES_DIR.glob("*.json")):
+        svg = compile_svg(json.loads(path.read_text(encoding="utf-8")))
+        expected = paint_list(ET.fromstring(svg))
+        for name in DEFAULT_PASSES:
+            optimized = optimize_svg(svg, [name], verify=True)
+            assert paint_list(ET.fromstring(optimized)) == expected, (path.name, name)
+        assert len(optimize_svg(svg, verify=True)) <= len(svg)
+
+
+def test_segmented_gauge_merges_solid_segments_but_not_bbox_gradients():
+    svg = compile_svg(load_example("gauge_segmented.json"))
+    root = ET.fromstring(optimize_svg(svg, ["merge-rects"], verify=True))
+    paths = root.findall(f".//{SVG_NS}path")
+    rects = root.findall(f".//{SVG_NS}rect")
+
+    [inactive] = paths
+    assert inactive.get("fill") == "#1B1D2F"
+    assert inactive.get("d").count("M") == 3
+    # objectBoundingBox gradients would stretch over a merged path.
+    assert rects and all(rect.get("fill") == "url(#ui-primaryGradient)" for rect in rects)
+
+
+def test_hidden_subtrees_identity_transforms_and_wrapper_groups_are_removed():
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10">'
+        '<defs><clipPath id="c"><rect width="1" height="1" /></clipPath></defs>'
+        '<g id="outer" transform="translate(1.00 2.00) scale(1.00 1.00)">'
+        '<g><rect id="body" width="4" height="4" fill="#fff" /></g></g>'
+        '<g id="gone" display="none"><rect width="4" height="4" clip-path="url(#c)" /></g>'
+        "</svg>"
+    )
+    optimized = optimize_svg(svg, verify=True)
+    root = ET.fromstring(optimized)
+
+    assert root.find(f"{SVG_NS}defs") is None
+    assert root.find(f".//*[@id='gone']") is None
+    [outer] = list(root)
+    assert outer.get("id") == "outer" and outer.get("transform") == "translate(1.00 2.00)"
+    [body] = list(outer)
+    assert body.tag == f"{SVG_NS}rect" and body.get("id") == "body"
+    assert paint_list(root) == paint_list(ET.fromstring(svg))
+
+
+def test_verification_names_the_pass_that_changed_the_render(monkeypatch):
+    def recolor(root: ET.Element) -> int:
+        for element in root.iter("rect"):
+            element.set("fill", "#000")
+        return 1
+
+    monkeypatch.setitem(PASSES, "merge-rects", recolor)
+    svg = compile_svg(load_example("button_sf.json"))
+    with pytest.raises(OptimizationError, match="merge-rects"):
+        optimize_svg(svg, verify=True)
+    with pytest.raises(ValueError, match="Unknown optimization pass"):
+        optimize_svg(svg, ["inline-everything"])
+
+
+def test_render_cli_writes_optimized_svg(tmp_path):
+    source = EXAMPLES_DIR / "gauge_segmented.json"
+    assert main(["render", "--in", str(source), "--out", str(tmp_path), "--only", "svg", "--optimize"]) == 0
+    optimized = (tmp_path / "gauge_segmented.svg").read_text(encoding="utf-8")
+    assert optimized == optimize_svg(compile_svg(load_example("gauge_segmented.json")))
+
+    assert main(["render", "--in", str(source), "--out", str(tmp_path), "--only", "svg", "--optimize", "bogus"]) == 1
@@ -0,0 +1,335 @@
+import gzip
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from src.preview.caching import accepts_gzip, etag_matches, matching_etag
+from src.preview.server import PreviewHandler
+
+EXAMPLE_PATH = Path(__file__).resolve().parents[1] / "examples" / "button_sf.json"
+
+
+def load_asset() -> dict:
+    with EXAMPLE_PATH.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+@pytest.fixture()
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PreviewHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def request(url: str, data: dict | None = None, headers: dict | None = None):
+    body = json.dumps(data).encode("utf-8") if data is not None else None
+    req = Request(url, data=body, headers=headers or {})
+    if body is not None:
+        req.add_header("Content-Type", "application/json")
+    try:
+        with urlopen(req) as response:
+            return response.status, dict(response.headers), response.read()
+    except HTTPError as exc:
+        return exc.code, dict(exc.headers), exc.read()
+
+
+def test_etag_matching_accepts_gzip_variant_and_wildcard():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc-gzip"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert matching_etag('"x", W/"abc-gzip"', '"abc"') == '"abc-gzip"'
+    assert matching_etag('"abc"', '"abc"') == '"abc"'
+    assert matching_etag('"abd"', '"abc"') is None
+
+
+def test_accepts_gzip_honours_quality():
+    assert accepts_gzip("gzip, deflate")
+    assert accepts_gzip("br;q=1.0, gzip;q=0.5")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("identity")
+
+
+def test_static_files_revalidate_with_etag(server_url):
+    status, headers, body = request(f"{server_url}/studio.js")
+    assert status == 200
+    etag = headers["ETag"]
+    assert headers["Cache-Control"] == "no-cache"
+
+    status, headers, body = request(f"{server_url}/studio.js", headers={"If-None-Match": etag})
+    assert status == 304
+    assert body == b""
+
+
+def test_compile_returns_304_for_unchanged_asset(server_url):
+    asset = load_asset()
+    status, headers, body = request(f"{server_url}/api/compile", {"asset": asset})
+    assert status == 200
+    etag = headers["ETag"]
+    assert json.loads(body)["svg"].startswith("<svg")
+
+    status, _, body = request(
+        f"{server_url}/api/compile",
+        {"asset": load_asset()},
+        headers={"If-None-Match": etag},
+    )
+    assert status == 304
+    assert body == b""
+
+    changed = load_asset()
+    changed["layers"][0]["rect"]["width"] = 100
+    status, headers, _ = request(
+        f"{server_url}/api/compile",
+        {"asset": changed},
+        headers={"If-None-Match": etag},
+    )
+    assert status == 200
+    assert headers["ETag"] != etag
+
+
+def test_compile_response_is_gzipped_when_accepted(server_url):
+    status, headers, body = request(
+        f"{server_url}/api/compile",
+        {"asset": load_asset()},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    payload = json.loads(gzip.decompress(body))
+    assert "svg" in payload
+
+    # Revalidating the gzip variant gets its own tag back, not the identity one.
+    etag = headers["ETag"]
+    assert etag.endswith('-gzip"')
+    status, headers, _ = request(
+        f"{server_url}/api/compile",
+        {"asset": load_asset()},
+        headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+    )
+    assert status == 304
+    assert headers["ETag"] == etag
+
+
+def test_edit_session_patch_returns_changed_subtrees(server_url):
+    hud_path = Path(__file__).resolve().parents[1] / "examples" / "hud_basic.mock.json"
+    status, _, body = request(f"{server_url}/api/session", {"path": str(hud_path)})
+    assert status == 200
+    session = json.loads(body)
+
+    patch_url = f"{server_url}/api/session/{session['id']}/patch"
+    ops = [{"op": "replace", "path": "/mockState/player/hpRatio", "value": 0.2}]
+    status, _, body = request(patch_url, {"ops": ops, "version": session["version"], "mode": "delta"})
+    assert status == 200
+    result = json.loads(body)
+    assert result["version"] == session["version"] + 1
+    assert [change["id"] for change in result["changes"]] == ["hud-hp--hp-progress"]
+    assert "svg" not in result
+
+    status, _, body = request(patch_url, {"ops": ops, "version": session["version"]})
+    assert status == 409
+
+    bad = [{"op": "replace", "path": "/instances/0/size/width", "value": -5}]
+    status, _, body = request(patch_url, {"ops": bad})
+    assert status == 400
+
+    status, _, body = request(f"{server_url}/api/session/{session['id']}")
+    assert json.loads(body)["asset"]["mockState"]["player"]["hpRatio"] == 0.2
+
+    status, _, _ = request(f"{server_url}/api/session/unknown/patch", {"ops": []})
+    assert status == 404
+
+
+def test_diff_endpoint_returns_changed_ids_without_svg(server_url):
+    before = load_asset()
+    after = load_asset()
+    after["layers"][0]["rect"]["width"] = 100
+    status, _, body = request(f"{server_url}/api/diff", {"before": {"asset": before}, "after": {"asset": after}})
+    assert status == 200
+    result = json.loads(body)
+    assert result["identical"] is False
+    assert after["layers"][0]["id"] in [entry["id"] for entry in result["changed"]]
+    assert "svg" not in result
+
+    status, _, _ = request(f"{server_url}/api/diff", {"before": {"session": "missing"}, "after": {"asset": after}})
+    assert status == 404
+    status, _, _ = request(f"{server_url}/api/diff", {"before": {"asset": before}})
+    assert status == 400
+
+
+def read_event(stream) -> dict:
+    fields = {}
+    for raw in stream:
+        line = raw.decode("utf-8").rstrip("\n")
+        if not line:
+            if fields:
+                return fields
+            continue
+        if line.startswith(":"):
+            continue
+        name, _, value = line.partition(": ")
+        fields[name] = value
+    raise AssertionError("stream closed")
+
+
+def test_state_updates_stream_attribute_deltas(server_url):
+    hud_path = Path(__file__).resolve().parents[1] / "examples" / "hud_basic.mock.json"
+    status, _, body = request(f"{server_url}/api/session", {"path": str(hud_path)})
+    session_id = json.loads(body)["id"]
+
+    with urlopen(f"{server_url}/api/session/{session_id}/events", timeout=10) as stream:
+        assert stream.headers["Content-Type"].startswith("text/event-stream")
+        assert read_event(stream)["event"] == "hello"
+
+        update = {"mockState": {"badge": {"count": 3}}, "merge": True}
+        status, _, body = request(f"{server_url}/api/session/{session_id}/state", update)
+        assert status == 200
+        deltas = json.loads(body)["deltas"]
+        assert deltas == [{"id": "hud-badge--notice-badge", "path": [1, 0], "text": "3"}]
+
+        event = read_event(stream)
+        assert event["event"] == "delta"
+        assert json.loads(event["data"])["deltas"] == deltas
+
+    status, _, body = request(f"{server_url}/api/session/{session_id}")
+    session = json.loads(body)
+    assert session["asset"]["mockState"]["badge"]["count"] == 3
+    assert session["asset"]["mockState"]["player"]["hpRatio"] == 0.35
+    assert ">3</tspan>" in session["svg"]
+
+    status, _, _ = request(f"{server_url}/api/session/{session_id}/state", {"mockState": 5})
+    assert status == 400
+
+
+def test_render_returns_png_and_backpressure_headers(server_url, monkeypatch):
+    from src.preview import server as preview_server
+    from src.renderer import RenderBusy, RenderPool
+
+    class FakeRenderer:
+        def export_png(self, svg_path, png_path, width=None, height=None):
+            png_path.write_bytes(b"\x89PNG" + f"{width}x{height}".encode("ascii"))
+
+        def close(self):
+            return None
+
+    pool = RenderPool(workers=1, renderer_factory=lambda backend: FakeRenderer())
+    monkeypatch.setattr(preview_server, "_RENDER_POOL", pool)
+    try:
+        status, headers, body = request(f"{server_url}/api/render", {"asset": load_asset(), "height": 64})
+        assert status == 200
+        assert headers["Content-Type"] == "image/png"
+        assert body == b"\x89PNG228x64"
+
+        status, headers, _ = request(f"{server_url}/api/compile", {"asset": load_asset()})
+        status, _, body = request(f"{server_url}/api/render", {"key": headers["ETag"], "width": 10, "height": 10})
+        assert status == 200 and body.endswith(b"10x10")
+
+        status, _, _ = request(f"{server_url}/api/render", {"key": '"c-missing"'})
+        assert status == 404
+
+        clients = []
+        render = pool.render
+        monkeypatch.setattr(
+            pool,
+            "render",
+            lambda job, client=None, **kwargs: clients.append((client, kwargs.get("host"))) or render(job, client, **kwargs),
+        )
+        request(f"{server_url}/api/render", {"asset": load_asset()}, headers={"X-Client-Id": "tab-1"})
+        request(f"{server_url}/api/render", {"asset": load_asset()})
+        assert clients == [("127.0.0.1/tab-1", "127.0.0.1"), ("127.0.0.1", "127.0.0.1")]
+
+        def busy(*args, **kwargs):
+            raise RenderBusy("Render queue is full", 503, 7)
+
+        monkeypatch.setattr(pool, "render", busy)
+        status, headers, body = request(f"{server_url}/api/render", {"asset": load_asset()})
+        assert status == 503
+        assert headers["Retry-After"] == "7"
+        assert json.loads(body)["retry_after"] == 7
+    finally:
+        pool.close()
+
+
+def test_metrics_report_stages_and_server_timing(server_url):
+    from src.preview import server as preview_server
+
+    preview_server.METRICS.reset()
+    changed = load_asset()
+    changed["layers"][0]["rect"]["width"] = 77
+    status, headers, _ = request(f"{server_url}/api/compile", {"asset": changed})
+    assert status == 200
+    timing = headers["Server-Timing"]
+    for stage in ("decode", "normalize", "validate", "compile", "serialize", "total"):
+        assert f"{stage};dur=" in timing
+    request(f"{server_url}/api/compile", {"asset": []})
+    request(f"{server_url}/api/session/abc123")
+
+    status, _, body = request(f"{server_url}/api/metrics?format=json")
+    metrics = json.loads(body)["endpoints"]
+    assert metrics["/api/compile"]["requests"] == {"POST 200": 1, "POST 400": 1}
+    assert metrics["/api/compile"]["errors"] == 1
+    assert metrics["/api/compile"]["stages"]["compile"]["count"] == 1
+    assert "/api/session/{id}" in metrics
+
+    status, headers, body = request(f"{server_url}/api/metrics")
+    assert headers["Content-Type"].startswith("text/plain")
+    text = body.decode("utf-8")
+    assert 'preview_requests_total{endpoint="/api/compile",method="POST",status="200"} 1' in text
+    assert 'preview_stage_duration_seconds_count{endpoint="/api/compile",stage="validate"} 1' in text
+    assert 'preview_request_duration_seconds_bucket{endpoint="/api/compile",le="+Inf"} 2' in text
+
+
+def test_identical_concurrent_compiles_share_one_compile(server_url, monkeypatch):
+    from src.preview import server as preview_server
+
+    calls = []
+    release = threading.Event()
+    real_compile = preview_server.compile_svg
+
+    def slow_compile(asset, budget=None):
+        calls.append(1)
+        assert release.wait(5)
+        return real_compile(asset, budget)
+
+    monkeypatch.setattr(preview_server, "compile_svg", slow_compile)
+    asset = load_asset()
+    asset["layers"][0]["rect"]["width"] = 91
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(request(f"{server_url}/api/compile", {"asset": asset})))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    while not calls:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert [status for status, _, _ in results] == [200, 200, 200]
+
+
+def test_compile_rejects_assets_over_budget(server_url):
+    gauge_path = Path(__file__).resolve().parents[1] / "examples" / "gauge_segmented.json"
+    asset = json.loads(gauge_path.read_text(encoding="utf-8"))
+    asset["components"][0]["layers"][0]["shape_params"]["segment_count"] = 10_000_000
+    status, _, body = request(f"{server_url}/api/compile", {"asset": asset})
+    assert status == 422
+    payload = json.loads(body)
+    assert payload["limit"] == "elements"
+    assert payload["estimate"]["elements"] > 10_000_000
@@ -0,0 +1,114 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.renderer import RenderBusy, RenderPool, RenderRequest
+
+
+class FakeRenderer:
+    instances = 0
+
+    def __init__(self, gate: threading.Event | None = None) -> None:
+        FakeRenderer.instances += 1
+        self.gate = gate
+
+    def export_png(self, svg_path: Path, png_path: Path, width=None, height=None) -> None:
+        if self.gate is not None:
+            assert self.gate.wait(5)
+        png_path.write_bytes(f"png:{width}x{height}:{svg_path.read_text(encoding='utf-8')}".encode("utf-8"))
+
+    def close(self) -> None:
+        return None
+
+
+def test_pool_reuses_one_renderer_per_worker():
+    FakeRenderer.instances = 0
+    pool = RenderPool(workers=1, renderer_factory=lambda backend: FakeRenderer())
+    try:
+        for index in range(3):
+            png = pool.render(RenderRequest(svg=f"<svg>{index}</svg>", width=4, height=2), timeout=5)
+            assert png == f"png:4x2:<svg>{index}</svg>".encode("utf-8")
+    finally:
+        pool.close()
+    assert FakeRenderer.instances == 1
+
+
+def test_pool_applies_per_client_and_global_backpressure():
+    gate = threading.Event()
+    pool = RenderPool(workers=1, queue_size=2, per_client=2, renderer_factory=lambda backend: FakeRenderer(gate))
+    try:
+        request = RenderRequest(svg="<svg/>", width=1, height=1)
+        futures = [pool.submit(request, client="bulk")]
+        while not futures[0].running():
+            time.sleep(0.01)
+        futures.append(pool.submit(request, client="bulk"))
+        with pytest.raises(RenderBusy) as per_client:
+            pool.submit(request, client="bulk")
+        assert per_client.value.status == 429
+        assert per_client.value.retry_after >= 1
+
+        futures.append(pool.submit(request, client="other"))
+        with pytest.raises(RenderBusy) as saturated:
+            pool.submit(request, client="third")
+        assert saturated.value.status == 503
+
+        gate.set()
+        assert all(future.result(timeout=5).startswith(b"png:") for future in futures)
+        assert pool.submit(request, client="bulk").result(timeout=5)
+    finally:
+        gate.set()
+        pool.close()
+
+
+def test_clients_sharing_a_host_share_its_cap():
+    gate = threading.Event()
+    pool = RenderPool(workers=1, queue_size=8, per_client=1, per_host=2, renderer_factory=lambda backend: FakeRenderer(gate))
+    try:
+        request = RenderRequest(svg="<svg/>", width=1, height=1)
+        futures = [pool.submit(request, client=f"10.0.0.1/tab-{index}", host="10.0.0.1") for index in range(2)]
+        # A fresh client name from the same address does not get past the host cap.
+        with pytest.raises(RenderBusy) as per_host:
+            pool.submit(request, client="10.0.0.1/tab-2", host="10.0.0.1")
+        assert per_host.value.status == 429
+        futures.append(pool.submit(request, client="10.0.0.2", host="10.0.0.2"))
+
+        gate.set()
+        assert all(future.result(timeout=5).startswith(b"png:") for future in futures)
+        assert pool.submit(request, client="10.0.0.1/tab-2", host="10.0.0.1").result(timeout=5)
+    finally:
+        gate.set()
+        pool.close()
+
+
+def test_renderer_errors_surface_on_the_future():
+    def factory(backend):
+        raise RuntimeError("resvg was not found in PATH. Install it to enable rendering.")
+
+    pool = RenderPool(workers=1, renderer_factory=factory)
+    try:
+        with pytest.raises(RuntimeError, match="not found"):
+            pool.render(RenderRequest(svg="<svg/>", backend="resvg"), timeout=5)
+        with pytest.raises(ValueError):
+            pool.submit(RenderRequest(svg="<svg/>", backend="cairo"))
+    finally:
+        pool.close()
+
+
+def test_postprocess_runs_on_the_worker_and_keeps_the_renderer():
+    FakeRenderer.instances = 0
+    pool = RenderPool(workers=1, renderer_factory=lambda backend: FakeRenderer())
+    try:
+        future = pool.submit(RenderRequest(svg="<svg/>", width=1, height=1), postprocess=lambda png: (threading.current_thread().name, len(png)))
+        assert future.result(timeout=5) == ("render-worker-0", len(b"png:1x1:<svg/>"))
+
+        def fail(png):
+            raise ValueError("bad png")
+
+        with pytest.raises(ValueError, match="bad png"):
+            pool.submit(RenderRequest(svg="<svg/>"), postprocess=fail).result(timeout=5)
+        assert pool.render(RenderRequest(svg="<svg/>", width=2, height=2), timeout=5) == b"png:2x2:<svg/>"
+    finally:
+        pool.close()
+    assert FakeRenderer.instances == 1
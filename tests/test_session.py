@@ -0,0 +1,198 @@
+import json
+import math
+import re
+import unicodedata
+import zlib
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+import src.cli as cli
+from src.compiler import FrameSequence, compile_svg
+from src.compiler.geometry import IDENTITY, inflate, local_name, multiply, parse_transform, shape_bbox, transform_bbox
+from src.renderer import RasterImage, RasterSession, decode_png, encode_png
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+SHAPES = ("rect", "circle", "path", "polygon")
+URL_RE = re.compile(r"url\(#([^)]+)\)")
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+def text_extent(element: ET.Element) -> tuple:
+    """Hanging-baseline text box from per-glyph advances: 1 em for wide East Asian glyphs, 0.6 em otherwise."""
+    size = float(element.get("font-size", 16))
+    lines = [span.text or "" for span in element if local_name(span.tag) == "tspan"] or [element.text or ""]
+    width = max(sum(size if unicodedata.east_asian_width(glyph) in ("W", "F") else size * 0.6 for glyph in line) for line in lines)
+    x = float(element.get("x", 0)) - width * {"middle": 0.5, "end": 1.0}.get(element.get("text-anchor"), 0.0)
+    return (x, float(element.get("y", 0)), width, size * 1.2 * len(lines))
+
+
+def paint_boxes(svg: str, width: int, height: int) -> RasterImage:
+    """Fills each visible shape's extent with a color hashed from its markup and the defs it uses, in paint order.
+
+    Text advances and blur spread are measured here rather than taken from
+    `BBoxIndex`, so a dirty region the session underestimates leaves stale
+    pixels that a full render of the new SVG does not have.
+    """
+    root = ET.fromstring(svg)
+    by_id = {element.get("id"): element for element in root.iter() if element.get("id")}
+    view_x, view_y, view_width, view_height = (float(value) for value in root.get("viewBox").split())
+    scale = min(width / view_width, height / view_height)
+    view_x -= (width - view_width * scale) / 2 / scale
+    view_y -= (height - view_height * scale) / 2 / scale
+    image = RasterImage(width, height)
+
+    def paint(element: ET.Element, matrix: tuple, blur: float, markup: bytes) -> None:
+        if element.get("display") == "none" or local_name(element.tag) in ("defs", "clipPath"):
+            return
+        matrix = multiply(matrix, parse_transform(element.get("transform")))
+        for reference in URL_RE.findall(" ".join(element.attrib.values())):
+            used = by_id.get(reference)
+            if used is not None:
+                markup += ET.tostring(used)
+                deviations = [float(node.get("stdDeviation", 0)) for node in used.iter() if local_name(node.tag) == "feGaussianBlur"]
+                blur += 3 * max(deviations, default=0.0) * math.hypot(matrix[0], matrix[1])
+        tag = local_name(element.tag)
+        local = text_extent(element) if tag == "text" else shape_bbox(element) if tag in SHAPES else None
+        if local is not None:
+            box = inflate(transform_bbox(matrix, local), blur)
+            color = zlib.crc32(ET.tostring(element) + markup).to_bytes(4, "big")[:3] + b"\xff"
+            left, right = (min(max(math.ceil((value - view_x) * scale - 0.5), 0), width) for value in (box[0], box[0] + box[2]))
+            top, bottom = (min(max(math.ceil((value - view_y) * scale - 0.5), 0), height) for value in (box[1], box[1] + box[3]))
+            for row in range(top, bottom):
+                offset = (row * width + left) * 4
+                image.pixels[offset:offset + (right - left) * 4] = color * (right - left)
+        for child in element:
+            paint(child, matrix, blur, markup)
+
+    paint(root, IDENTITY, 0.0, b"")
+    return image
+
+
+class BoxRenderer:
+    def __init__(self) -> None:
+        self.areas = []
+
+    def export_png(self, svg_path: Path, png_path: Path, width=None, height=None) -> None:
+        self.areas.append(width * height)
+        png_path.write_bytes(encode_png(paint_boxes(svg_path.read_text(encoding="utf-8"), width, height)))
+
+    def close(self) -> None:
+        return None
+
+
+def test_session_patches_only_the_changed_region():
+    asset = load_example("hud_basic.mock.json")
+    sequence = FrameSequence(asset)
+    renderer = BoxRenderer()
+    session = RasterSession(320, 180, renderer_factory=lambda _: renderer)
+    try:
+        regions = []
+        for var, values in (("player.hpRatio", [0.35, 0.8, 0.1]), ("badge.count", [5, 120])):
+            for svg in sequence.sweep(var, values):
+                regions.append(session.update(svg))
+                assert session.image == paint_boxes(svg, 320, 180)
+        assert regions[0] == (0, 0, 320, 180)
+        # The HP bar sits in the top-left corner; its updates stay there.
+        assert all(region[0] < 80 and region[1] < 30 and region[2] * region[3] < 320 * 180 / 10 for region in regions[1:3])
+        assert max(renderer.areas[1:3]) < 320 * 180 / 50
+        # Switching variables re-renders the union of the HP bar and the badge; then only the badge.
+        assert regions[4][0] > 240 and regions[4][1] > 140
+        assert session.update(svg) is None
+    finally:
+        session.close()
+
+
+def test_session_repaints_the_users_of_changed_defs():
+    renderer = BoxRenderer()
+    session = RasterSession(256, 72, renderer_factory=lambda _: renderer)
+    svg = compile_svg(load_example("button_sf.json"))
+    try:
+        session.update(svg)
+        edits = [
+            # Only the highlight gradient's stop changes: repaint the highlight.
+            ('stop-color="#FFFFFF" stop-opacity="0.650"', 'stop-color="#FFEE00" stop-opacity="0.650"'),
+            # Only the glow's blur widens: repaint the body with its larger spread.
+            ('stdDeviation="9.00"', 'stdDeviation="12.00"'),
+        ]
+        regions = []
+        for before, after in edits:
+            svg = svg.replace(before, after)
+            regions.append(session.update(svg))
+            assert session.image == paint_boxes(svg, 256, 72)
+        assert regions[0] == (15, 13, 226, 24)
+        assert regions[1] == (0, 0, 256, 72)
+
+        # A def nothing uses has no box to narrow to: everything is repainted.
+        unused = svg.replace("</defs>", '<linearGradient id="spare"><stop offset="0" stop-color="#000" /></linearGradient></defs>')
+        assert session.update(unused) == (0, 0, 256, 72)
+    finally:
+        session.close()
+
+
+def test_session_covers_wide_glyphs():
+    renderer = BoxRenderer()
+    session = RasterSession(320, 80, renderer_factory=lambda _: renderer)
+    template = (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 320 80">'
+        '<g id="label"><text x="8" y="8" font-size="24" dominant-baseline="hanging">{}</text></g></svg>'
+    )
+    try:
+        session.update(template.format("OK"))
+        for text in ("スタート画面", "OK"):
+            svg = template.format(text)
+            region = session.update(svg)
+            assert region[2] >= 6 * 24
+            assert session.image == paint_boxes(svg, 320, 80)
+    finally:
+        session.close()
+
+
+def test_session_bleed_follows_the_glows_transform():
+    renderer = BoxRenderer()
+    session = RasterSession(100, 100, renderer_factory=lambda _: renderer)
+    template = (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+        '<defs><filter id="glow"><feGaussianBlur stdDeviation="2" /></filter></defs>'
+        '<g transform="scale(3)"><rect x="10" y="10" width="5" height="5" filter="url(#glow)" /></g>'
+        '<rect id="dot" x="40" y="40" width="4" height="4" fill="{}" /></svg>'
+    )
+    try:
+        session.update(template.format("#000"))
+        left, top, width, height = session.update(template.format("#FFF"))
+        # The glow spreads 3 x 2 user units at 3x: 18 px of margin (plus one) on every side.
+        assert renderer.areas[-1] == (width + 2 * 19) * (height + 2 * 19)
+    finally:
+        session.close()
+
+
+def test_session_rerenders_everything_when_the_view_box_changes():
+    renderer = BoxRenderer()
+    session = RasterSession(128, 36, renderer_factory=lambda _: renderer)
+    asset = load_example("button_sf.json")
+    session.update(compile_svg(asset))
+    wider = dict(asset, viewBox=[0, 0, 300, 72])
+    assert session.update(compile_svg(wider)) == (0, 0, 128, 36)
+    assert session.image == paint_boxes(compile_svg(wider), 128, 36)
+    session.close()
+
+
+def test_frames_cli_dirty_mode_records_regions(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        cli,
+        "RasterSession",
+        lambda width, height, backend: RasterSession(width, height, backend, renderer_factory=lambda _: BoxRenderer()),
+    )
+    args = [
+        "frames", "--in", str(EXAMPLES_DIR / "hud_basic.mock.json"), "--var", "skill.cooldown",
+        "--steps", "3", "--scale", "0.25", "--dirty", "--out", str(tmp_path),
+    ]
+    assert cli.main(args) == 0
+    metadata = json.loads((tmp_path / "hud_basic.mock.frames.json").read_text(encoding="utf-8"))
+    first, second, _ = metadata["frames"]
+    assert first["region"] == [0, 0, 320, 180]
+    assert second["region"][2] * second["region"][3] < 320 * 180 / 10
+    image = decode_png((tmp_path / second["file"]).read_bytes())
+    assert (image.width, image.height) == (320, 180)
@@ -0,0 +1,75 @@
+import copy
+import json
+import re
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+import pytest
+
+from src.cli import main
+from src.compiler import build_sprite
+from src.validator import validate_asset
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+SVG_NS = "{http://www.w3.org/2000/svg}"
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+def _ids(root: ET.Element) -> list:
+    return [element.get("id") for element in root.iter() if element.get("id")]
+
+
+def test_sprite_shares_defs_and_keeps_ids_unique():
+    assets = [(name, load_example(f"{name}.json")) for name in ("button_sf", "gauge_segmented", "custom_fx_glow")]
+    svg, manifest = build_sprite(assets)
+    root = ET.fromstring(svg)
+
+    [defs] = root.findall(f"{SVG_NS}defs")
+    gradients = [element.get("id") for element in defs if element.tag == f"{SVG_NS}linearGradient"]
+    assert gradients.count("ui-primaryGradient") == 1
+    symbols = root.findall(f"{SVG_NS}symbol")
+    assert [symbol.get("id") for symbol in symbols] == ["button_sf", "gauge_segmented", "custom_fx_glow"]
+    assert symbols[0].find(f"{SVG_NS}g").get("id") == "button_sf--button-body"
+
+    ids = _ids(root)
+    assert len(ids) == len(set(ids))
+    assert set(re.findall(r"url\(#([^)]+)\)", svg)) <= set(ids)
+    assert manifest["symbols"]["button_sf"] == {"viewBox": [0, 0, 256, 72]}
+
+
+def test_sprite_renames_a_token_themed_differently_per_asset():
+    plain = load_example("button_sf.json")
+    themed = copy.deepcopy(plain)
+    themed["theme"] = {
+        "gradients": {
+            "ui.primaryGradient": {
+                "angle": 90,
+                "stops": [{"offset": 0, "color": "#000000"}, {"offset": 1, "color": "#FFFFFF"}],
+            }
+        }
+    }
+    validate_asset(themed)
+    svg, _ = build_sprite([("plain", plain), ("themed", themed)])
+    root = ET.fromstring(svg)
+
+    plain_fill = {element.get("fill") for element in root.find(f"{SVG_NS}symbol[@id='plain']").iter()}
+    themed_fill = {element.get("fill") for element in root.find(f"{SVG_NS}symbol[@id='themed']").iter()}
+    assert "url(#ui-primaryGradient)" in plain_fill
+    assert "url(#ui-primaryGradient)" not in themed_fill
+    assert any(fill and fill.startswith("url(#ui-primaryGradient-") for fill in themed_fill)
+
+    with pytest.raises(ValueError, match="Duplicate sprite symbol id"):
+        build_sprite([("plain", plain), ("plain", themed)])
+
+
+def test_sprite_cli_writes_svg_and_manifest(tmp_path):
+    out = tmp_path / "ui.svg"
+    assert main(["sprite", "--in", str(EXAMPLES_DIR), "--out", str(out)]) == 0
+
+    manifest = json.loads((tmp_path / "ui.json").read_text(encoding="utf-8"))
+    assert sorted(manifest["symbols"]) == sorted(path.stem for path in EXAMPLES_DIR.glob("*.json"))
+    root = ET.fromstring(out.read_text(encoding="utf-8"))
+    assert len(root.findall(f"{SVG_NS}symbol")) == len(manifest["symbols"])
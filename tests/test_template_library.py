@@ -0,0 +1,64 @@
+import json
+import os
+from pathlib import Path
+
+from src.preview.library import TemplateLibrary
+from src.preview.server import GENERATOR_LIBRARY
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+EXAMPLE_PATH = ROOT_DIR / "examples" / "button_sf.json"
+
+
+def build_library() -> TemplateLibrary:
+    library = TemplateLibrary(GENERATOR_LIBRARY, ROOT_DIR)
+    library.preload()
+    return library
+
+
+def test_all_templates_preload_without_errors():
+    library = build_library()
+    assert library.errors == {}
+
+
+def test_japanese_keywords_match_inside_sentences():
+    library = build_library()
+    ranked = library.rank("円形ゲージで進捗を見せたい")
+    assert ranked[0]["id"] == "gauge_radial_polygon"
+    assert set(ranked[0]["matches"]) == {"円形", "ゲージ", "進捗"}
+
+
+def test_ascii_keywords_match_whole_words_only():
+    library = build_library()
+    ranked = library.rank("a table of results")
+    tab_bar = next(item for item in ranked if item["id"] == "tab_bar")
+    assert tab_bar["matches"] == []
+
+
+def test_select_falls_back_and_returns_private_copies():
+    library = build_library()
+    first = library.select("zzz")
+    assert first["reason"] == "fallback"
+    assert first["selected"] == GENERATOR_LIBRARY[0]["id"]
+
+    first["asset"]["metadata"] = {"mutated": True}
+    second = library.select("zzz")
+    assert second["asset"].get("metadata") != {"mutated": True}
+
+
+def test_cached_asset_is_reloaded_when_file_changes(tmp_path):
+    asset = json.loads(EXAMPLE_PATH.read_text(encoding="utf-8"))
+    template_path = tmp_path / "button.json"
+    template_path.write_text(json.dumps(asset), encoding="utf-8")
+    library = TemplateLibrary(
+        [{"id": "button", "path": str(template_path), "keywords": ["button"], "tags": []}],
+        tmp_path,
+    )
+    library.preload()
+    entry = library.entries[0]
+    assert library.asset(entry)["viewBox"] == asset["viewBox"]
+
+    asset["layers"][0]["id"] = "renamed"
+    template_path.write_text(json.dumps(asset, indent=2), encoding="utf-8")
+    stat = template_path.stat()
+    os.utime(template_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert library.asset(entry)["layers"][0]["id"] == "renamed"
@@ -0,0 +1,94 @@
+import json
+import re
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+import src.cli as cli
+from src.compiler import compile_svg
+from src.renderer import RasterImage, decode_png, encode_png, render_tiled
+from src.renderer.tiles import blur_bleed, plan_tiles
+
+EXAMPLES_DIR = Path(__file__).resolve().parents[1] / "examples"
+
+
+def load_example(name: str) -> dict:
+    return json.loads((EXAMPLES_DIR / name).read_text(encoding="utf-8"))
+
+
+class CoordinateRenderer:
+    """Paints each pixel with the user-space point at its center, mapped like `xMidYMid meet`."""
+
+    def __init__(self) -> None:
+        self.sizes = []
+
+    def export_png(self, svg_path: Path, png_path: Path, width=None, height=None) -> None:
+        root = ET.fromstring(svg_path.read_text(encoding="utf-8"))
+        view_x, view_y, view_width, view_height = (float(value) for value in re.split(r"[\s,]+", root.get("viewBox")))
+        scale = min(width / view_width, height / view_height)
+        offset_x, offset_y = (width - view_width * scale) / 2, (height - view_height * scale) / 2
+        image = RasterImage(width, height)
+        for py in range(height):
+            v = round((view_y + (py + 0.5 - offset_y) / scale) * 10) % 256
+            for px in range(width):
+                u = round((view_x + (px + 0.5 - offset_x) / scale) * 10) % 256
+                offset = (py * width + px) * 4
+                image.pixels[offset:offset + 4] = bytes((u, v, 7, 255))
+        self.sizes.append((width, height))
+        png_path.write_bytes(encode_png(image))
+
+    def close(self) -> None:
+        return None
+
+
+def full_render(svg: str, width: int, height: int, tmp_path: Path) -> RasterImage:
+    svg_path, png_path = tmp_path / "full.svg", tmp_path / "full.png"
+    svg_path.write_text(svg, encoding="utf-8")
+    CoordinateRenderer().export_png(svg_path, png_path, width, height)
+    return decode_png(png_path.read_bytes())
+
+
+def test_tiles_cover_the_image_once_with_clamped_bleed():
+    tiles = plan_tiles(100, 70, tile_size=32, bleed=5)
+    assert len(tiles) == 4 * 3
+    assert sum(tile.width * tile.height for tile in tiles) == 100 * 70
+    assert tiles[0].render_box == (0, 0, 37, 37)
+    assert tiles[5].render_box == (27, 27, 42, 42)
+    assert tiles[-1].render_box == (91, 59, 9, 11)
+
+    # button_sf's glow has stdDeviation 9: three deviations at scale 2, plus a pixel.
+    assert blur_bleed(ET.fromstring(compile_svg(load_example("button_sf.json"))), 2) == 55
+    assert blur_bleed(ET.fromstring(compile_svg(load_example("gauge_segmented.json"))), 2) == 0
+
+
+def test_blur_bleed_follows_the_filtered_elements_transform():
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+        '<defs><filter id="glow"><feGaussianBlur stdDeviation="2" /></filter></defs>'
+        '<g transform="translate(10 10) scale(3)"><rect width="5" height="5" filter="url(#glow)" /></g>'
+        "</svg>"
+    )
+    # Three deviations of 2 user units, drawn at 3x inside the group and 2x on output.
+    assert blur_bleed(ET.fromstring(svg), 2) == 37
+    assert blur_bleed(ET.fromstring(svg.replace(" scale(3)", "")), 2) == 13
+
+
+def test_stitched_tiles_match_a_single_render(tmp_path):
+    svg = compile_svg(load_example("button_sf.json"))
+    for width, height in ((128, 36), (110, 40)):
+        renderer = CoordinateRenderer()
+        stitched = render_tiled(svg, width, height, tile_size=16, workers=3, renderer_factory=lambda _: renderer)
+        assert stitched == full_render(svg, width, height, tmp_path), (width, height)
+        # Workers only ever see a tile plus its bleed on each side.
+        bleed = blur_bleed(ET.fromstring(svg), min(width / 256, height / 72))
+        assert max(max(size) for size in renderer.sizes) <= 16 + 2 * bleed
+
+
+def test_render_cli_tiles_png_output(tmp_path, monkeypatch):
+    def fake_render_tiled(svg, width, height, tile_size, backend, workers):
+        return render_tiled(svg, width, height, tile_size, backend, workers, renderer_factory=lambda _: CoordinateRenderer())
+
+    monkeypatch.setattr(cli, "render_tiled", fake_render_tiled)
+    args = ["render", "--in", str(EXAMPLES_DIR / "button_sf.json"), "--out", str(tmp_path), "--only", "png"]
+    assert cli.main(args + ["--tile", "50", "--size", "240x120"]) == 0
+    image = decode_png((tmp_path / "button_sf.png").read_bytes())
+    assert (image.width, image.height) == (240, 120)
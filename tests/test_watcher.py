@@ -0,0 +1,101 @@
+import json
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.compiler import COMPILER_VERSION
+from src.constraints import normalize_asset_constraints
+from src.preview import server
+from src.preview.caching import compile_etag
+from src.preview.watcher import FileWatcher, InotifyBackend, PollingBackend
+
+EXAMPLE_PATH = Path(__file__).resolve().parents[1] / "examples" / "button_sf.json"
+
+
+def collect_batches(watcher_factory, action, expected: int = 1, timeout: float = 5.0):
+    batches = []
+    done = threading.Event()
+
+    def callback(paths):
+        batches.append(paths)
+        if len(batches) >= expected:
+            done.set()
+
+    watcher = watcher_factory(callback)
+    watcher.start()
+    try:
+        action()
+        assert done.wait(timeout)
+    finally:
+        watcher.stop()
+    return batches
+
+
+def write_burst(directory: Path) -> None:
+    for index in range(5):
+        (directory / "a.json").write_text(json.dumps({"n": index}), encoding="utf-8")
+        (directory / "b.json").write_text(json.dumps({"n": index}), encoding="utf-8")
+        (directory / ".hidden.json").write_text("{}", encoding="utf-8")
+        time.sleep(0.01)
+
+
+def test_polling_watcher_coalesces_a_burst_into_one_batch(tmp_path):
+    batches = collect_batches(
+        lambda callback: FileWatcher(
+            [tmp_path],
+            callback,
+            debounce=0.3,
+            backend=PollingBackend([tmp_path]),
+            poll_interval=0.05,
+        ),
+        lambda: write_burst(tmp_path),
+    )
+    assert batches[0] == [tmp_path / "a.json", tmp_path / "b.json"]
+
+
+def test_inotify_watcher_reports_changes_and_new_directories(tmp_path):
+    try:
+        backend = InotifyBackend([tmp_path])
+    except (OSError, AttributeError):
+        pytest.skip("inotify is not available")
+
+    def action():
+        (tmp_path / "nested").mkdir()
+        time.sleep(0.1)
+        (tmp_path / "nested" / "c.json").write_text("{}", encoding="utf-8")
+        (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    batches = collect_batches(
+        lambda callback: FileWatcher([tmp_path], callback, debounce=0.3, backend=backend, poll_interval=0.05),
+        action,
+    )
+    assert batches[0] == [tmp_path / "nested" / "c.json"]
+
+
+def test_refresh_warms_compile_cache_and_notifies(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "ROOT_DIR", tmp_path)
+    examples = tmp_path / "examples"
+    examples.mkdir()
+    target = examples / "button_sf.json"
+    shutil.copy(EXAMPLE_PATH, target)
+    broken = examples / "broken.json"
+    broken.write_text("{", encoding="utf-8")
+
+    subscriber = server.EVENTS.subscribe()
+    try:
+        files = server.refresh_changed_files([target, broken, examples / "gone.json"])
+        event = subscriber.get(timeout=1)
+    finally:
+        server.EVENTS.unsubscribe(subscriber)
+
+    asset = json.loads(target.read_text(encoding="utf-8"))
+    normalize_asset_constraints(asset)
+    etag = compile_etag(asset, COMPILER_VERSION)
+    assert etag in server.COMPILE_CACHE
+    assert files[0] == {"path": "examples/button_sf.json", "kind": "asset", "etag": etag}
+    assert files[1]["kind"] == "asset" and "error" in files[1]
+    assert files[2] == {"path": "examples/gone.json", "kind": "removed"}
+    assert event == {"event": "changed", "files": files}